@@ -0,0 +1 @@
+"""Chatbot services; the shared LLM client is also imported as chatbot.llm_client by the timeline service"""
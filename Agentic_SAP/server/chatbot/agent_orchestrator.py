@@ -5,17 +5,29 @@ Manages the flow between multiple AI agents for comprehensive course recommendat
 
 import os
 import json
+import time
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import threading
 from skills_analysis_agent import SkillsAnalysisAgent
 from goals_analysis_agent import GoalsAnalysisAgent  
 from feedback_analysis_agent import FeedbackAnalysisAgent
+from fused_analysis_agent import FusedAnalysisAgent
 
 class AgentOrchestrator:
-    def __init__(self):
+    AGENT_NAMES = ("skills_analysis", "goals_analysis", "feedback_analysis")
+    
+    def __init__(self, agent_timeout=None, agent_timeouts=None):
         self.skills_agent = SkillsAnalysisAgent()
         self.goals_agent = GoalsAnalysisAgent()
         self.feedback_agent = FeedbackAnalysisAgent()
+        self.fused_agent = FusedAnalysisAgent()
+        
+        # Deadline (seconds) for each agent's LLM call; per-agent overrides by agent name
+        self.agent_timeout = agent_timeout or float(os.getenv("AGENT_TIMEOUT_SECONDS", 8))
+        self.agent_timeouts = agent_timeouts or {}
+        
+        self._loop = None
+        self._loop_lock = threading.Lock()
         
     def get_user_feedback_data(self, user_id):
         """
@@ -31,59 +43,82 @@ class AgentOrchestrator:
         except:
             return []
     
-    def orchestrate_agents(self, user_profile, skill_gaps, available_courses):
+    def orchestrate_agents(self, user_profile, skill_gaps, available_courses, agent_timeout=None):
+        """
+        Coordinate all AI agents to provide comprehensive analysis.
+        Runs the async fan-out on the orchestrator's event loop, so the call returns
+        within roughly the longest agent deadline even if an agent never answers.
+        """
+        deadlines = self._agent_deadlines(agent_timeout)
+        future = asyncio.run_coroutine_threadsafe(
+            self.orchestrate_agents_async(user_profile, skill_gaps, available_courses, agent_timeout),
+            self._get_loop()
+        )
+        try:
+            # Per-agent deadlines bound the coroutine (the longest one sets the limit);
+            # the margin only covers scheduling overhead
+            return future.result(timeout=max(deadlines.values()) + 5)
+        except Exception as e:
+            future.cancel()
+            print(f"❌ Agent orchestration error: {e}")
+            return self._error_analysis(e)
+    
+    async def orchestrate_agents_async(self, user_profile, skill_gaps, available_courses, agent_timeout=None):
         """
-        Coordinate all AI agents to provide comprehensive analysis
+        Run all agents concurrently, each under its own deadline. Agents that miss the
+        deadline are cancelled and replaced by their fallback analysis, and are listed in
+        coordination_metadata["timed_out_agents"].
         """
+        deadlines = self._agent_deadlines(agent_timeout)
+        agent_timeout = agent_timeout if agent_timeout is not None else self.agent_timeout
         try:
             print("🚀 Starting agentic AI analysis...")
             
             # Get user feedback data
             user_feedback = self.get_user_feedback_data(user_profile.get('userId', ''))
             
-            # Run all agents in parallel for efficiency
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                # Submit all agent tasks
-                skills_future = executor.submit(
-                    self.skills_agent.analyze_skills, 
-                    user_profile, 
-                    available_courses
-                )
-                
-                goals_future = executor.submit(
-                    self.goals_agent.analyze_goals,
-                    user_profile,
-                    user_feedback,
-                    available_courses
+            agent_runs = {
+                "skills_analysis": (
+                    self.skills_agent.analyze_skills_async(user_profile, available_courses),
+                    lambda error: self.skills_agent.fallback_result(user_profile, available_courses, error)
+                ),
+                "goals_analysis": (
+                    self.goals_agent.analyze_goals_async(user_profile, user_feedback, available_courses),
+                    lambda error: self.goals_agent.fallback_result(user_profile, user_feedback, available_courses, error)
+                ),
+                "feedback_analysis": (
+                    self.feedback_agent.analyze_feedback_async(user_profile, user_feedback, available_courses),
+                    lambda error: self.feedback_agent.fallback_result(user_profile, user_feedback, available_courses, error)
                 )
-                
-                feedback_future = executor.submit(
-                    self.feedback_agent.analyze_feedback,
-                    user_profile,
-                    user_feedback,
-                    available_courses
-                )
-                
-                # Collect results
-                skills_analysis = skills_future.result()
-                goals_analysis = goals_future.result()
-                feedback_analysis = feedback_future.result()
+            }
             
+            # Run all agents in parallel; wait_for cancels any agent that overruns its deadline
+            results = await asyncio.gather(*[
+                self._run_with_deadline(name, coroutine, fallback, deadlines[name])
+                for name, (coroutine, fallback) in agent_runs.items()
+            ])
+            agent_outputs = {name: output for name, output, _, _ in results}
+            timed_out_agents = [name for name, _, timed_out, _ in results if timed_out]
+            agent_latencies = {name: round(elapsed, 3) for name, _, _, elapsed in results}
+            
+            if timed_out_agents:
+                print(f"⏱️ Agents timed out after {agent_timeout}s: {timed_out_agents}")
             print("✅ All agents completed analysis")
             
             # Combine agent outputs
             combined_analysis = {
-                "agent_outputs": {
-                    "skills_analysis": skills_analysis,
-                    "goals_analysis": goals_analysis,
-                    "feedback_analysis": feedback_analysis
-                },
+                "agent_outputs": agent_outputs,
                 "coordination_metadata": {
                     "total_agents": 3,
                     "successful_agents": sum([
-                        1 for analysis in [skills_analysis, goals_analysis, feedback_analysis]
+                        1 for analysis in agent_outputs.values()
                         if analysis.get("confidence") != "low"
                     ]),
+                    "timed_out_agents": timed_out_agents,
+                    "partial": bool(timed_out_agents),
+                    "agent_timeout_s": agent_timeout,
+                    "agent_deadlines_s": deadlines,
+                    "agent_latencies_s": agent_latencies,
                     "analysis_timestamp": self._get_timestamp()
                 }
             }
@@ -92,19 +127,83 @@ class AgentOrchestrator:
             
         except Exception as e:
             print(f"❌ Agent orchestration error: {e}")
-            return {
-                "agent_outputs": {
-                    "skills_analysis": {"agent": "skills_analysis", "analysis": {}, "confidence": "low", "error": str(e)},
-                    "goals_analysis": {"agent": "goals_analysis", "analysis": {}, "confidence": "low", "error": str(e)},
-                    "feedback_analysis": {"agent": "feedback_analysis", "analysis": {}, "confidence": "low", "error": str(e)}
-                },
-                "coordination_metadata": {
-                    "total_agents": 3,
-                    "successful_agents": 0,
-                    "analysis_timestamp": self._get_timestamp(),
-                    "error": str(e)
-                }
+            return self._error_analysis(e)
+    
+    def orchestrate_fused(self, user_profile, skill_gaps, available_courses, timeout=None):
+        """
+        Single-call alternative to orchestrate_agents: one fused prompt covers all three agents
+        and the coordinator. Returns the same combined_analysis shape plus "coordinator_output".
+        """
+        start = time.perf_counter()
+        user_feedback = self.get_user_feedback_data(user_profile.get('userId', ''))
+        agent_outputs, coordinator_output = self.fused_agent.analyze(user_profile, user_feedback, available_courses, timeout)
+        print("✅ Fused analysis completed")
+        
+        return {
+            "agent_outputs": agent_outputs,
+            "coordinator_output": coordinator_output,
+            "coordination_metadata": {
+                "total_agents": 3,
+                "successful_agents": sum([
+                    1 for analysis in agent_outputs.values()
+                    if analysis.get("confidence") != "low"
+                ]),
+                "timed_out_agents": [],
+                "analysis_mode": "fused",
+                "llm_calls": 1,
+                "fused_latency_s": round(time.perf_counter() - start, 3),
+                "analysis_timestamp": self._get_timestamp()
+            }
+        }
+    
+    def _agent_deadlines(self, budget=None):
+        """
+        Deadline per agent: its override, else the default. A budget passed by the caller
+        (derived from a request deadline) is the default and caps every override too.
+        """
+        default = self.agent_timeout if budget is None else budget
+        deadlines = {name: self.agent_timeouts.get(name, default) for name in self.AGENT_NAMES}
+        if budget is not None:
+            deadlines = {name: min(timeout, budget) for name, timeout in deadlines.items()}
+        return deadlines
+    
+    async def _run_with_deadline(self, name, coroutine, fallback, timeout):
+        """Await one agent; on deadline, cancel it and substitute its fallback analysis"""
+        start = time.perf_counter()
+        try:
+            output = await asyncio.wait_for(coroutine, timeout)
+            return name, output, False, time.perf_counter() - start
+        except asyncio.TimeoutError:
+            output = fallback(f"Agent timed out after {timeout}s")
+            output["timed_out"] = True
+            return name, output, True, time.perf_counter() - start
+    
+    def _get_loop(self):
+        """Long-lived event loop thread shared by every request (keeps async HTTP pools warm)"""
+        if self._loop is None:
+            with self._loop_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="agent-orchestrator-loop", daemon=True)
+                    thread.start()
+                    self._loop = loop
+        return self._loop
+    
+    def _error_analysis(self, e):
+        return {
+            "agent_outputs": {
+                "skills_analysis": {"agent": "skills_analysis", "analysis": {}, "confidence": "low", "error": str(e)},
+                "goals_analysis": {"agent": "goals_analysis", "analysis": {}, "confidence": "low", "error": str(e)},
+                "feedback_analysis": {"agent": "feedback_analysis", "analysis": {}, "confidence": "low", "error": str(e)}
+            },
+            "coordination_metadata": {
+                "total_agents": 3,
+                "successful_agents": 0,
+                "timed_out_agents": [],
+                "analysis_timestamp": self._get_timestamp(),
+                "error": str(e)
             }
+        }
     
     def _get_timestamp(self):
         """Get current timestamp for metadata"""
@@ -1,10 +1,10 @@
-import requests
 import os
 import json
+import time
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import get_llm_client
 from agent_orchestrator import AgentOrchestrator
 
 # =========================
@@ -25,42 +25,118 @@ CORS(app)
 # Initialize the agentic AI orchestrator
 orchestrator = AgentOrchestrator()
 
+# "multi_agent" runs three agents plus a coordinator; "fused" does all four in one LLM call
+ANALYSIS_MODES = ["multi_agent", "fused"]
+DEFAULT_ANALYSIS_MODE = os.getenv("SKILL_ANALYSIS_MODE", "multi_agent")
+
+# End-to-end latency budget for one analysis, and the share that must remain for the coordinator
+REQUEST_DEADLINE_SECONDS = float(os.getenv("SKILL_ANALYSIS_DEADLINE_SECONDS", 12))
+COORDINATOR_MIN_BUDGET_SECONDS = float(os.getenv("COORDINATOR_MIN_BUDGET_SECONDS", 3))
+
 # =========================
 # Agentic AI Skill Gap Analysis
 # =========================
-def get_ai_skill_recommendations(user_profile, skill_gaps, available_courses):
+def get_ai_skill_recommendations(user_profile, skill_gaps, available_courses, analysis_mode=None, deadline=None):
     """
     Use multi-agent LLM system to analyze skill gaps and provide intelligent course recommendations
-    with coordinated insights from Skills, Goals, and Feedback analysis agents
+    with coordinated insights from Skills, Goals, and Feedback analysis agents.
+    analysis_mode="fused" produces the same result shape from a single LLM call.
+    
+    deadline is an absolute time.monotonic() value. Agents get whatever budget remains after
+    reserving COORDINATOR_MIN_BUDGET_SECONDS; if the coordinator cannot fit, the deterministic
+    simple recommender answers instead. The result's "response_tier" names the tier used.
     """
+    analysis_mode = analysis_mode or DEFAULT_ANALYSIS_MODE
+    start = time.monotonic()
+    deadline = deadline or start + REQUEST_DEADLINE_SECONDS
+    
+    def simple_tier(reason):
+        print(f"⏱️ Using simple recommendations: {reason}")
+        return with_response_tier(
+            generate_simple_recommendations(user_profile, skill_gaps, available_courses),
+            "simple", start, deadline, reason
+        )
+    
     try:
-        print("🤖 Starting agentic AI analysis...")
+        print(f"🤖 Starting agentic AI analysis ({analysis_mode})...")
         
         # If we have limited courses, use a simpler approach
         if len(available_courses) <= 3:
-            return generate_simple_recommendations(user_profile, skill_gaps, available_courses)
+            return simple_tier("limited_courses")
         
-        # Step 1: Orchestrate all AI agents
-        agent_analysis = orchestrator.orchestrate_agents(user_profile, skill_gaps, available_courses)
+        if analysis_mode == "fused":
+            # One call returns every agent section plus the coordinator section
+            fused_budget = deadline - time.monotonic()
+            if fused_budget < COORDINATOR_MIN_BUDGET_SECONDS:
+                return simple_tier("budget_exhausted_before_fused_call")
+            agent_analysis = orchestrator.orchestrate_fused(
+                user_profile, skill_gaps, available_courses, timeout=fused_budget
+            )
+            coordinator_output = agent_analysis.pop("coordinator_output", None)
+            if coordinator_output is None and agent_analysis["coordination_metadata"]["successful_agents"] == 0:
+                return simple_tier("fused_call_failed")
+            recommendations = parse_coordinator_output(
+                json.dumps(coordinator_output) if coordinator_output else "",
+                user_profile,
+                agent_analysis,
+                available_courses,
+                []
+            )
+            recommendations.setdefault("agentic_metadata", {})["analysis_mode"] = "fused"
+            tier = "fused" if recommendations["agentic_metadata"].get("coordination_success") else "agent_fallback"
+            return with_response_tier(recommendations, tier, start, deadline)
+        
+        # Step 1: Orchestrate all AI agents, leaving room for the coordinator
+        agent_budget = deadline - time.monotonic() - COORDINATOR_MIN_BUDGET_SECONDS
+        if agent_budget <= 0:
+            return simple_tier("budget_too_small_for_agents")
+        agent_analysis = orchestrator.orchestrate_agents(
+            user_profile, skill_gaps, available_courses,
+            agent_timeout=min(orchestrator.agent_timeout, agent_budget)
+        )
         
         # Step 2: Extract prioritized course recommendations
         course_priorities = orchestrator.extract_course_priorities(agent_analysis)
         
         # Step 3: Use coordinator LLM to synthesize all agent outputs into final recommendations
+        coordinator_budget = deadline - time.monotonic()
+        if coordinator_budget < COORDINATOR_MIN_BUDGET_SECONDS:
+            return simple_tier("budget_exhausted_before_coordinator")
         coordinator_recommendations = generate_coordinator_response(
             user_profile, 
             agent_analysis, 
             course_priorities, 
             available_courses,
-            []  # Pass empty feedback for now, will be loaded in API endpoint
+            [],  # Pass empty feedback for now, will be loaded in API endpoint
+            timeout=coordinator_budget
         )
+        metadata = coordinator_recommendations.setdefault("agentic_metadata", {})
+        metadata["analysis_mode"] = "multi_agent"
+        metadata["timed_out_agents"] = agent_analysis["coordination_metadata"].get("timed_out_agents", [])
         
-        return coordinator_recommendations
+        # A coordinator failure (including running out of budget) has no recommendations to show
+        if metadata.get("fallback_reason") == "coordinator_error":
+            return simple_tier("coordinator_failed")
+        tier = "coordinator" if metadata.get("coordination_success") else "agent_fallback"
+        return with_response_tier(coordinator_recommendations, tier, start, deadline)
         
     except Exception as e:
         print(f"❌ Agentic AI recommendation error: {e}")
         # Fall back to simple recommendations
-        return generate_simple_recommendations(user_profile, skill_gaps, available_courses)
+        return simple_tier("error")
+
+def with_response_tier(recommendations, tier, start, deadline, fallback_reason=None):
+    """Record which tier produced the answer and how much of the latency budget it used"""
+    now = time.monotonic()
+    recommendations["response_tier"] = tier
+    recommendations["latency_budget"] = {
+        "budget_s": round(deadline - start, 3),
+        "elapsed_s": round(now - start, 3),
+        "remaining_s": round(deadline - now, 3)
+    }
+    if fallback_reason:
+        recommendations["latency_budget"]["fallback_reason"] = fallback_reason
+    return recommendations
 
 def force_feedback_goal_prioritization(ai_recommendations, feedback_data, user_profile, available_courses):
     """
@@ -172,19 +248,12 @@ def generate_simple_recommendations(user_profile, skill_gaps, available_courses)
             }
         }
 
-def generate_coordinator_response(user_profile, agent_analysis, course_priorities, available_courses, feedback_data=None):
+def generate_coordinator_response(user_profile, agent_analysis, course_priorities, available_courses, feedback_data=None, timeout=None):
     """
-    Final coordinator LLM that synthesizes all agent inputs into actionable recommendations
+    Final coordinator LLM that synthesizes all agent inputs into actionable recommendations.
+    With a timeout (remaining request budget) the call is made once, without retries.
     """
     try:
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        base_url = os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
-        
-        client = OpenAI(
-            api_key=api_key,
-            base_url=base_url
-        )
-        
         # Prepare agent insights summary
         skills_insights = agent_analysis["agent_outputs"]["skills_analysis"]["analysis"]
         goals_insights = agent_analysis["agent_outputs"]["goals_analysis"]["analysis"] 
@@ -323,150 +392,155 @@ Return JSON format:
   "estimated_timeline": "17 weeks total (6 + 3 + 8 weeks)"
 }}"""
 
-        response = client.chat.completions.create(
-            model=os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct"),
-            messages=[
+        ai_response = get_llm_client().chat(
+            [
                 {"role": "system", "content": "You are an expert Course Recommendation Coordinator AI. Synthesize multi-agent insights into actionable recommendations in valid JSON format."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=600,  # Increased for better JSON completion
-            temperature=0.1  # Lower temperature for more consistent JSON
-        )
-        
-        # Parse response
-        ai_response = response.choices[0].message.content.strip()
-        
-        # Clean JSON formatting
-        if ai_response.startswith("```json"):
-            ai_response = ai_response.replace("```json", "").replace("```", "").strip()
+            temperature=0.1,  # Lower temperature for more consistent JSON
+            endpoint="coordinator",
+            **({"timeout": timeout, "max_retries": 0} if timeout is not None else {})
+        ).strip()
         
-        # Extract JSON
-        import re
-        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-        if json_match:
-            ai_response = json_match.group()
+        return parse_coordinator_output(ai_response, user_profile, agent_analysis, available_courses, feedback_data)
         
-        try:
-            parsed_response = json.loads(ai_response)
-            # Ensure we have the expected structure
-            if isinstance(parsed_response, dict):
-                recommendations = parsed_response.get("recommended_sequence", [])
-                
-                # FORCE FEEDBACK GOALS: If Statistical Analysis with R is mentioned in feedback but not in top 3, add it
-                feedback_mentions_r = False
-                if feedback_data:
-                    feedback_mentions_r = any(fb.get('goals', '').lower().find('statistical analysis with r') >= 0 for fb in feedback_data)
-                
-                user_goals_mention_r = any('statistical analysis with r' in goal.lower() for goal in user_profile.get('currentGoals', []))
-                
-                if (feedback_mentions_r or user_goals_mention_r):
-                    # Check if course8 (Statistical Analysis with R) is already in recommendations
-                    has_r_course = any(rec.get('course_id') == 'course8' for rec in recommendations)
-                    if not has_r_course:
-                        # Force add Statistical Analysis with R as first priority
-                        r_course = {
-                            "course_id": "course8",
-                            "course_title": "Statistical Analysis with R",
-                            "sequence_order": 1,
-                            "reasoning": "PRIORITY: Addresses 'Statistical Analysis with R' goal from feedback",
-                            "agent_consensus": "high"
-                        }
-                        # Insert at beginning and renumber other courses
-                        recommendations.insert(0, r_course)
-                        for i, rec in enumerate(recommendations[1:], 2):
-                            rec["sequence_order"] = i
-                
-                return {
-                    "recommended_sequence": recommendations[:3],  # Limit to top 3
-                    "strategic_advice": parsed_response.get("strategic_advice", "Focus on feedback goals first, then build foundational skills"),
-                    "estimated_timeline": parsed_response.get("estimated_timeline", "Timeline to be determined"),
-                    "agent_insights": parsed_response.get("agent_insights", {
-                        "primary_focus": "feedback_goal_prioritization",
-                        "confidence_level": "high"
-                    }),
-                    "agentic_metadata": {
-                        "agents_used": ["skills_analysis", "goals_analysis", "feedback_analysis"],
-                        "coordination_success": True,
-                        "feedback_goals_forced": feedback_mentions_r or user_goals_mention_r
-                    }
-                }
-            else:
-                raise json.JSONDecodeError("Invalid response format", ai_response, 0)
-        except json.JSONDecodeError:
-            # Enhanced fallback with agent-based recommendations
-            print("⚠️ Coordinator JSON parsing failed, generating agent-based fallback...")
-            
-            # Extract course recommendations from individual agents
-            fallback_courses = []
-            
-            # Try to get courses from goals analysis
-            goals_analysis = agent_analysis["agent_outputs"]["goals_analysis"]["analysis"]
-            if "goal_course_alignment" in goals_analysis:
-                for alignment in goals_analysis["goal_course_alignment"][:3]:  # Top 3 courses
-                    fallback_courses.append({
-                        "course_id": alignment.get("course_id", f"course{len(fallback_courses) + 1}"),
-                        "sequence_order": len(fallback_courses) + 1,
-                        "reasoning": f"Recommended by Goals Agent: {alignment.get('goal_relevance', 'Supports career objectives')}",
-                        "agent_consensus": "goals_focused"
-                    })
+    except Exception as e:
+        print(f"❌ Coordinator AI error: {e}")
+        return {
+            "recommended_sequence": [],
+            "strategic_advice": "Multi-agent analysis attempted but coordinator unavailable. Please try standard recommendations.",
+            "estimated_timeline": "Timeline unavailable",
+            "agent_insights": {
+                "error": str(e)
+            },
+            "agentic_metadata": {
+                "agents_used": ["skills_analysis", "goals_analysis", "feedback_analysis"],
+                "coordination_success": False,
+                "fallback_reason": "coordinator_error"
+            }
+        }
+
+def parse_coordinator_output(ai_response, user_profile, agent_analysis, available_courses, feedback_data=None):
+    """
+    Turn raw coordinator output into final recommendations, falling back to the
+    agents' own course picks when the output is not valid JSON
+    """
+    # Clean JSON formatting
+    if ai_response.startswith("```json"):
+        ai_response = ai_response.replace("```json", "").replace("```", "").strip()
+    
+    # Extract JSON
+    import re
+    json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+    if json_match:
+        ai_response = json_match.group()
+    
+    try:
+        parsed_response = json.loads(ai_response)
+        # Ensure we have the expected structure
+        if isinstance(parsed_response, dict):
+            recommendations = parsed_response.get("recommended_sequence", [])
             
-            # If no goals-based courses, use available courses
-            if not fallback_courses and available_courses:
-                for i, course in enumerate(available_courses[:3]):  # Use 3 courses
-                    fallback_courses.append({
-                        "course_id": course['id'],
-                        "sequence_order": i + 1,
-                        "reasoning": f"Fallback recommendation: {course['title']} matches your learning needs",
-                        "agent_consensus": "system_recommended"
-                    })
+            # FORCE FEEDBACK GOALS: If Statistical Analysis with R is mentioned in feedback but not in top 3, add it
+            feedback_mentions_r = False
+            if feedback_data:
+                feedback_mentions_r = any(fb.get('goals', '').lower().find('statistical analysis with r') >= 0 for fb in feedback_data)
             
-            # Ensure we have at least 2 courses even with minimal data
-            if len(fallback_courses) < 2 and available_courses:
-                remaining_courses = [c for c in available_courses if c['id'] not in [fc['course_id'] for fc in fallback_courses]]
-                for i, course in enumerate(remaining_courses[:2]):
-                    fallback_courses.append({
-                        "course_id": course['id'],
-                        "sequence_order": len(fallback_courses) + 1,
-                        "reasoning": f"Additional recommendation: {course['title']} for {user_profile['role']} role development",
-                        "agent_consensus": "role_based"
-                    })
+            user_goals_mention_r = any('statistical analysis with r' in goal.lower() for goal in user_profile.get('currentGoals', []))
             
-            # Generate strategic advice from agent insights
-            strategic_advice = "Based on multi-agent analysis: "
-            skills_insights = agent_analysis["agent_outputs"]["skills_analysis"]["analysis"]
-            if "estimated_readiness" in skills_insights:
-                strategic_advice += f"You're ready for advanced learning in {skills_insights.get('estimated_readiness', '6-8 weeks')}. "
-            strategic_advice += "Focus on practical application alongside theoretical knowledge."
+            if (feedback_mentions_r or user_goals_mention_r):
+                # Check if course8 (Statistical Analysis with R) is already in recommendations
+                has_r_course = any(rec.get('course_id') == 'course8' for rec in recommendations)
+                if not has_r_course:
+                    # Force add Statistical Analysis with R as first priority
+                    r_course = {
+                        "course_id": "course8",
+                        "course_title": "Statistical Analysis with R",
+                        "sequence_order": 1,
+                        "reasoning": "PRIORITY: Addresses 'Statistical Analysis with R' goal from feedback",
+                        "agent_consensus": "high"
+                    }
+                    # Insert at beginning and renumber other courses
+                    recommendations.insert(0, r_course)
+                    for i, rec in enumerate(recommendations[1:], 2):
+                        rec["sequence_order"] = i
             
             return {
-                "recommended_sequence": fallback_courses,
-                "strategic_advice": strategic_advice,
-                "estimated_timeline": "6-8 weeks for recommended sequence",
-                "agent_insights": {
-                    "skills_confidence": agent_analysis["agent_outputs"]["skills_analysis"]["confidence"],
-                    "goals_confidence": agent_analysis["agent_outputs"]["goals_analysis"]["confidence"],
-                    "feedback_confidence": agent_analysis["agent_outputs"]["feedback_analysis"]["confidence"]
-                },
+                "recommended_sequence": recommendations[:3],  # Limit to top 3
+                "strategic_advice": parsed_response.get("strategic_advice", "Focus on feedback goals first, then build foundational skills"),
+                "estimated_timeline": parsed_response.get("estimated_timeline", "Timeline to be determined"),
+                "agent_insights": parsed_response.get("agent_insights", {
+                    "primary_focus": "feedback_goal_prioritization",
+                    "confidence_level": "high"
+                }),
                 "agentic_metadata": {
                     "agents_used": ["skills_analysis", "goals_analysis", "feedback_analysis"],
-                    "coordination_success": False,
-                    "fallback_reason": "coordinator_parse_error_with_agent_fallback"
+                    "coordination_success": True,
+                    "feedback_goals_forced": feedback_mentions_r or user_goals_mention_r
                 }
             }
-            
-    except Exception as e:
-        print(f"❌ Coordinator AI error: {e}")
+        else:
+            raise json.JSONDecodeError("Invalid response format", ai_response, 0)
+    except json.JSONDecodeError:
+        # Enhanced fallback with agent-based recommendations
+        print("⚠️ Coordinator JSON parsing failed, generating agent-based fallback...")
+        
+        # Extract course recommendations from individual agents
+        fallback_courses = []
+        
+        # Try to get courses from goals analysis
+        goals_analysis = agent_analysis["agent_outputs"]["goals_analysis"]["analysis"]
+        if "goal_course_alignment" in goals_analysis:
+            for alignment in goals_analysis["goal_course_alignment"][:3]:  # Top 3 courses
+                fallback_courses.append({
+                    "course_id": alignment.get("course_id", f"course{len(fallback_courses) + 1}"),
+                    "sequence_order": len(fallback_courses) + 1,
+                    "reasoning": f"Recommended by Goals Agent: {alignment.get('goal_relevance', 'Supports career objectives')}",
+                    "agent_consensus": "goals_focused"
+                })
+        
+        # If no goals-based courses, use available courses
+        if not fallback_courses and available_courses:
+            for i, course in enumerate(available_courses[:3]):  # Use 3 courses
+                fallback_courses.append({
+                    "course_id": course['id'],
+                    "sequence_order": i + 1,
+                    "reasoning": f"Fallback recommendation: {course['title']} matches your learning needs",
+                    "agent_consensus": "system_recommended"
+                })
+        
+        # Ensure we have at least 2 courses even with minimal data
+        if len(fallback_courses) < 2 and available_courses:
+            remaining_courses = [c for c in available_courses if c['id'] not in [fc['course_id'] for fc in fallback_courses]]
+            for i, course in enumerate(remaining_courses[:2]):
+                fallback_courses.append({
+                    "course_id": course['id'],
+                    "sequence_order": len(fallback_courses) + 1,
+                    "reasoning": f"Additional recommendation: {course['title']} for {user_profile['role']} role development",
+                    "agent_consensus": "role_based"
+                })
+        
+        # Generate strategic advice from agent insights
+        strategic_advice = "Based on multi-agent analysis: "
+        skills_insights = agent_analysis["agent_outputs"]["skills_analysis"]["analysis"]
+        if "estimated_readiness" in skills_insights:
+            strategic_advice += f"You're ready for advanced learning in {skills_insights.get('estimated_readiness', '6-8 weeks')}. "
+        strategic_advice += "Focus on practical application alongside theoretical knowledge."
+        
         return {
-            "recommended_sequence": [],
-            "strategic_advice": "Multi-agent analysis attempted but coordinator unavailable. Please try standard recommendations.",
-            "estimated_timeline": "Timeline unavailable",
+            "recommended_sequence": fallback_courses,
+            "strategic_advice": strategic_advice,
+            "estimated_timeline": "6-8 weeks for recommended sequence",
             "agent_insights": {
-                "error": str(e)
+                "skills_confidence": agent_analysis["agent_outputs"]["skills_analysis"]["confidence"],
+                "goals_confidence": agent_analysis["agent_outputs"]["goals_analysis"]["confidence"],
+                "feedback_confidence": agent_analysis["agent_outputs"]["feedback_analysis"]["confidence"]
             },
             "agentic_metadata": {
                 "agents_used": ["skills_analysis", "goals_analysis", "feedback_analysis"],
                 "coordination_success": False,
-                "fallback_reason": "coordinator_error"
+                "fallback_reason": "coordinator_parse_error_with_agent_fallback"
             }
         }
 
@@ -479,16 +553,30 @@ def ai_skill_analysis():
     Endpoint for AI-powered skill gap analysis and course recommendations
     """
     try:
+        request_start = time.monotonic()
         data = request.get_json()
         user_profile = data.get('user_profile')
         skill_gaps = data.get('skill_gaps') 
         available_courses = data.get('available_courses')
+        analysis_mode = data.get('analysis_mode', DEFAULT_ANALYSIS_MODE)
         
         if not all([user_profile, skill_gaps, available_courses]):
             return jsonify({
                 "error": "Missing required data: user_profile, skill_gaps, or available_courses"
             }), 400
         
+        if analysis_mode not in ANALYSIS_MODES:
+            return jsonify({
+                "error": f"Invalid analysis_mode: {analysis_mode}. Use one of {ANALYSIS_MODES}"
+            }), 400
+        
+        try:
+            deadline_s = float(data.get('deadline_s', REQUEST_DEADLINE_SECONDS))
+        except (TypeError, ValueError):
+            deadline_s = 0
+        if deadline_s <= 0:
+            return jsonify({"error": "deadline_s must be a positive number of seconds"}), 400
+        
         # Load feedback data to provide context
         feedback_data = []
         try:
@@ -508,7 +596,9 @@ def ai_skill_analysis():
             print(f"⚠️ Error loading feedback data: {e}")
         
         # Get AI-powered recommendations
-        ai_recommendations = get_ai_skill_recommendations(user_profile, skill_gaps, available_courses)
+        ai_recommendations = get_ai_skill_recommendations(
+            user_profile, skill_gaps, available_courses, analysis_mode, deadline=request_start + deadline_s
+        )
         
         # Post-process to force feedback goal prioritization
         if feedback_data:
@@ -562,12 +652,12 @@ def ai_skill_analysis():
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "AI Skill Gap Analysis Service Running", "port": 5004})
+    return jsonify({"status": "AI Skill Gap Analysis Service Running", "port": 5004, "llm": get_llm_client().stats()})
 
 if __name__ == '__main__':
     print("🤖 Starting AI Skill Gap Analysis Service...")
     print("🔗 Available at: http://localhost:5004")
     print("📋 Endpoints:")
-    print("   POST /api/ai-skill-analysis - Get AI-powered learning recommendations")
+    print("   POST /api/ai-skill-analysis - Get AI-powered learning recommendations (analysis_mode: multi_agent | fused)")
     print("   GET  /health - Service health check")
     app.run(debug=True, port=5004)
@@ -0,0 +1,155 @@
+"""
+BM25 Index - precomputed keyword index over the document chunks
+Complements vector search with exact term matching (S/4HANA, BTP, Datasphere, ...)
+and fuses both rankings with reciprocal rank fusion
+"""
+
+import os
+import re
+import json
+import math
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+BM25_INDEX_NAME = "bm25_index.json"
+BM25_INDEX_FORMAT = 2  # 1 stored only the chunk texts
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[/\-.][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it its me my of on or our so that the
+their them there these they this to was we what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens. Compound product names are kept whole and also split,
+    so "S/4HANA" matches "s/4hana", "s4hana" and "4hana".
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = re.split(r"[/\-.]", token)
+        if len(parts) > 1:
+            tokens.append("".join(parts))
+            tokens.extend(part for part in parts if len(part) > 1 and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks, stored as an inverted index (term -> postings)"""
+
+    def __init__(self, documents: List[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for doc_idx, doc in enumerate(documents):
+            counts = Counter(tokenize(doc.page_content))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((doc_idx, tf))
+        self.postings = dict(self.postings)
+        self.avg_doc_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        n_docs = len(documents)
+        self.idf = {
+            term: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    # =========================
+    # Construction & Persistence
+    # =========================
+    @classmethod
+    def from_chroma(cls, chroma_db) -> "BM25Index":
+        data = chroma_db.get(include=["documents", "metadatas"])
+        return cls([
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])
+        ])
+
+    def save(self, path: str):
+        """Write the chunks together with the inverted index, so loading needs no tokenizing"""
+        payload = {
+            "format": BM25_INDEX_FORMAT,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "k1": self.k1,
+            "b": self.b,
+            "documents": [{"text": doc.page_content, "metadata": doc.metadata} for doc in self.documents],
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+            "idf": self.idf,
+            "avg_doc_length": self.avg_doc_length
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        documents = [Document(page_content=item["text"], metadata=item["metadata"]) for item in payload["documents"]]
+        if payload.get("format") != BM25_INDEX_FORMAT:
+            # Older files hold only the texts: rebuild the postings from them
+            return cls(documents)
+        index = cls.__new__(cls)
+        index.documents = documents
+        index.k1 = payload["k1"]
+        index.b = payload["b"]
+        index.postings = {term: [tuple(posting) for posting in postings] for term, postings in payload["postings"].items()}
+        index.doc_lengths = payload["doc_lengths"]
+        index.idf = payload["idf"]
+        index.avg_doc_length = payload["avg_doc_length"]
+        return index
+
+    # =========================
+    # Search
+    # =========================
+    def search(self, query: str, k: int = 10) -> List[Tuple[Document, float]]:
+        """Top-k chunks by BM25 score; chunks sharing no term with the query are never returned"""
+        scores = defaultdict(float)
+        # Every chunk tokenizes to nothing when the average length is 0; avoid dividing by it
+        avg_doc_length = self.avg_doc_length or 1.0
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for doc_idx, tf in postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_idx] / avg_doc_length
+                scores[doc_idx] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[doc_idx], score) for doc_idx, score in ranked]
+
+    def stats(self) -> Dict:
+        return {"chunks": len(self.documents), "terms": len(self.postings),
+                "avg_chunk_tokens": round(self.avg_doc_length, 1)}
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """Fuse several ranked lists of keys: score(key) = sum over lists of 1 / (k + rank)"""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def load_bm25_index(chroma_db, db_path: Optional[str] = None) -> BM25Index:
+    """Load the index the document indexer saved next to the collection, or build it from the collection"""
+    if db_path:
+        path = os.path.join(db_path, BM25_INDEX_NAME)
+        if os.path.exists(path):
+            try:
+                return BM25Index.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Could not read {path}: {e} - rebuilding BM25 index from the collection")
+    return BM25Index.from_chroma(chroma_db)
@@ -1,13 +1,15 @@
-import requests
 import os
 import json
+import hashlib
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from embedding_client import get_embeddings
+from numpy_vector_store import open_vector_store, vector_store_stats
+from vector_snapshot import SNAPSHOT_NAME, export_chroma_snapshot, snapshot_index_version
 from langchain.schema import Document
-from openai import OpenAI
+from llm_client import get_llm_client
 
 # =========================
 # Environment Setup
@@ -145,15 +147,16 @@ COURSES_DATA = [
 # =========================
 # Helper Functions
 # =========================
-def create_course_vector_db():
-    """Create a vector database from course data for semantic search"""
-    documents = []
-    for course in COURSES_DATA:
-        # Create searchable content from course data
-        skills_text = ", ".join([skill["name"] for skill in course["skills"]])
-        roles_text = ", ".join(course["recommendedForRoles"])
-        
-        content = f"""
+COURSE_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "course_chroma_db")
+COURSE_INDEX_MANIFEST = os.path.join(COURSE_DB_PATH, "course_index_manifest.json")
+COURSE_SNAPSHOT = os.path.join(COURSE_DB_PATH, SNAPSHOT_NAME)
+
+def build_course_document(course):
+    """Searchable text and metadata for one course"""
+    skills_text = ", ".join([skill["name"] for skill in course["skills"]])
+    roles_text = ", ".join(course["recommendedForRoles"])
+    
+    content = f"""
         Title: {course["title"]}
         Description: {course["description"]}
         Skills: {skills_text}
@@ -161,30 +164,78 @@ def create_course_vector_db():
         Duration: {course["duration"]}
         Recommended for: {roles_text}
         """
-        
-        doc = Document(
-            page_content=content.strip(),
-            metadata={
-                "course_id": course["id"],
-                "title": course["title"],
-                "difficulty": course["difficulty"],
-                "duration": course["duration"]
-            }
-        )
-        documents.append(doc)
     
-    # Use same embedding model as mentor_mode.py for consistency
-    embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vectordb = Chroma.from_documents(documents, embedding, persist_directory="course_chroma_db")
+    return Document(
+        page_content=content.strip(),
+        metadata={
+            "course_id": course["id"],
+            "title": course["title"],
+            "difficulty": course["difficulty"],
+            "duration": course["duration"]
+        }
+    )
+
+def course_fingerprint(doc):
+    """Hash of exactly what gets embedded and stored for a course"""
+    payload = json.dumps({"content": doc.page_content, "metadata": doc.metadata}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def course_catalog():
+    """Return (documents by course_id, fingerprints by course_id, catalog fingerprint)"""
+    documents = {course["id"]: build_course_document(course) for course in COURSES_DATA}
+    fingerprints = {course_id: course_fingerprint(doc) for course_id, doc in documents.items()}
+    catalog_fingerprint = hashlib.sha256(json.dumps(fingerprints, sort_keys=True).encode("utf-8")).hexdigest()
+    return documents, fingerprints, catalog_fingerprint
+
+def create_course_vector_db():
+    """
+    Open the persisted course index, re-embedding only courses whose content changed.
+    Vectors are keyed by course_id, so edits replace the old vector instead of adding a duplicate.
+    The vector snapshot is re-exported whenever it does not match the catalog.
+    """
+    documents, fingerprints, catalog_fingerprint = course_catalog()
+    
+    # Same shared embedding model as mentor_mode.py for consistency
+    embedding = get_embeddings()
+    vectordb = Chroma(persist_directory=COURSE_DB_PATH, embedding_function=embedding)
+    
+    manifest = {}
+    if os.path.exists(COURSE_INDEX_MANIFEST):
+        try:
+            with open(COURSE_INDEX_MANIFEST, 'r') as f:
+                manifest = json.load(f)
+        except json.JSONDecodeError:
+            manifest = {}
+    
+    if manifest.get("catalog_fingerprint") == catalog_fingerprint:
+        print(f"📂 Course index up to date ({len(documents)} courses, fingerprint {catalog_fingerprint[:12]})")
+        if snapshot_index_version(COURSE_SNAPSHOT) != catalog_fingerprint:
+            export_chroma_snapshot(vectordb, COURSE_SNAPSHOT, catalog_fingerprint)
+        return vectordb
+    
+    # Upsert changed/new courses by course_id and drop anything else (removed courses, legacy duplicates)
+    existing_ids = set(vectordb.get(include=[])["ids"])
+    indexed = manifest.get("courses", {})
+    changed_ids = [course_id for course_id, fingerprint in fingerprints.items()
+                   if indexed.get(course_id) != fingerprint or course_id not in existing_ids]
+    stale_ids = [doc_id for doc_id in existing_ids if doc_id not in documents]
+    
+    to_delete = stale_ids + [course_id for course_id in changed_ids if course_id in existing_ids]
+    if to_delete:
+        vectordb.delete(ids=to_delete)
+    if changed_ids:
+        vectordb.add_documents([documents[course_id] for course_id in changed_ids], ids=changed_ids)
+    
+    os.makedirs(COURSE_DB_PATH, exist_ok=True)
+    with open(COURSE_INDEX_MANIFEST, 'w') as f:
+        json.dump({"catalog_fingerprint": catalog_fingerprint, "courses": fingerprints}, f, indent=1)
+    export_chroma_snapshot(vectordb, COURSE_SNAPSHOT, catalog_fingerprint)
+    print(f"🔄 Course index updated: {len(changed_ids)} courses embedded, {len(stale_ids)} stale vectors removed")
     return vectordb
 
 # Get LLM response using same pattern as mentor_mode.py
 def get_course_recommendations(query, relevant_courses):
     """Get AI-powered course recommendations based on natural language query"""
-    client = OpenAI(
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-        base_url=os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
-    )
     
     # Create context from relevant courses
     courses_context = ""
@@ -236,16 +287,15 @@ IMPORTANT: When multiple relevant courses are available, recommend several (2-4)
 Keep response under 250 words, conversational, and actionable. Focus on practical career advancement using ONLY the courses listed above."""
 
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct"),
-            messages=[
+        return get_llm_client().chat(
+            [
                 {"role": "system", "content": "You are an expert AI learning advisor. Provide strategic, career-focused course recommendations."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=250,  # Slightly increased for career advice
-            temperature=0.3
+            temperature=0.3,
+            endpoint="course_search"
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error getting AI recommendation: {str(e)}"
 
@@ -256,7 +306,7 @@ app = Flask(__name__)
 CORS(app)
 
 # Initialize vector database
-course_vector_db = create_course_vector_db()
+course_vector_db = open_vector_store(create_course_vector_db, COURSE_DB_PATH, course_catalog()[2])
 
 # =========================
 # Flask Routes
@@ -315,7 +365,12 @@ def course_search():
 
 @app.route('/api/course-search/health', methods=['GET'])
 def health():
-    return jsonify({"status": "Course Search API OK"})
+    return jsonify({
+        "status": "Course Search API OK",
+        "llm": get_llm_client().stats(),
+        "query_embedding_cache": get_embeddings().stats(),
+        "vector_store": vector_store_stats(course_vector_db)
+    })
 
 # =========================
 # CLI Entry Point
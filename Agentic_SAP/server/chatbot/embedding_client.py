@@ -0,0 +1,196 @@
+"""
+Embedding Client - LangChain Embeddings backed by the shared embedding service
+Falls back to loading MiniLM in-process when the service is not running,
+and caches query embeddings so repeated questions skip the encoder
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+# Load environment
+load_dotenv()
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "http://localhost:5007")
+
+# Models whose tokenizer lowercases its input, so query case cannot change the vector
+UNCASED_MODELS = frozenset({
+    "sentence-transformers/all-MiniLM-L6-v2",
+    "sentence-transformers/all-MiniLM-L12-v2",
+    "sentence-transformers/paraphrase-MiniLM-L6-v2",
+    "sentence-transformers/multi-qa-MiniLM-L6-cos-v1"
+})
+
+
+class RemoteEmbeddings(Embeddings):
+    """Embeddings that call the embedding service over a keep-alive localhost connection"""
+
+    def __init__(self, base_url: str = EMBEDDING_SERVICE_URL, timeout: float = 30.0,
+                 chunk_size: int = 256):
+        self.base_url = base_url.rstrip("/")
+        self.chunk_size = chunk_size  # Texts per HTTP request when indexing many documents
+        self._client = httpx.Client(timeout=timeout, limits=httpx.Limits(max_keepalive_connections=8))
+        self.model_name = EMBEDDING_MODEL  # Replaced by the model the service reports, see service_model()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for i in range(0, len(texts), self.chunk_size):
+            embeddings.extend(self._embed(texts[i:i + self.chunk_size]))
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        response = self._client.post(f"{self.base_url}/embed", json={"texts": texts})
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    def is_available(self) -> bool:
+        try:
+            return self._client.get(f"{self.base_url}/health", timeout=2.0).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def service_model(self) -> str:
+        """Model the service has loaded (its EMBEDDING_MODEL may differ from ours), else our own setting"""
+        try:
+            response = self._client.get(f"{self.base_url}/health", timeout=2.0)
+            response.raise_for_status()
+            return response.json().get("model") or self.model_name
+        except (httpx.HTTPError, ValueError):
+            return self.model_name
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    LRU cache of (model, normalized query) -> embedding in front of another Embeddings.
+    Document embedding is passed straight through; only embed_query is cached.
+    Whitespace is always normalized; case only for models known to be uncased.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = 1024, model_name: Optional[str] = None):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.model_name = model_name or getattr(embeddings, "model_name", None) or EMBEDDING_MODEL
+        self.lowercase = self.model_name in UNCASED_MODELS
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def normalize(self, text: str) -> str:
+        """Text actually embedded: whitespace collapsed, lowercased only for uncased models"""
+        text = " ".join(text.split())
+        return text.lower() if self.lowercase else text
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.max_entries <= 0:
+            return self.embeddings.embed_query(text)
+
+        text = self.normalize(text)
+        key = (self.model_name, text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return vector
+            self._misses += 1
+
+        vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries at once: cached ones are served from the LRU and the
+        remaining distinct queries go to the encoder as a single batch
+        """
+        keys = [(self.model_name, self.normalize(text)) for text in texts]
+        vectors = {}
+        with self._lock:
+            for key in keys:
+                if key in vectors:
+                    continue
+                vector = self._cache.get(key) if self.max_entries > 0 else None
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    self._hits += 1
+                    vectors[key] = vector
+            misses = [key for key in dict.fromkeys(keys) if key not in vectors]
+            self._misses += len(misses)
+
+        if misses:
+            # embed_query is embed_documents of a single text for both backends
+            for key, vector in zip(misses, self.embeddings.embed_documents([text for _, text in misses])):
+                vectors[key] = vector
+            if self.max_entries > 0:
+                with self._lock:
+                    for key in misses:
+                        self._cache[key] = vectors[key]
+                        self._cache.move_to_end(key)
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+        return [vectors[key] for key in keys]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": type(self.embeddings).__name__,
+                "model": self.model_name,
+                "lowercased": self.lowercase,
+                "entries": len(self._cache),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_shared_embeddings = None
+_shared_embeddings_lock = threading.Lock()
+
+
+def get_embeddings() -> CachedQueryEmbeddings:
+    """
+    Return the process-wide embedding function, wrapped in the query embedding cache.
+    EMBEDDING_MODE=remote always uses the service, local always loads the model in-process,
+    and auto (default) uses the service when it answers its health check.
+    """
+    global _shared_embeddings
+    if _shared_embeddings is None:
+        with _shared_embeddings_lock:
+            if _shared_embeddings is None:
+                _shared_embeddings = CachedQueryEmbeddings(
+                    _create_embeddings(os.getenv("EMBEDDING_MODE", "auto").lower()),
+                    max_entries=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+                )
+    return _shared_embeddings
+
+
+def _create_embeddings(mode: str) -> Embeddings:
+    if mode != "local":
+        remote = RemoteEmbeddings()
+        if mode == "remote" or remote.is_available():
+            remote.model_name = remote.service_model()
+            print(f"🔗 Using shared embedding service at {remote.base_url} ({remote.model_name})")
+            return remote
+        print(f"⚠️ Embedding service not reachable at {remote.base_url} - loading {EMBEDDING_MODEL} locally")
+
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
@@ -0,0 +1,129 @@
+"""
+Embedding Service - one shared MiniLM model for every chatbot service
+Concurrent /embed requests are micro-batched into a single encode call,
+so mentor, onboarding and course search no longer each load torch + the model
+"""
+
+import os
+import time
+import queue
+import threading
+from flask import Flask, request, jsonify
+from dotenv import load_dotenv
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+# Setup
+load_dotenv()
+app = Flask(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_SERVICE_PORT = int(os.getenv("EMBEDDING_SERVICE_PORT", 5007))
+
+
+class MicroBatcher:
+    """
+    Collects texts from concurrent requests and encodes them together.
+    A batch closes when it reaches max_batch_size texts or max_wait_ms after its first request.
+    """
+
+    def __init__(self, embed_fn, max_batch_size=64, max_wait_ms=5):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats = {"requests": 0, "texts": 0, "batches": 0, "encode_time_s": 0.0, "largest_batch": 0}
+        self._stats_lock = threading.Lock()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+    def embed(self, texts):
+        """Block until the texts have been encoded as part of some batch"""
+        job = {"texts": texts, "done": threading.Event(), "result": None, "error": None}
+        self._queue.put(job)
+        job["done"].wait()
+        if job["error"] is not None:
+            raise job["error"]
+        return job["result"]
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            size = len(jobs[0]["texts"])
+            batch_deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = batch_deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                size += len(job["texts"])
+            self._encode(jobs)
+
+    def _encode(self, jobs):
+        texts = [text for job in jobs for text in job["texts"]]
+        start = time.perf_counter()
+        try:
+            vectors = self.embed_fn(texts) if texts else []
+            offset = 0
+            for job in jobs:
+                job["result"] = vectors[offset:offset + len(job["texts"])]
+                offset += len(job["texts"])
+        except Exception as e:
+            print(f"❌ Embedding batch failed: {e}")
+            for job in jobs:
+                job["error"] = e
+        finally:
+            with self._stats_lock:
+                self._stats["requests"] += len(jobs)
+                self._stats["texts"] += len(texts)
+                self._stats["batches"] += 1
+                self._stats["encode_time_s"] += time.perf_counter() - start
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(texts))
+            for job in jobs:
+                job["done"].set()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["encode_time_s"] = round(stats["encode_time_s"], 4)
+        stats["avg_texts_per_batch"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["avg_requests_per_batch"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+
+# Load the model once for the whole stack
+print(f"🧠 Loading embedding model {EMBEDDING_MODEL}...")
+embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+batcher = MicroBatcher(
+    embedding_model.embed_documents,
+    max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", 64)),
+    max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 5))
+)
+print("✅ Embedding model ready")
+
+
+@app.route('/embed', methods=['POST'])
+def embed():
+    """Encode a list of texts: {"texts": [...]} -> {"embeddings": [[...], ...]}"""
+    data = request.get_json(silent=True) or {}
+    texts = data.get("texts")
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({"error": "texts must be a list of strings"}), 400
+
+    try:
+        embeddings = batcher.embed(texts)
+    except Exception as e:
+        return jsonify({"error": f"Embedding failed: {str(e)}"}), 500
+    return jsonify({"embeddings": embeddings, "model": EMBEDDING_MODEL})
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({"status": "OK", "model": EMBEDDING_MODEL, "batching": batcher.stats()})
+
+
+if __name__ == "__main__":
+    print(f"🔗 Embedding service available at http://localhost:{EMBEDDING_SERVICE_PORT}")
+    app.run(port=EMBEDDING_SERVICE_PORT, threaded=True)
@@ -0,0 +1,328 @@
+"""
+Fake OpenRouter - deterministic local stand-in for the chat-completions API
+Speaks the OpenAI protocol (including SSE streaming) with configurable latency,
+token rate, error injection and canned agent/coordinator JSON, for offline load testing.
+
+Usage:
+    python fake_openrouter.py --latency lognormal:-0.7,0.4 --tokens-per-second 60 --error-rate 0.02
+    OPENROUTER_API_BASE=http://localhost:5099/api/v1 OPENROUTER_API_KEY=fake python ai_skill_gap.py
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import math
+import random
+import hashlib
+import argparse
+import threading
+from flask import Flask, Response, request, jsonify
+
+app = Flask(__name__)
+
+# =========================
+# Configuration
+# =========================
+CONFIG = {
+    "latency": os.getenv("FAKE_LLM_LATENCY", "fixed:0.3"),              # time before the first token
+    "tokens_per_second": float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", 80)),  # 0 = no generation delay
+    "error_rate": float(os.getenv("FAKE_LLM_ERROR_RATE", 0.0)),
+    "error_status": int(os.getenv("FAKE_LLM_ERROR_STATUS", 500)),
+    "seed": int(os.getenv("FAKE_LLM_SEED", 42))
+}
+config_lock = threading.Lock()
+
+stats = {"requests": 0, "streamed": 0, "errors_injected": 0, "completion_tokens": 0}
+stats_lock = threading.Lock()
+
+# Payload fingerprint -> times that payload was requested (guarded by stats_lock)
+attempts = {}
+
+
+def parse_latency(spec):
+    """
+    Parse a latency distribution spec into (kind, params).
+    Supported: fixed:S, uniform:LO,HI, normal:MEAN,STD, lognormal:MU,SIGMA (seconds)
+    """
+    kind, _, raw = spec.partition(":")
+    params = [float(p) for p in raw.split(",") if p.strip()]
+    expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+    if kind not in expected or len(params) != expected[kind]:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+    return kind, params
+
+
+def sample_latency(spec, rng):
+    kind, params = parse_latency(spec)
+    if kind == "fixed":
+        value = params[0]
+    elif kind == "uniform":
+        value = rng.uniform(params[0], params[1])
+    elif kind == "normal":
+        value = rng.gauss(params[0], params[1])
+    else:
+        value = math.exp(rng.gauss(params[0], params[1]))
+    return max(0.0, value)
+
+
+def payload_fingerprint(body):
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def request_rng(fingerprint, seed):
+    """Per-request RNG seeded from the payload, so identical runs see identical timings"""
+    return random.Random(f"{seed}:{fingerprint}")
+
+
+def should_inject_error(fingerprint, attempt, cfg):
+    """
+    Whether this attempt of this payload fails. Depends only on the seed, the payload and
+    the attempt number, so concurrent clients see the same failures in any arrival order
+    and a retry (the next attempt) gets its own independent draw.
+    """
+    if cfg["error_rate"] <= 0:
+        return False
+    return random.Random(f"{cfg['seed']}:error:{fingerprint}:{attempt}").random() < cfg["error_rate"]
+
+
+# =========================
+# Canned Responses
+# =========================
+def _course_ids(text):
+    ids = []
+    for course_id in re.findall(r"\bcourse\d+\b", text):
+        if course_id not in ids:
+            ids.append(course_id)
+    return ids or ["course1", "course2", "course3"]
+
+
+def canned_content(messages, rng):
+    """Pick a response shaped like what the calling component parses"""
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    user = " ".join(m.get("content", "") for m in messages if m.get("role") != "system")
+    courses = _course_ids(user)
+
+    if "Learning Path Analysis AI" in system:
+        # Fused mode: every section in one object, built from the single-agent responses
+        return json.dumps({
+            section: json.loads(canned_content([{"role": "system", "content": marker}] + messages[1:], rng))
+            for section, marker in [
+                ("skills_analysis", "Skills Analysis AI agent"),
+                ("goals_analysis", "Goals Analysis AI agent"),
+                ("feedback_analysis", "Feedback Analysis AI agent"),
+                ("coordinator", "Course Recommendation Coordinator")
+            ]
+        })
+    if "Skills Analysis AI agent" in system:
+        return json.dumps({
+            "critical_gaps": [{"skill_name": "Machine Learning", "current_level": 2, "required_level": 4, "impact": "high"}],
+            "learning_readiness": [{"skill_name": "Deep Learning", "ready_now": False, "prerequisites_needed": ["ML Level 3"]}],
+            "estimated_readiness": f"{rng.randint(4, 10)}-{rng.randint(11, 16)} weeks"
+        })
+    if "Goals Analysis AI agent" in system:
+        return json.dumps({
+            "goal_course_alignment": [
+                {"course_id": course_id, "course_title": course_id, "alignment_score": 9 - i,
+                 "goal_relevance": "Supports stated career goals", "career_impact": "high" if i == 0 else "medium"}
+                for i, course_id in enumerate(courses[:3])
+            ],
+            "strategic_timeline": {"short_term_priority": courses[:2], "medium_term_goals": courses[2:4],
+                                   "long_term_vision": "Technical leadership"},
+            "career_progression": {"current_level": "individual_contributor", "target_level": "team_lead",
+                                   "key_skills_needed": ["Python", "Machine Learning"], "timeline_months": 12}
+        })
+    if "Feedback Analysis AI agent" in system:
+        return json.dumps({
+            "learning_profile": {"preferred_style": "hands-on", "optimal_pace": "moderate",
+                                 "strength_areas": ["problem_solving"], "improvement_areas": ["communication"],
+                                 "learning_confidence": "medium"},
+            "course_preferences": [
+                {"course_id": course_id, "suitability_score": 8 - i, "learning_style_match": "high",
+                 "recommended_approach": "Start with fundamentals, then hands-on projects", "support_needed": "moderate"}
+                for i, course_id in enumerate(courses[:3])
+            ],
+            "personalized_recommendations": {"study_schedule": "regular", "collaboration_level": "paired",
+                                             "assessment_preference": "project", "motivation_factors": ["career_advancement"]},
+            "risk_factors": [{"factor": "time_management", "mitigation": "Structured timeline with milestones"}]
+        })
+    if "Course Recommendation Coordinator" in system:
+        return json.dumps({
+            "recommended_sequence": [
+                {"course_id": course_id, "course_title": course_id, "sequence_order": i + 1,
+                 "reasoning": "Closes the most important skill gap for the user's goals",
+                 "agent_consensus": "high" if i == 0 else "medium"}
+                for i, course_id in enumerate(courses[:3])
+            ],
+            "strategic_advice": "Build foundations first, then specialise",
+            "estimated_timeline": f"{rng.randint(10, 18)} weeks total"
+        })
+    if "revise a learning timeline" in system:
+        return json.dumps({"study_hours_per_week": 10, "preferred_days": ["monday", "wednesday", "friday"],
+                           "max_session_length": 2, "total_weeks": 6, "reasoning": "Moderate adjustment"})
+    if "modifies course structures" in system:
+        return json.dumps({"total_weeks": 6, "total_hours": 40, "modules_to_keep": 4,
+                           "reasoning": "Compressed timeline, all modules kept"})
+
+    # Free-text endpoints (mentor, onboarding, practice, course search)
+    sentences = [
+        "That is a good question.",
+        "Start by breaking the work into small, reviewable pieces.",
+        "Check the onboarding guide for the team's conventions.",
+        "Pair with a colleague on the first task to learn the workflow.",
+        "Set a short weekly check-in to review progress."
+    ]
+    return " ".join(rng.sample(sentences, 3))
+
+
+def tokenize(content):
+    """Split content into word-sized pieces that reassemble exactly"""
+    return re.findall(r"\s*\S+", content) or [content]
+
+
+# =========================
+# API Routes
+# =========================
+def _completion_id(body):
+    return "chatcmpl-fake-" + hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+@app.route('/api/v1/chat/completions', methods=['POST'])
+@app.route('/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    body = request.get_json(force=True) or {}
+    messages = body.get("messages", [])
+    model = body.get("model", "fake/model")
+    with config_lock:
+        cfg = dict(CONFIG)
+    fingerprint = payload_fingerprint(body)
+    rng = request_rng(fingerprint, cfg["seed"])
+
+    with stats_lock:
+        stats["requests"] += 1
+        attempt = attempts[fingerprint] = attempts.get(fingerprint, 0) + 1
+
+    # Error injection keyed on (payload, attempt), so client retries of a failed prompt can succeed
+    if should_inject_error(fingerprint, attempt, cfg):
+        with stats_lock:
+            stats["errors_injected"] += 1
+        return jsonify({"error": {"message": "Injected upstream failure", "code": cfg["error_status"]}}), cfg["error_status"]
+
+    content = canned_content(messages, rng)
+    tokens = tokenize(content)
+    finish_reason = "stop"
+    if body.get("max_tokens") and len(tokens) > int(body["max_tokens"]):
+        tokens = tokens[:int(body["max_tokens"])]
+        finish_reason = "length"
+    first_token_delay = sample_latency(cfg["latency"], rng)
+    token_delay = 1.0 / cfg["tokens_per_second"] if cfg["tokens_per_second"] > 0 else 0.0
+    prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+             "total_tokens": prompt_tokens + len(tokens)}
+    completion_id = _completion_id(body)
+    created = int(time.time())
+
+    with stats_lock:
+        stats["completion_tokens"] += len(tokens)
+
+    if not body.get("stream"):
+        time.sleep(first_token_delay + token_delay * len(tokens))
+        return jsonify({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": finish_reason
+            }],
+            "usage": usage
+        })
+
+    with stats_lock:
+        stats["streamed"] += 1
+
+    def chunk(delta, finish_reason=None):
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    def generate():
+        time.sleep(first_token_delay)
+        yield chunk({"role": "assistant", "content": ""})
+        for token in tokens:
+            yield chunk({"content": token})
+            if token_delay:
+                time.sleep(token_delay)
+        yield chunk({}, finish_reason=finish_reason)
+        yield "data: [DONE]\n\n"
+
+    return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.route('/api/v1/models', methods=['GET'])
+@app.route('/v1/models', methods=['GET'])
+def models():
+    return jsonify({"object": "list", "data": [{"id": "meta-llama/llama-3-8b-instruct", "object": "model"}]})
+
+
+@app.route('/admin/config', methods=['GET', 'POST'])
+def admin_config():
+    """Read or update the fake's behaviour at runtime (e.g. between benchmark phases)"""
+    if request.method == 'POST':
+        updates = request.get_json(force=True) or {}
+        try:
+            if "latency" in updates:
+                parse_latency(updates["latency"])
+            with config_lock:
+                for key, value in updates.items():
+                    if key in CONFIG:
+                        CONFIG[key] = type(CONFIG[key])(value)
+            # A new phase starts counting attempts from scratch, so it replays like a fresh run
+            with stats_lock:
+                attempts.clear()
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+    with config_lock:
+        return jsonify(CONFIG)
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    with stats_lock:
+        return jsonify({"status": "OK", "config": CONFIG, "stats": dict(stats)})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenRouter stand-in for load testing")
+    parser.add_argument("--port", type=int, default=int(os.getenv("FAKE_LLM_PORT", 5099)))
+    parser.add_argument("--latency", default=CONFIG["latency"],
+                        help="fixed:S | uniform:LO,HI | normal:MEAN,STD | lognormal:MU,SIGMA (seconds)")
+    parser.add_argument("--tokens-per-second", type=float, default=CONFIG["tokens_per_second"])
+    parser.add_argument("--error-rate", type=float, default=CONFIG["error_rate"])
+    parser.add_argument("--error-status", type=int, default=CONFIG["error_status"])
+    parser.add_argument("--seed", type=int, default=CONFIG["seed"])
+    args = parser.parse_args()
+
+    try:
+        parse_latency(args.latency)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    CONFIG.update({
+        "latency": args.latency,
+        "tokens_per_second": args.tokens_per_second,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+        "seed": args.seed
+    })
+    print(f"🧪 Fake OpenRouter on http://localhost:{args.port}/api/v1 with {CONFIG}")
+    app.run(port=args.port, threaded=True)
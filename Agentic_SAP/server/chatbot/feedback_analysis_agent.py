@@ -5,7 +5,7 @@ Specialized LLM agent for analyzing user feedback and learning preferences
 
 import os
 import json
-from openai import OpenAI
+from llm_client import get_llm_client
 from dotenv import load_dotenv
 
 # Load environment
@@ -13,10 +13,7 @@ load_dotenv()
 
 class FeedbackAnalysisAgent:
     def __init__(self):
-        self.client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url=os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
-        )
+        self.llm = get_llm_client()
         self.model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct")
     
     def analyze_feedback(self, user_profile, feedback_data, available_courses):
@@ -24,11 +21,30 @@ class FeedbackAnalysisAgent:
         Analyze user feedback to determine learning preferences and course fit
         """
         try:
-            # Process feedback data
-            feedback_summary = ""
-            if feedback_data and len(feedback_data) > 0:
-                for feedback in feedback_data:
-                    feedback_summary += f"""
+            ai_response = self.llm.chat(**self._build_request(user_profile, feedback_data, available_courses)).strip()
+            return self._parse_response(ai_response, user_profile, feedback_data, available_courses)
+        except Exception as e:
+            print(f"Feedback Analysis Agent error: {e}")
+            return self.fallback_result(user_profile, feedback_data, available_courses, str(e))
+    
+    async def analyze_feedback_async(self, user_profile, feedback_data, available_courses):
+        """
+        Async variant of analyze_feedback used by the orchestrator's deadline-bounded fan-out
+        """
+        try:
+            ai_response = (await self.llm.achat(**self._build_request(user_profile, feedback_data, available_courses))).strip()
+            return self._parse_response(ai_response, user_profile, feedback_data, available_courses)
+        except Exception as e:
+            print(f"Feedback Analysis Agent error: {e}")
+            return self.fallback_result(user_profile, feedback_data, available_courses, str(e))
+    
+    def _build_request(self, user_profile, feedback_data, available_courses):
+        """Prompt and completion parameters for one feedback analysis call"""
+        # Process feedback data
+        feedback_summary = ""
+        if feedback_data and len(feedback_data) > 0:
+            for feedback in feedback_data:
+                feedback_summary += f"""
 Feedback Date: {feedback.get('date', 'Unknown')}
 Technical Skills: {feedback.get('technicalSkills', 0)}/5
 Communication: {feedback.get('communication', 0)}/5  
@@ -39,13 +55,13 @@ Qualitative Feedback: {feedback.get('qualitativeFeedback', 'None')}
 Areas for Improvement: {feedback.get('areasForImprovement', 'None')}
 Goals: {feedback.get('goals', 'None')}
 """
-            else:
-                feedback_summary = "No feedback data available - will use general recommendations"
-            
-            # Course context for preference matching
-            courses_info = ""
-            for course in available_courses:
-                courses_info += f"""
+        else:
+            feedback_summary = "No feedback data available - will use general recommendations"
+        
+        # Course context for preference matching
+        courses_info = ""
+        for course in available_courses:
+            courses_info += f"""
 Course: {course['title']} (ID: {course['id']})
 - Type: {course['difficulty']} level
 - Duration: {course['duration']}
@@ -53,7 +69,7 @@ Course: {course['title']} (ID: {course['id']})
 - Skills Focus: {', '.join([skill['name'] for skill in course['skills']])}
 """
 
-            prompt = f"""You are a Feedback Analysis AI agent specialized in learning style assessment and course preference matching.
+        prompt = f"""You are a Feedback Analysis AI agent specialized in learning style assessment and course preference matching.
 
 USER PROFILE:
 Name: {user_profile['name']}
@@ -116,86 +132,86 @@ Return JSON format:
 
 Focus on actionable learning insights for {user_profile['role']}."""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert Feedback Analysis AI agent. Provide personalized learning insights in valid JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,  # Reduced for cost optimization
-                temperature=0.2
-            )
-            
-            # Parse and clean response
-            ai_response = response.choices[0].message.content.strip()
-            
-            # Clean JSON formatting
-            if ai_response.startswith("```json"):
-                ai_response = ai_response.replace("```json", "").replace("```", "").strip()
-            
-            # Extract JSON
-            import re
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                ai_response = json_match.group()
-            
-            try:
-                parsed_response = json.loads(ai_response)
-                return {
-                    "agent": "feedback_analysis",
-                    "analysis": parsed_response,
-                    "confidence": "high" if feedback_data else "medium"
-                }
-            except json.JSONDecodeError:
-                return {
-                    "agent": "feedback_analysis",
-                    "analysis": {
-                        "learning_profile": {
-                            "preferred_style": "mixed",
-                            "optimal_pace": "moderate", 
-                            "strength_areas": ["technical_skills"],
-                            "improvement_areas": ["communication"],
-                            "learning_confidence": "medium"
-                        },
-                        "course_preferences": [],
-                        "personalized_recommendations": {
-                            "study_schedule": "regular",
-                            "collaboration_level": "paired",
-                            "assessment_preference": "project",
-                            "motivation_factors": ["career_advancement"]
-                        },
-                        "risk_factors": []
-                    },
-                    "confidence": "low",
-                    "error": "JSON parsing failed"
-                }
-                
-        except Exception as e:
-            print(f"Feedback Analysis Agent error: {e}")
+        return {
+            "messages": [
+                {"role": "system", "content": "You are an expert Feedback Analysis AI agent. Provide personalized learning insights in valid JSON format."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 300,  # Reduced for cost optimization
+            "temperature": 0.2,
+            "model": self.model,
+            "endpoint": "feedback_analysis"
+        }
+    
+    def _parse_response(self, ai_response, user_profile, feedback_data, available_courses):
+        """Extract the JSON analysis from the model output"""
+        # Clean JSON formatting
+        if ai_response.startswith("```json"):
+            ai_response = ai_response.replace("```json", "").replace("```", "").strip()
+        
+        # Extract JSON
+        import re
+        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+        if json_match:
+            ai_response = json_match.group()
+        
+        try:
+            parsed_response = json.loads(ai_response)
+            return {
+                "agent": "feedback_analysis",
+                "analysis": parsed_response,
+                "confidence": "high" if feedback_data else "medium"
+            }
+        except json.JSONDecodeError:
             return {
                 "agent": "feedback_analysis",
                 "analysis": {
                     "learning_profile": {
                         "preferred_style": "mixed",
-                        "optimal_pace": "moderate",
-                        "strength_areas": [],
-                        "improvement_areas": [],
+                        "optimal_pace": "moderate", 
+                        "strength_areas": ["technical_skills"],
+                        "improvement_areas": ["communication"],
                         "learning_confidence": "medium"
                     },
                     "course_preferences": [],
                     "personalized_recommendations": {
-                        "study_schedule": "flexible",
-                        "collaboration_level": "solo",
-                        "assessment_preference": "quiz",
-                        "motivation_factors": ["skill_building"]
+                        "study_schedule": "regular",
+                        "collaboration_level": "paired",
+                        "assessment_preference": "project",
+                        "motivation_factors": ["career_advancement"]
                     },
-                    "risk_factors": [
-                        {"factor": "analysis_unavailable", "mitigation": "Use standard learning approach"}
-                    ]
+                    "risk_factors": []
                 },
                 "confidence": "low",
-                "error": str(e)
+                "error": "JSON parsing failed"
             }
+    
+    def fallback_result(self, user_profile, feedback_data, available_courses, error):
+        """Default analysis used when the LLM call fails or misses its deadline"""
+        return {
+            "agent": "feedback_analysis",
+            "analysis": {
+                "learning_profile": {
+                    "preferred_style": "mixed",
+                    "optimal_pace": "moderate",
+                    "strength_areas": [],
+                    "improvement_areas": [],
+                    "learning_confidence": "medium"
+                },
+                "course_preferences": [],
+                "personalized_recommendations": {
+                    "study_schedule": "flexible",
+                    "collaboration_level": "solo",
+                    "assessment_preference": "quiz",
+                    "motivation_factors": ["skill_building"]
+                },
+                "risk_factors": [
+                    {"factor": "analysis_unavailable", "mitigation": "Use standard learning approach"}
+                ]
+            },
+            "confidence": "low",
+            "error": error
+        }
 
 # Test function for standalone usage  
 def test_feedback_agent():
@@ -0,0 +1,136 @@
+"""
+Fused Analysis Agent - Agentic AI Component
+Single LLM call that produces the skills, goals, feedback and coordinator sections together,
+split back into the same agent_outputs shape the multi-agent pipeline returns
+"""
+
+import os
+import re
+import json
+from llm_client import get_llm_client
+from dotenv import load_dotenv
+
+# Load environment
+load_dotenv()
+
+AGENT_SECTIONS = ["skills_analysis", "goals_analysis", "feedback_analysis"]
+
+class FusedAnalysisAgent:
+    def __init__(self):
+        self.llm = get_llm_client()
+        self.model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct")
+
+    def analyze(self, user_profile, feedback_data, available_courses, timeout=None):
+        """
+        Run one combined analysis. Returns (agent_outputs, coordinator_section); sections
+        missing from the response come back as low-confidence entries / None.
+        With a timeout the call is made once, without retries.
+        """
+        try:
+            deadline_args = {"timeout": timeout, "max_retries": 0} if timeout is not None else {}
+            ai_response = self.llm.chat(
+                **self._build_request(user_profile, feedback_data, available_courses), **deadline_args
+            ).strip()
+            return self._parse_response(ai_response)
+        except Exception as e:
+            print(f"Fused Analysis Agent error: {e}")
+            return self._split_sections({}, str(e))
+
+    def _build_request(self, user_profile, feedback_data, available_courses):
+        """Prompt and completion parameters for the fused analysis call"""
+        current_skills = ", ".join([f"{skill['name']} (Level {skill['rating']})"
+                                    for skill in user_profile.get('skills', [])])
+
+        # Compact feedback: scores and free text once, instead of once per agent
+        feedback_lines = []
+        for feedback in feedback_data or []:
+            feedback_lines.append(
+                f"- {feedback.get('date', 'Unknown')}: technical {feedback.get('technicalSkills', 0)}/5, "
+                f"communication {feedback.get('communication', 0)}/5, teamwork {feedback.get('teamwork', 0)}/5, "
+                f"problem solving {feedback.get('problemSolving', 0)}/5; improve: {feedback.get('areasForImprovement', 'None')}; "
+                f"goals: {feedback.get('goals', 'None')}"
+            )
+        feedback_summary = "\n".join(feedback_lines) or "No feedback data available"
+
+        # Course catalog is sent a single time for all four sections
+        courses_context = ""
+        for course in available_courses:
+            course_skills = ", ".join([f"{skill['name']} L{skill.get('level', '?')}" for skill in course.get('skills', [])])
+            courses_context += f"- {course['id']}: {course['title']} ({course.get('difficulty', 'Unknown')}, {course.get('duration', 'Unknown')}) skills: {course_skills}\n"
+
+        prompt = f"""Analyze this learner and recommend a learning path.
+
+User: {user_profile['name']} ({user_profile['role']}, {user_profile.get('experience', 'unknown experience')})
+Skills: {current_skills}
+Goals: {user_profile.get('currentGoals', [])}
+
+Feedback:
+{feedback_summary}
+
+Courses:
+{courses_context}
+
+Only use course IDs from the list. Return one JSON object with exactly these sections:
+{{
+  "skills_analysis": {{
+    "critical_gaps": [{{"skill_name": "Machine Learning", "current_level": 2, "required_level": 4, "impact": "high"}}],
+    "learning_readiness": [{{"skill_name": "Deep Learning", "ready_now": true, "prerequisites_needed": ["ML Level 3"]}}],
+    "estimated_readiness": "6-8 weeks"
+  }},
+  "goals_analysis": {{
+    "goal_course_alignment": [{{"course_id": "course2", "course_title": "...", "alignment_score": 9, "goal_relevance": "...", "career_impact": "high"}}],
+    "strategic_timeline": {{"short_term_priority": ["course2"], "medium_term_goals": ["course3"], "long_term_vision": "..."}},
+    "career_progression": {{"current_level": "...", "target_level": "...", "key_skills_needed": ["..."], "timeline_months": 12}}
+  }},
+  "feedback_analysis": {{
+    "learning_profile": {{"preferred_style": "hands-on", "optimal_pace": "moderate", "strength_areas": ["..."], "improvement_areas": ["..."], "learning_confidence": "medium"}},
+    "course_preferences": [{{"course_id": "course2", "suitability_score": 8, "learning_style_match": "high", "recommended_approach": "...", "support_needed": "moderate"}}],
+    "personalized_recommendations": {{"study_schedule": "regular", "collaboration_level": "paired", "assessment_preference": "project", "motivation_factors": ["..."]}},
+    "risk_factors": [{{"factor": "...", "mitigation": "..."}}]
+  }},
+  "coordinator": {{
+    "recommended_sequence": [{{"course_id": "course2", "course_title": "...", "sequence_order": 1, "reasoning": "...", "agent_consensus": "high"}}],
+    "strategic_advice": "...",
+    "estimated_timeline": "..."
+  }}
+}}"""
+
+        return {
+            "messages": [
+                {"role": "system", "content": "You are an expert Learning Path Analysis AI performing skills, goals, feedback and coordination analysis in one pass. Respond with valid JSON only."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 900,  # Covers all four sections
+            "temperature": 0.1,
+            "model": self.model,
+            "endpoint": "fused_analysis"
+        }
+
+    def _parse_response(self, ai_response):
+        """Split the combined JSON back into per-agent outputs and the coordinator section"""
+        if ai_response.startswith("```json"):
+            ai_response = ai_response.replace("```json", "").replace("```", "").strip()
+
+        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+        if json_match:
+            ai_response = json_match.group()
+
+        try:
+            parsed_response = json.loads(ai_response)
+            if not isinstance(parsed_response, dict):
+                raise json.JSONDecodeError("Invalid response format", ai_response, 0)
+            return self._split_sections(parsed_response, "Section missing from fused response")
+        except json.JSONDecodeError:
+            return self._split_sections({}, "JSON parsing failed")
+
+    def _split_sections(self, parsed_response, error):
+        agent_outputs = {}
+        for section in AGENT_SECTIONS:
+            analysis = parsed_response.get(section)
+            if isinstance(analysis, dict) and analysis:
+                agent_outputs[section] = {"agent": section, "analysis": analysis, "confidence": "high"}
+            else:
+                agent_outputs[section] = {"agent": section, "analysis": {}, "confidence": "low", "error": error}
+
+        coordinator = parsed_response.get("coordinator")
+        return agent_outputs, coordinator if isinstance(coordinator, dict) else None
@@ -5,7 +5,7 @@ Specialized LLM agent for analyzing user goals and course alignment
 
 import os
 import json
-from openai import OpenAI
+from llm_client import get_llm_client
 from dotenv import load_dotenv
 
 # Load environment
@@ -13,10 +13,7 @@ load_dotenv()
 
 class GoalsAnalysisAgent:
     def __init__(self):
-        self.client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url=os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
-        )
+        self.llm = get_llm_client()
         self.model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct")
     
     def analyze_goals(self, user_profile, user_feedback_data, available_courses):
@@ -24,21 +21,40 @@ class GoalsAnalysisAgent:
         Analyze user goals and map them to optimal course selections
         """
         try:
-            # Extract goals from feedback data
-            goals_text = ""
-            if user_feedback_data:
-                for feedback in user_feedback_data:
-                    if 'goals' in feedback and feedback['goals']:
-                        goals_text += f"Goal: {feedback['goals']} "
-                        
-            # If no explicit goals, infer from role
-            if not goals_text:
-                goals_text = f"Advance in {user_profile['role']} position"
-            
-            # Prepare course context with career relevance
-            courses_context = ""
-            for course in available_courses:
-                courses_context += f"""
+            ai_response = self.llm.chat(**self._build_request(user_profile, user_feedback_data, available_courses)).strip()
+            return self._parse_response(ai_response, user_profile, user_feedback_data, available_courses)
+        except Exception as e:
+            print(f"Goals Analysis Agent error: {e}")
+            return self.fallback_result(user_profile, user_feedback_data, available_courses, str(e))
+    
+    async def analyze_goals_async(self, user_profile, user_feedback_data, available_courses):
+        """
+        Async variant of analyze_goals used by the orchestrator's deadline-bounded fan-out
+        """
+        try:
+            ai_response = (await self.llm.achat(**self._build_request(user_profile, user_feedback_data, available_courses))).strip()
+            return self._parse_response(ai_response, user_profile, user_feedback_data, available_courses)
+        except Exception as e:
+            print(f"Goals Analysis Agent error: {e}")
+            return self.fallback_result(user_profile, user_feedback_data, available_courses, str(e))
+    
+    def _build_request(self, user_profile, user_feedback_data, available_courses):
+        """Prompt and completion parameters for one goals analysis call"""
+        # Extract goals from feedback data
+        goals_text = ""
+        if user_feedback_data:
+            for feedback in user_feedback_data:
+                if 'goals' in feedback and feedback['goals']:
+                    goals_text += f"Goal: {feedback['goals']} "
+                    
+        # If no explicit goals, infer from role
+        if not goals_text:
+            goals_text = f"Advance in {user_profile['role']} position"
+        
+        # Prepare course context with career relevance
+        courses_context = ""
+        for course in available_courses:
+            courses_context += f"""
 Course: {course['title']} (ID: {course['id']})
 - Difficulty: {course['difficulty']}
 - Duration: {course['duration']} 
@@ -46,7 +62,7 @@ Course: {course['title']} (ID: {course['id']})
 - Description: {course['description']}
 """
 
-            prompt = f"""Analyze goals and recommend courses.
+        prompt = f"""Analyze goals and recommend courses.
 
 User: {user_profile['name']} ({user_profile['role']})
 Goals: {goals_text}
@@ -78,80 +94,80 @@ Return JSON:
   }}
 }}"""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert Goals Analysis AI agent. Provide strategic career-focused analysis in valid JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=100,  # Reduced for cost optimization
-                temperature=0.2
-            )
-            
-            # Parse and clean response
-            ai_response = response.choices[0].message.content.strip()
-            
-            # Clean JSON formatting
-            if ai_response.startswith("```json"):
-                ai_response = ai_response.replace("```json", "").replace("```", "").strip()
-            
-            # Extract JSON
-            import re
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                ai_response = json_match.group()
-            
-            try:
-                parsed_response = json.loads(ai_response)
-                return {
-                    "agent": "goals_analysis",
-                    "analysis": parsed_response,
-                    "confidence": "high"
-                }
-            except json.JSONDecodeError:
-                return {
-                    "agent": "goals_analysis", 
-                    "analysis": {
-                        "goal_course_alignment": [],
-                        "strategic_timeline": {
-                            "short_term_priority": [],
-                            "medium_term_goals": [],
-                            "long_term_vision": "Career advancement in current role"
-                        },
-                        "career_progression": {
-                            "current_level": user_profile['role'],
-                            "target_level": "Senior " + user_profile['role'],
-                            "key_skills_needed": [],
-                            "timeline_months": 12
-                        },
-                        "roi_recommendations": []
-                    },
-                    "confidence": "low",
-                    "error": "JSON parsing failed"
-                }
-                
-        except Exception as e:
-            print(f"Goals Analysis Agent error: {e}")
+        return {
+            "messages": [
+                {"role": "system", "content": "You are an expert Goals Analysis AI agent. Provide strategic career-focused analysis in valid JSON format."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 100,  # Reduced for cost optimization
+            "temperature": 0.2,
+            "model": self.model,
+            "endpoint": "goals_analysis"
+        }
+    
+    def _parse_response(self, ai_response, user_profile, user_feedback_data, available_courses):
+        """Extract the JSON analysis from the model output"""
+        # Clean JSON formatting
+        if ai_response.startswith("```json"):
+            ai_response = ai_response.replace("```json", "").replace("```", "").strip()
+        
+        # Extract JSON
+        import re
+        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+        if json_match:
+            ai_response = json_match.group()
+        
+        try:
+            parsed_response = json.loads(ai_response)
             return {
                 "agent": "goals_analysis",
+                "analysis": parsed_response,
+                "confidence": "high"
+            }
+        except json.JSONDecodeError:
+            return {
+                "agent": "goals_analysis", 
                 "analysis": {
                     "goal_course_alignment": [],
                     "strategic_timeline": {
                         "short_term_priority": [],
                         "medium_term_goals": [],
-                        "long_term_vision": "Unable to analyze goals"
+                        "long_term_vision": "Career advancement in current role"
                     },
                     "career_progression": {
                         "current_level": user_profile['role'],
-                        "target_level": "Advanced role",
+                        "target_level": "Senior " + user_profile['role'],
                         "key_skills_needed": [],
                         "timeline_months": 12
                     },
                     "roi_recommendations": []
                 },
                 "confidence": "low",
-                "error": str(e)
+                "error": "JSON parsing failed"
             }
+    
+    def fallback_result(self, user_profile, user_feedback_data, available_courses, error):
+        """Default analysis used when the LLM call fails or misses its deadline"""
+        return {
+            "agent": "goals_analysis",
+            "analysis": {
+                "goal_course_alignment": [],
+                "strategic_timeline": {
+                    "short_term_priority": [],
+                    "medium_term_goals": [],
+                    "long_term_vision": "Unable to analyze goals"
+                },
+                "career_progression": {
+                    "current_level": user_profile['role'],
+                    "target_level": "Advanced role",
+                    "key_skills_needed": [],
+                    "timeline_months": 12
+                },
+                "roi_recommendations": []
+            },
+            "confidence": "low",
+            "error": error
+        }
 
 # Test function for standalone usage
 def test_goals_agent():
@@ -0,0 +1,207 @@
+"""
+Keyword Classifier - one compiled regex for every keyword list used by onboarding
+Maps a message to its relevance and suggestion-topic buckets in a single scan, matching
+whole words only (so 'ai' no longer fires inside 'email' or 'api' inside 'capital')
+"""
+
+import re
+import time
+import argparse
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+# Suffixes accepted after a keyword so plurals and verb forms still match ('tools', 'working')
+INFLECTIONS = r"(?:s|es|ing|ed|er|ers)?"
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Alternation of the keywords with common prefixes factored out ('sa(?:les|p)')"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a keyword
+
+    def emit(node: Dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Optional continuations are greedy, so the longest keyword is tried first
+        return "(?:" + body + ")?" if "" in node else body
+
+    return emit(trie)
+
+
+class KeywordClassifier:
+    """
+    Compiles {bucket: [keywords]} into one alternation, factored into a prefix trie so
+    the regex engine never retries a shared prefix, behind a lookahead so every start
+    position is tried. A keyword's buckets include those of the
+    keywords it contains ('analytics cloud' also counts as 'analytics' and 'cloud'), so
+    the result equals checking every keyword on its own with word boundaries.
+    """
+
+    def __init__(self, buckets: Dict[str, Iterable[str]]):
+        self.buckets = {bucket: [keyword.lower() for keyword in keywords] for bucket, keywords in buckets.items()}
+        keyword_buckets = {}
+        for bucket, keywords in self.buckets.items():
+            for keyword in keywords:
+                keyword_buckets.setdefault(keyword, set()).add(bucket)
+
+        keywords = sorted(keyword_buckets, key=len, reverse=True)
+        self.pattern = re.compile(r"(?=(?<!\w)(" + _trie_pattern(keywords) + r")" + INFLECTIONS + r"(?!\w))")
+        self._buckets_by_keyword: Dict[str, FrozenSet[str]] = {}
+        for keyword in keywords:
+            contained = set(keyword_buckets[keyword])
+            for other in keywords:
+                if len(other) < len(keyword) and re.search(r"(?<!\w)" + re.escape(other) + r"(?!\w)", keyword):
+                    contained |= keyword_buckets[other]
+            self._buckets_by_keyword[keyword] = frozenset(contained)
+
+    def classify(self, text: str) -> FrozenSet[str]:
+        """Every bucket with at least one keyword in the text"""
+        found = set()
+        for keyword in self.pattern.findall(text.lower()):
+            found |= self._buckets_by_keyword[keyword]
+        return frozenset(found)
+
+    def first_match(self, text: str, order: Sequence[str]):
+        """First bucket of order present in the text, or None"""
+        found = self.classify(text)
+        return next((bucket for bucket in order if bucket in found), None)
+
+
+# =========================
+# Onboarding Keyword Tables
+# =========================
+
+RELEVANCE_KEYWORDS = {
+    # SAP-specific keywords (high priority)
+    "sap": [
+        'sap', 's/4hana', 's4hana', 'erp', 'btp', 'business technology platform',
+        'hana', 'fiori', 'ariba', 'concur', 'successfactors', 'fieldglass',
+        'analytics cloud', 'data intelligence', 'integration suite', 'commerce cloud',
+        'sales cloud', 'service cloud', 'marketing cloud', 'customer experience',
+        'cx', 'crm', 'customer relationship management', 'leonardo', 'ai core',
+        'launchpad', 'workflow', 'process orchestration', 'master data governance',
+        'data warehouse cloud', 'datasphere', 'event mesh', 'api management'
+    ],
+    # Work-related keywords (medium priority)
+    "work": [
+        'team', 'work', 'job', 'career', 'onboarding', 'training', 'project',
+        'technology', 'tool', 'platform', 'data science', 'machine learning', 'ai',
+        'department', 'manager', 'colleague', 'meeting', 'process', 'policy',
+        'skill', 'development', 'learning', 'certification', 'performance', 'review',
+        'office', 'remote', 'schedule', 'deadline', 'goal', 'objective', 'mentor',
+        'mentoring', 'feedback', 'collaboration', 'communication', 'leadership',
+        'python', 'sql', 'analytics', 'cloud', 'database', 'software', 'programming',
+        'code', 'engineering', 'research', 'innovation', 'product',
+        'customer', 'business', 'strategy', 'planning', 'reporting', 'analysis',
+        'enterprise', 'solution', 'implementation', 'integration', 'architecture'
+    ],
+    # Business and enterprise keywords
+    "business": [
+        'supply chain', 'procurement', 'finance', 'accounting', 'hr', 'human resources',
+        'sales', 'marketing', 'service', 'operations', 'manufacturing', 'retail',
+        'logistics', 'warehouse', 'inventory', 'planning', 'forecasting', 'budgeting',
+        'compliance', 'governance', 'security', 'privacy', 'gdpr', 'audit'
+    ],
+    # Non-work keywords that indicate personal/irrelevant topics
+    "irrelevant": [
+        'personal life', 'family', 'relationship', 'dating', 'marriage', 'divorce',
+        'religion', 'politics', 'weather', 'sports', 'entertainment', 'movie', 'music',
+        'food', 'cooking', 'recipe', 'vacation', 'travel', 'hobby', 'gaming', 'tv show',
+        'celebrity', 'gossip', 'health', 'medical', 'doctor', 'medicine', 'fitness',
+        'diet', 'weight', 'appearance', 'fashion', 'shopping', 'personal finance',
+        'investment', 'stock', 'cryptocurrency', 'bitcoin', 'lottery', 'gambling'
+    ]
+}
+
+# Buckets that mark a message as SAP/work related
+RELEVANT_BUCKETS = frozenset({"sap", "work", "business"})
+
+# Follow-up suggestion topics, checked in this order (first match wins)
+SUGGESTION_TOPICS = [
+    ("btp", ['btp', 'business technology platform']),
+    ("s4hana", ['erp', 's/4hana', 's4hana']),
+    ("cx", ['cx', 'customer experience', 'sales cloud', 'service cloud']),
+    ("analytics", ['analytics', 'data science', 'machine learning']),
+    ("onboarding", ['onboarding', 'new', 'first week']),
+    ("tools", ['tool', 'technology', 'platform']),
+    ("career", ['career', 'growth', 'development']),
+    ("integration", ['integration', 'api', 'connectivity'])
+]
+
+# Relevance and suggestion buckets share one pattern; topic buckets are prefixed to keep names apart
+onboarding_keywords = KeywordClassifier(dict(
+    RELEVANCE_KEYWORDS, **{f"topic:{topic}": keywords for topic, keywords in SUGGESTION_TOPICS}
+))
+_TOPIC_ORDER = [f"topic:{topic}" for topic, _ in SUGGESTION_TOPICS]
+
+
+def suggestion_topic(text: str):
+    """First SUGGESTION_TOPICS entry with a keyword in the text, or None"""
+    bucket = onboarding_keywords.first_match(text, _TOPIC_ORDER)
+    return bucket[len("topic:"):] if bucket else None
+
+
+# =========================
+# Microbenchmark
+# =========================
+
+BENCHMARK_MESSAGES = [
+    "What is SAP BTP and how do I get access?",
+    "How do I set up my email signature?",
+    "Can you explain the S/4HANA finance modules to a new analyst?",
+    "Which tools does the team use for machine learning projects?",
+    "Any tips for my vacation and family travel plans?",
+    "How does the API management service connect to the integration suite?",
+    "Tell me about the capital expenditure approval process in procurement",
+    "I want to maintain my skills - which certifications are worth it for my career development?",
+    "What's the weather like in Walldorf this week?",
+    "Where can I find the onboarding checklist for my first week in the data science department?"
+]
+
+
+def _substring_buckets(buckets: Dict[str, List[str]], text: str) -> FrozenSet[str]:
+    """The previous approach: any(keyword in text) per list, for comparison"""
+    text = text.lower()
+    return frozenset(bucket for bucket, keywords in buckets.items() if any(keyword in text for keyword in keywords))
+
+
+def _time_per_call(fn, messages: List[str], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            fn(message)
+    return (time.perf_counter() - start) / (iterations * len(messages))
+
+
+def benchmark(messages: List[str], iterations: int = 2000) -> Tuple[Dict, List[Tuple[str, FrozenSet, FrozenSet]]]:
+    """Mean seconds per message for both approaches, plus the messages where their buckets differ"""
+    buckets = onboarding_keywords.buckets
+    timings = {
+        "substring": _time_per_call(lambda message: _substring_buckets(buckets, message), messages, iterations),
+        "compiled": _time_per_call(onboarding_keywords.classify, messages, iterations)
+    }
+    differences = []
+    for message in messages:
+        old, new = _substring_buckets(buckets, message), onboarding_keywords.classify(message)
+        if old != new:
+            differences.append((message, old, new))
+    return timings, differences
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the compiled keyword classifier against substring scans")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("messages", nargs="*", help="Messages to classify (defaults to a built-in sample)")
+    args = parser.parse_args()
+
+    timings, differences = benchmark(args.messages or BENCHMARK_MESSAGES, args.iterations)
+    print(f"⏱️ substring scan: {timings['substring'] * 1e6:.1f} µs/message")
+    print(f"⚡ compiled regex: {timings['compiled'] * 1e6:.1f} µs/message "
+          f"({timings['substring'] / timings['compiled']:.1f}x)")
+    for message, old, new in differences:
+        print(f"🔀 {message!r}\n   substring: {sorted(old)}\n   compiled:  {sorted(new)}")
@@ -0,0 +1,180 @@
+"""
+LLM Completion Cache - two-tier (memory LRU + SQLite) cache for chat completions
+Keyed by model, messages, max_tokens and temperature with per-endpoint TTLs
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Seconds each endpoint's completions stay valid; endpoints not listed are never cached.
+# Conversational endpoints (mentor_suggest, practice, onboarding_chat) depend on chat history
+# and are intentionally left out.
+DEFAULT_ENDPOINT_TTLS = {
+    "course_search": 6 * 3600,
+    "skills_analysis": 24 * 3600,
+    "goals_analysis": 24 * 3600,
+    "feedback_analysis": 24 * 3600,
+    "coordinator": 24 * 3600,
+    "fused_analysis": 24 * 3600,
+    "summarize_feedback": 7 * 24 * 3600
+}
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite3")
+
+
+def make_cache_key(model: str, messages: List[Dict], max_tokens: Optional[int],
+                   temperature: Optional[float]) -> str:
+    """Stable fingerprint of everything that determines a completion"""
+    payload = json.dumps({
+        "model": model,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    In-memory LRU in front of an on-disk SQLite table.
+
+    Entries carry their own expiry so a restart keeps whatever is still fresh.
+    TTLs can be overridden per endpoint with LLM_CACHE_TTL_<ENDPOINT> (seconds, 0 disables).
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_max_entries: Optional[int] = None,
+                 disk_max_entries: Optional[int] = None, endpoint_ttls: Optional[Dict[str, int]] = None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.memory_max_entries = memory_max_entries or int(os.getenv("LLM_CACHE_MEMORY_MAX_ENTRIES", 512))
+        self.disk_max_entries = disk_max_entries or int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", 20000))
+        self.endpoint_ttls = dict(DEFAULT_ENDPOINT_TTLS)
+        if endpoint_ttls:
+            self.endpoint_ttls.update(endpoint_ttls)
+
+        self._memory = OrderedDict()  # key -> (expires_at, content)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._counters = {}
+        self._memory_evictions = 0
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY,"
+            " endpoint TEXT,"
+            " content TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions(last_access)")
+        self._db.commit()
+
+    def ttl_for(self, endpoint: str) -> int:
+        override = os.getenv(f"LLM_CACHE_TTL_{endpoint.upper()}")
+        if override is not None:
+            try:
+                return int(override)
+            except ValueError:
+                pass
+        return self.endpoint_ttls.get(endpoint, 0)
+
+    def get(self, key: str, endpoint: str = "default") -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, content = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._count(endpoint, "memory_hits")
+                    return content
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT content, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                self._db.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self._remember(key, row[1], row[0])
+                self._count(endpoint, "disk_hits")
+                return row[0]
+            if row is not None:
+                self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._db.commit()
+
+            self._count(endpoint, "misses")
+            return None
+
+    def set(self, key: str, content: str, ttl: int, endpoint: str = "default"):
+        if ttl <= 0 or content is None:
+            return
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(key, expires_at, content)
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, endpoint, content, created_at, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, content, now, expires_at, now)
+            )
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune(now)
+            self._db.commit()
+            self._count(endpoint, "stores")
+
+    def _remember(self, key: str, expires_at: float, content: str):
+        self._memory[key] = (expires_at, content)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+            self._memory_evictions += 1
+
+    def _prune(self, now: float):
+        """Drop expired rows and trim the table back to disk_max_entries by least-recent access"""
+        self._writes_since_prune = 0
+        self._db.execute("DELETE FROM completions WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM completions WHERE key IN ("
+            " SELECT key FROM completions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,)
+        )
+
+    def _count(self, endpoint: str, counter: str):
+        counters = self._counters.setdefault(endpoint, {})
+        counters[counter] = counters.get(counter, 0) + 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            endpoints = {}
+            for endpoint, counters in self._counters.items():
+                hits = counters.get("memory_hits", 0) + counters.get("disk_hits", 0)
+                lookups = hits + counters.get("misses", 0)
+                endpoints[endpoint] = {
+                    **counters,
+                    "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+                }
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {
+            "path": self.path,
+            "memory_entries": len(self._memory),
+            "memory_evictions": self._memory_evictions,
+            "disk_entries": disk_entries,
+            "endpoint_ttls": {endpoint: self.ttl_for(endpoint) for endpoint in self.endpoint_ttls},
+            "endpoints": endpoints
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM completions")
+            self._db.commit()
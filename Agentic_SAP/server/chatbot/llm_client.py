@@ -0,0 +1,380 @@
+"""
+Shared LLM Client - pooled OpenRouter access for every chatbot service
+Keeps HTTP connections to the OpenAI-compatible API open between calls
+and records per-call latency for each calling endpoint
+"""
+
+import os
+import time
+import asyncio
+import weakref
+import threading
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from dotenv import load_dotenv
+try:
+    from llm_cache import CompletionCache, make_cache_key
+except ImportError:  # Imported as chatbot.llm_client from server/ (timeline service)
+    from .llm_cache import CompletionCache, make_cache_key
+
+# Load environment
+load_dotenv()
+
+DEFAULT_API_BASE = "https://openrouter.ai/api/v1"
+DEFAULT_MODEL = "meta-llama/llama-3-8b-instruct"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class _InFlight:
+    """One in-progress completion that concurrent identical calls wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LLMClient:
+    """
+    OpenAI-compatible chat client backed by a single keep-alive connection pool.
+
+    Pool sizes and timeouts default to the LLM_* environment variables so every
+    service can be tuned without code changes. Concurrent calls with an identical
+    prompt fingerprint share a single in-flight completion (LLM_COALESCE_ENABLED).
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: Optional[str] = None, max_connections: Optional[int] = None,
+                 max_keepalive_connections: Optional[int] = None,
+                 keepalive_expiry: Optional[float] = None, timeout: Optional[float] = None,
+                 connect_timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 cache: Optional[CompletionCache] = None, coalesce: Optional[bool] = None):
+        self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+        self.base_url = base_url or os.getenv("OPENROUTER_API_BASE", DEFAULT_API_BASE)
+        self.model = model or os.getenv("OPENROUTER_MODEL", DEFAULT_MODEL)
+
+        self.pool_config = {
+            "max_connections": max_connections or _env_int("LLM_POOL_MAX_CONNECTIONS", 20),
+            "max_keepalive_connections": max_keepalive_connections or _env_int("LLM_POOL_MAX_KEEPALIVE", 10),
+            "keepalive_expiry": keepalive_expiry or _env_float("LLM_KEEPALIVE_EXPIRY", 60.0),
+            "timeout": timeout or _env_float("LLM_TIMEOUT", 60.0),
+            "connect_timeout": connect_timeout or _env_float("LLM_CONNECT_TIMEOUT", 10.0),
+            "max_retries": max_retries if max_retries is not None else _env_int("LLM_MAX_RETRIES", 2)
+        }
+
+        # One httpx pool per process: connections (and their TLS sessions) are reused across requests
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=self.pool_config["max_connections"],
+                max_keepalive_connections=self.pool_config["max_keepalive_connections"],
+                keepalive_expiry=self.pool_config["keepalive_expiry"]
+            ),
+            timeout=httpx.Timeout(self.pool_config["timeout"], connect=self.pool_config["connect_timeout"])
+        )
+        self.client = OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=self.http_client,
+            max_retries=self.pool_config["max_retries"]
+        )
+
+        # Completion cache (memory LRU + SQLite); disable with LLM_CACHE_ENABLED=false
+        if cache is None and os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false":
+            cache = CompletionCache()
+        self.cache = cache
+
+        # Single-flight coalescing: fingerprint -> in-flight completion
+        self.coalesce = coalesce if coalesce is not None else os.getenv("LLM_COALESCE_ENABLED", "true").lower() != "false"
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._async_inflight = {}  # (loop, fingerprint) -> [task, waiters]; only touched on that loop
+
+        # Async clients are created lazily, one per event loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_clients_lock = threading.Lock()
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def chat(self, messages: List[Dict], max_tokens: Optional[int] = None,
+             temperature: Optional[float] = None, model: Optional[str] = None,
+             endpoint: str = "default", extra_headers: Optional[Dict] = None,
+             timeout: Optional[float] = None, use_cache: bool = True,
+             max_retries: Optional[int] = None) -> str:
+        """
+        Run a chat completion and return the message content.
+        Endpoints with a cache TTL are answered from the completion cache when possible,
+        and a call identical to one already in flight waits for that call's result (for at
+        most timeout seconds, raising TimeoutError after that).
+        Deadline-bound callers pass timeout with max_retries=0 so the call cannot overrun.
+        """
+        model = model or self.model
+        cache_key, ttl, cached = self._cache_lookup(model, messages, max_tokens, temperature, endpoint, use_cache)
+        if cached is not None:
+            return cached
+
+        params = self._completion_params(model, messages, max_tokens, temperature, extra_headers, timeout)
+        if not (self.coalesce and use_cache):
+            return self._complete(params, endpoint, model, cache_key, ttl, max_retries)
+
+        fingerprint = cache_key or make_cache_key(model, messages, max_tokens, temperature)
+        with self._inflight_lock:
+            flight = self._inflight.get(fingerprint)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[fingerprint] = _InFlight()
+
+        if not leader:
+            self._record_coalesced(endpoint)
+            # A deadline-bound caller waits no longer than its own timeout, even if the leader has none
+            if not flight.event.wait(timeout):
+                raise TimeoutError(f"Coalesced LLM call for {endpoint} did not finish within {timeout:.2f}s")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._complete(params, endpoint, model, cache_key, ttl, max_retries)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(fingerprint, None)
+            flight.event.set()
+
+    def _complete(self, params, endpoint, model, cache_key, ttl, max_retries=None) -> str:
+        client = self.client if max_retries is None else self.client.with_options(max_retries=max_retries)
+        start = time.perf_counter()
+        try:
+            response = client.chat.completions.create(**params)
+        except Exception:
+            self._record(endpoint, time.perf_counter() - start, error=True)
+            raise
+        return self._finish(response, endpoint, model, start, cache_key, ttl)
+
+    async def achat(self, messages: List[Dict], max_tokens: Optional[int] = None,
+                    temperature: Optional[float] = None, model: Optional[str] = None,
+                    endpoint: str = "default", extra_headers: Optional[Dict] = None,
+                    timeout: Optional[float] = None, use_cache: bool = True) -> str:
+        """
+        Async variant of chat() for asyncio callers. Identical concurrent calls on the
+        same loop share one request, which is aborted once every waiter has been cancelled.
+        """
+        model = model or self.model
+        cache_key, ttl, cached = self._cache_lookup(model, messages, max_tokens, temperature, endpoint, use_cache)
+        if cached is not None:
+            return cached
+
+        params = self._completion_params(model, messages, max_tokens, temperature, extra_headers, timeout)
+        if not (self.coalesce and use_cache):
+            return await self._acomplete(params, endpoint, model, cache_key, ttl)
+
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, cache_key or make_cache_key(model, messages, max_tokens, temperature))
+        flight = self._async_inflight.get(flight_key)
+        if flight is None:
+            task = loop.create_task(self._acomplete(params, endpoint, model, cache_key, ttl))
+            flight = self._async_inflight[flight_key] = [task, 0]
+            task.add_done_callback(lambda _: self._async_inflight.pop(flight_key, None))
+        else:
+            self._record_coalesced(endpoint)
+
+        task = flight[0]
+        flight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Only abort the shared request when nobody is left waiting for it
+            if flight[1] == 1:
+                task.cancel()
+            raise
+        finally:
+            flight[1] -= 1
+
+    async def _acomplete(self, params, endpoint, model, cache_key, ttl) -> str:
+        start = time.perf_counter()
+        try:
+            response = await self._get_async_client().chat.completions.create(**params)
+        except BaseException:
+            # Includes asyncio.CancelledError so timed-out calls show up as errors
+            self._record(endpoint, time.perf_counter() - start, error=True)
+            raise
+        return self._finish(response, endpoint, model, start, cache_key, ttl)
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        """AsyncOpenAI client bound to the running event loop (httpx async pools cannot cross loops)"""
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            async_client = self._async_clients.get(loop)
+            if async_client is None:
+                async_client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(
+                            max_connections=self.pool_config["max_connections"],
+                            max_keepalive_connections=self.pool_config["max_keepalive_connections"],
+                            keepalive_expiry=self.pool_config["keepalive_expiry"]
+                        ),
+                        timeout=httpx.Timeout(self.pool_config["timeout"], connect=self.pool_config["connect_timeout"])
+                    ),
+                    max_retries=self.pool_config["max_retries"]
+                )
+                self._async_clients[loop] = async_client
+        return async_client
+
+    def _cache_lookup(self, model, messages, max_tokens, temperature, endpoint, use_cache):
+        """Return (cache_key, ttl, cached_content); cache_key is None when the endpoint is not cached"""
+        ttl = self.cache.ttl_for(endpoint) if (self.cache and use_cache) else 0
+        if ttl <= 0:
+            return None, 0, None
+        cache_key = make_cache_key(model, messages, max_tokens, temperature)
+        cached = self.cache.get(cache_key, endpoint)
+        if cached is not None:
+            print(f"[llm_client.py] {endpoint}: served from completion cache")
+        return cache_key, ttl, cached
+
+    def _completion_params(self, model, messages, max_tokens, temperature, extra_headers, timeout) -> Dict:
+        params = {"model": model, "messages": messages}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+        if extra_headers:
+            params["extra_headers"] = extra_headers
+        if timeout is not None:
+            params["timeout"] = timeout
+        return params
+
+    def _finish(self, response, endpoint, model, start, cache_key, ttl) -> str:
+        elapsed = time.perf_counter() - start
+        self._record(endpoint, elapsed)
+        print(f"[llm_client.py] {endpoint}: {model} responded in {elapsed:.2f}s")
+
+        content = response.choices[0].message.content
+        if cache_key is not None:
+            self.cache.set(cache_key, content, ttl, endpoint)
+        return content
+
+    def stream_chat(self, messages: List[Dict], max_tokens: Optional[int] = None,
+                    temperature: Optional[float] = None, model: Optional[str] = None,
+                    endpoint: str = "default") -> Iterator[str]:
+        """
+        Run a streaming chat completion and yield content deltas as they arrive.
+        Streamed completions bypass the completion cache.
+        """
+        model = model or self.model
+        params = {"model": model, "messages": messages, "stream": True}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+
+        start = time.perf_counter()
+        first_token = None
+        failed = True
+        try:
+            stream = self.client.chat.completions.create(**params)
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    yield delta
+            failed = False
+        finally:
+            elapsed = time.perf_counter() - start
+            self._record(endpoint, elapsed, error=failed, first_token=first_token)
+            if first_token is not None:
+                print(f"[llm_client.py] {endpoint}: {model} first token in {first_token:.2f}s, stream finished in {elapsed:.2f}s")
+
+    def _entry(self, endpoint: str) -> Dict:
+        return self._stats.setdefault(endpoint, {
+            "calls": 0,
+            "errors": 0,
+            "coalesced": 0,
+            "total_latency_s": 0.0,
+            "max_latency_s": 0.0,
+            "last_latency_s": 0.0
+        })
+
+    def _record_coalesced(self, endpoint: str):
+        """Count a call that was served by another caller's in-flight completion"""
+        with self._stats_lock:
+            self._entry(endpoint)["coalesced"] += 1
+
+    def _record(self, endpoint: str, elapsed: float, error: bool = False,
+                first_token: Optional[float] = None):
+        with self._stats_lock:
+            entry = self._entry(endpoint)
+            entry["calls"] += 1
+            if error:
+                entry["errors"] += 1
+            entry["total_latency_s"] += elapsed
+            entry["max_latency_s"] = max(entry["max_latency_s"], elapsed)
+            entry["last_latency_s"] = elapsed
+            if first_token is not None:
+                entry["streamed_calls"] = entry.get("streamed_calls", 0) + 1
+                entry["total_first_token_s"] = entry.get("total_first_token_s", 0.0) + first_token
+                entry["last_first_token_s"] = first_token
+
+    def stats(self) -> Dict:
+        """Per-endpoint call counts, coalesced (deduplicated) calls and latency summary"""
+        with self._stats_lock:
+            endpoints = {}
+            for endpoint, entry in self._stats.items():
+                endpoints[endpoint] = {
+                    **{k: round(v, 4) if isinstance(v, float) else v for k, v in entry.items()},
+                    "avg_latency_s": round(entry["total_latency_s"] / entry["calls"], 4) if entry["calls"] else 0.0
+                }
+                if entry.get("streamed_calls"):
+                    endpoints[endpoint]["avg_first_token_s"] = round(
+                        entry["total_first_token_s"] / entry["streamed_calls"], 4
+                    )
+        return {
+            "base_url": self.base_url,
+            "pool": dict(self.pool_config),
+            "coalescing_enabled": self.coalesce,
+            "coalesced_total": sum(entry["coalesced"] for entry in endpoints.values()),
+            "endpoints": endpoints,
+            "cache": self.cache.stats() if self.cache else None
+        }
+
+    def close(self):
+        self.http_client.close()
+
+
+# =========================
+# Process-wide shared client
+# =========================
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLMClient, creating it on first use"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = LLMClient()
+    return _shared_client
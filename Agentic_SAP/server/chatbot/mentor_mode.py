@@ -1,20 +1,20 @@
-import requests
-
 # =========================
 # Imports
 # =========================
 import os
 import threading
 import time
-import requests
+import numpy as np
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders import TextLoader
-from langchain.text_splitter import CharacterTextSplitter
-from openai import OpenAI
+from embedding_client import get_embeddings
+from doc_indexer import DocumentIndexer, IndexVersion, print_report
+from numpy_vector_store import NumpyVectorStore, open_vector_store, vector_store_stats
+from vector_snapshot import SNAPSHOT_NAME
+from session_store import SessionStore
+from llm_client import get_llm_client
+from sse import sse_event, sse_response
 
 # =========================
 # Environment Setup
@@ -28,126 +28,53 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-# Store conversation context (in-memory for demo - use database in production)
-conversation_store = {}
+# Store conversation context (in-memory, bounded LRU with an idle TTL)
+conversation_store = SessionStore.from_env("mentor_conversations")
 
 # =========================
 # Helper Functions
 # =========================
-# Get LLM response from OpenRouter
+# Get LLM response from OpenRouter (shared pooled client)
 def get_llm_response(prompt):
-    api_url = "https://openrouter.ai/api/v1/chat/completions"
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": "meta-llama/llama-3-8b-instruct",
-        "messages": [
-            {"role": "user", "content": prompt}
-        ]
-    }
-    response = requests.post(api_url, headers=headers, json=data)
-    if response.status_code == 200:
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-    else:
-        return f"Error: {response.status_code} {response.text}"
+    try:
+        return get_llm_client().chat(
+            [{"role": "user", "content": prompt}],
+            model="meta-llama/llama-3-8b-instruct",
+            endpoint="mentor_cli"
+        )
+    except Exception as e:
+        return f"Error: {e}"
 
-# Load Chroma vector DB for context retrieval (smart incremental updates)
+# Load Chroma vector DB for context retrieval (indexing is done by doc_indexer.py)
 def load_chroma_vector_db(doc_folder):
-    """Load ChromaDB and check for new documents to add incrementally"""
-    embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    chroma_db_path = os.path.join(os.path.dirname(__file__), "chroma_db")
-    metadata_file = os.path.join(chroma_db_path, "indexed_files.txt")
-    
-    # Get all current .txt files in documents folder
-    current_files = set()
-    for fname in os.listdir(doc_folder):
-        if fname.endswith(".txt"):
-            current_files.add(fname)
-    
-    if not current_files:
-        print("❌ No .txt documents found in documents folder!")
-        raise FileNotFoundError(f"No .txt files found in {doc_folder}")
-    
-    # Check if ChromaDB already exists
-    if os.path.exists(chroma_db_path) and os.listdir(chroma_db_path):
-        print("📂 Loading existing ChromaDB...")
-        try:
-            vectordb = Chroma(persist_directory=chroma_db_path, embedding_function=embedding)
-            
-            # Check what files were previously indexed
-            indexed_files = set()
-            if os.path.exists(metadata_file):
-                with open(metadata_file, 'r') as f:
-                    indexed_files = set(line.strip() for line in f.readlines())
-            
-            # Find new files that need to be added
-            new_files = current_files - indexed_files
-            
-            if new_files:
-                print(f"📄 Found {len(new_files)} new files to add: {list(new_files)}")
-                
-                # Load and add new documents
-                new_docs = []
-                for fname in new_files:
-                    print(f"📖 Adding new document: {fname}")
-                    loader = TextLoader(os.path.join(doc_folder, fname))
-                    new_docs.extend(loader.load())
-                
-                # Split new documents into chunks
-                splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-                new_chunks = splitter.split_documents(new_docs)
-                print(f"🔪 Created {len(new_chunks)} new chunks")
-                
-                # Add new chunks to existing ChromaDB
-                vectordb.add_documents(new_chunks)
-                print(f"➕ Added {len(new_chunks)} new chunks to existing ChromaDB")
-                
-                # Update the indexed files list
-                with open(metadata_file, 'w') as f:
-                    for fname in current_files:
-                        f.write(f"{fname}\n")
-                print("📝 Updated indexed files metadata")
-            else:
-                print("✅ No new files found - ChromaDB is up to date")
-            
-            # Test if it works
-            test_docs = vectordb.similarity_search("test", k=1)
-            print(f"✅ ChromaDB loaded successfully with {len(test_docs)} test results")
-            return vectordb
-            
-        except Exception as e:
-            print(f"⚠️ Error loading existing ChromaDB: {e}")
-            print("🔄 Recreating ChromaDB from all documents...")
-    
-    # Create new ChromaDB from all documents
-    print("📚 Creating ChromaDB from all documents...")
-    docs = []
-    for fname in current_files:
-        print(f"📄 Loading document: {fname}")
-        loader = TextLoader(os.path.join(doc_folder, fname))
-        docs.extend(loader.load())
+    """
+    Open the persisted ChromaDB. Documents are re-indexed incrementally by doc_indexer.py
+    (CLI or DOC_INDEX_WATCH_SECONDS background sync); only a missing index is built here.
+    """
+    indexer = DocumentIndexer(doc_folder, embedding=get_embeddings())
     
-    print(f"📝 Splitting {len(docs)} documents into chunks...")
-    splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks = splitter.split_documents(docs)
-    print(f"🔪 Created {len(chunks)} chunks")
+    if not indexer.has_index():
+        print("📚 No ChromaDB found - building the index once...")
+        print_report(indexer.sync())
+    else:
+        print("📂 Loading existing ChromaDB (run doc_indexer.py to pick up document changes)...")
     
-    # Create ChromaDB with persistence
-    vectordb = Chroma.from_documents(chunks, embedding, persist_directory=chroma_db_path)
-    print("💾 ChromaDB created and persisted successfully")
+    index_version = IndexVersion(indexer.db_path)
+    store = open_vector_store(lambda: indexer.vectordb, indexer.db_path, index_version())
     
-    # Save the list of indexed files
-    os.makedirs(chroma_db_path, exist_ok=True)
-    with open(metadata_file, 'w') as f:
-        for fname in current_files:
-            f.write(f"{fname}\n")
-    print(f"📝 Saved metadata for {len(current_files)} indexed files")
+    watch_interval = float(os.getenv("DOC_INDEX_WATCH_SECONDS", 0))
+    if watch_interval > 0:
+        print(f"👀 Background document sync every {watch_interval}s")
+        if isinstance(store, NumpyVectorStore):
+            # Keep the in-memory matrix in step with the persisted index
+            def reload_store():
+                snapshot_path = os.path.join(indexer.db_path, SNAPSHOT_NAME)
+                if not store.load_snapshot(snapshot_path, index_version()):
+                    store.refresh_from_chroma(indexer.vectordb)
+            indexer.on_change = reload_store
+        indexer.start_background(watch_interval)
     
-    return vectordb
+    return store
 
 # =========================
 # Vector DB & LLM Setup
@@ -155,49 +82,49 @@ def load_chroma_vector_db(doc_folder):
 doc_folder = os.path.join(os.path.dirname(__file__), "documents")
 vector_index = load_chroma_vector_db(doc_folder)
 
-# LLM setup for OpenRouter/Ollama-compatible API
-client = OpenAI(
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    base_url=os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
-)
+# LLM setup for OpenRouter/Ollama-compatible API (pooled, shared across requests)
+llm = get_llm_client()
 
-# =========================
-# Flask Routes
-# =========================
-@app.route('/api/mentor-suggest', methods=['POST'])
-def mentor_suggest():
-    import time
-    print("[mentor_mode.py] --- Mentor Suggest API called ---")
-    start_time = time.time()
-    data = request.json
-    print(f"[mentor_mode.py] Raw POST data: {data}")
-    message = data.get('message', '')
-    user_id = data.get('user_id', 'default_user')  # Use session ID in production
-    print(f"[mentor_mode.py] Extracted message: {message}")
-    
+# Weight of a message relative to the one after it when composing the retrieval vector
+CONTEXT_DECAY = float(os.getenv("MENTOR_CONTEXT_DECAY", 0.7))
+
+def _conversation_vector(embeddings):
+    """Recency-weighted mean of the per-message embeddings (the newest message has weight 1), unit length"""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+    weights = CONTEXT_DECAY ** np.arange(len(vectors) - 1, -1, -1, dtype=np.float32)
+    combined = weights @ vectors
+    return (combined / max(np.linalg.norm(combined), 1e-12)).tolist()
+
+# Build the mentor prompt for this turn (shared by the JSON and streaming endpoints)
+def _prepare_mentor_prompt(user_id, message):
+    """Record the message in the conversation and return (prompt, docs, clarifications_used, clarification_limit)"""
     # Get or create conversation history for this user
-    if user_id not in conversation_store:
-        conversation_store[user_id] = {'messages': [], 'clarification_count': 0}
+    conversation = conversation_store.get(user_id)
+    if conversation is None:
+        conversation = conversation_store[user_id] = {'messages': [], 'embeddings': [], 'clarification_count': 0}
     
-    # Add current message to conversation history (keep last 5)
-    conversation_store[user_id]['messages'].append(message)
-    if len(conversation_store[user_id]['messages']) > 5:
-        conversation_store[user_id]['messages'] = conversation_store[user_id]['messages'][-5:]
+    # Add current message to conversation history (keep last 5); only the new message is embedded
+    conversation['messages'].append(message)
+    conversation['embeddings'].append(np.asarray(get_embeddings().embed_query(message), dtype=np.float32))
+    if len(conversation['messages']) > 5:
+        conversation['messages'] = conversation['messages'][-5:]
+        conversation['embeddings'] = conversation['embeddings'][-5:]
     
     # Combine all previous inputs to understand full context
-    full_context = " | ".join(conversation_store[user_id]['messages'])
+    full_context = " | ".join(conversation['messages'])
     print(f"[mentor_mode.py] Full conversation context: {full_context}")
-    print(f"[mentor_mode.py] Clarification count: {conversation_store[user_id]['clarification_count']}")
+    print(f"[mentor_mode.py] Clarification count: {conversation['clarification_count']}")
     
     print(f"[mentor_mode.py] Running vector search...")
-    docs = vector_index.similarity_search(full_context, k=3)
+    docs = vector_index.similarity_search_by_vector(_conversation_vector(conversation['embeddings']), k=3)
     print(f"[mentor_mode.py] Vector search returned {len(docs)} docs.")
     context = "\n".join([doc.page_content for doc in docs])
     print(f"[mentor_mode.py] Context for prompt: {context}")
     
     # Enhanced prompt with clarification limit and sample analysis
     clarification_limit = 3
-    clarifications_used = conversation_store[user_id]['clarification_count']
+    clarifications_used = conversation['clarification_count']
     
     # Check if user shared a sample/draft to review
     sample_indicators = ["here's what i plan to", "here's my draft", "here's the message", "this is what i wrote", "sample:", "draft:", "what do you think of", "how can i improve", "feedback on", "review this"]
@@ -269,27 +196,86 @@ def mentor_suggest():
                 "- If YES: Ask specific, helpful questions.\n"
                 "- If NO: Provide 3 gentle, actionable suggestions.\n"
             )
+    return prompt, docs, clarifications_used, clarification_limit
+
+# Count clarifying questions so the mentor stops asking after the limit
+def _track_clarification(user_id, suggestions, clarifications_used, clarification_limit):
+    if clarifications_used < clarification_limit and ("?" in suggestions or "clarify" in suggestions.lower() or "tell me" in suggestions.lower()):
+        # The session may have been reset or evicted while the answer was generated (or streamed)
+        conversation = conversation_store.get(user_id)
+        if conversation is None:
+            return
+        conversation['clarification_count'] += 1
+        print(f"[mentor_mode.py] Clarification question asked. Count: {conversation['clarification_count']}")
+
+# =========================
+# Flask Routes
+# =========================
+@app.route('/api/mentor-suggest', methods=['POST'])
+def mentor_suggest():
+    import time
+    print("[mentor_mode.py] --- Mentor Suggest API called ---")
+    start_time = time.time()
+    data = request.json
+    print(f"[mentor_mode.py] Raw POST data: {data}")
+    message = data.get('message', '')
+    user_id = data.get('user_id', 'default_user')  # Use session ID in production
+    print(f"[mentor_mode.py] Extracted message: {message}")
+    
+    prompt, docs, clarifications_used, clarification_limit = _prepare_mentor_prompt(user_id, message)
+    
     print(f"[mentor_mode.py] Prompt sent to LLM:\n{prompt}")
     print(f"[mentor_mode.py] Waiting for LLM response...")
     llm_start = time.time()
-    response = client.chat.completions.create(
-        model=os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct"),
-        messages=[{"role": "system", "content": prompt}],
-        max_tokens=300  # Reduced to prevent cutoffs
+    suggestions = llm.chat(
+        [{"role": "system", "content": prompt}],
+        max_tokens=300,  # Reduced to prevent cutoffs
+        endpoint="mentor_suggest"
     )
     llm_end = time.time()
-    suggestions = response.choices[0].message.content
     
     # Check if this was a clarifying question (increment counter)
-    if clarifications_used < clarification_limit and ("?" in suggestions or "clarify" in suggestions.lower() or "tell me" in suggestions.lower()):
-        conversation_store[user_id]['clarification_count'] += 1
-        print(f"[mentor_mode.py] Clarification question asked. Count: {conversation_store[user_id]['clarification_count']}")
+    _track_clarification(user_id, suggestions, clarifications_used, clarification_limit)
     
     print(f"[mentor_mode.py] LLM response: {suggestions}")
     print(f"[mentor_mode.py] LLM response time: {llm_end - llm_start:.2f}s")
     print(f"[mentor_mode.py] --- Mentor Suggest API finished in {time.time() - start_time:.2f}s ---\n")
     return jsonify({"suggestions": suggestions})
 
+@app.route('/api/mentor-suggest/stream', methods=['POST'])
+def mentor_suggest_stream():
+    """Streaming variant of /api/mentor-suggest: tokens as SSE, metadata in a final 'done' event"""
+    print("[mentor_mode.py] --- Mentor Suggest Stream API called ---")
+    start_time = time.time()
+    data = request.json
+    message = data.get('message', '')
+    user_id = data.get('user_id', 'default_user')
+    
+    prompt, docs, clarifications_used, clarification_limit = _prepare_mentor_prompt(user_id, message)
+    sources = [f"Document: {doc.metadata.get('source', 'Mentor Guidelines')}" for doc in docs]
+    
+    def generate():
+        parts = []
+        try:
+            for token in llm.stream_chat(
+                [{"role": "system", "content": prompt}],
+                max_tokens=300,
+                endpoint="mentor_suggest_stream"
+            ):
+                parts.append(token)
+                yield sse_event("token", {"token": token})
+        except Exception as e:
+            print(f"[mentor_mode.py] Error while streaming: {e}")
+            yield sse_event("error", {"error": "Failed to get mentor suggestion from AI server."})
+            return
+        
+        suggestions = "".join(parts)
+        _track_clarification(user_id, suggestions, clarifications_used, clarification_limit)
+        print(f"[mentor_mode.py] --- Mentor Suggest Stream API finished in {time.time() - start_time:.2f}s ---\n")
+        yield sse_event("done", {"suggestions": suggestions, "sources": sources})
+    
+    return sse_response(generate())
+
 @app.route('/api/mentor-reset', methods=['POST'])
 def mentor_reset():
     """Reset conversation history for a specific user"""
@@ -298,14 +284,15 @@ def mentor_reset():
     
     # Clear conversation history for this user
     if user_id in conversation_store:
-        conversation_store[user_id] = {'messages': [], 'clarification_count': 0}
+        conversation_store[user_id] = {'messages': [], 'embeddings': [], 'clarification_count': 0}
         print(f"[mentor_mode.py] Conversation reset for user: {user_id}")
     
     return jsonify({"status": "reset_complete", "user_id": user_id})
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({"status": "OK"})
+    return jsonify({"status": "OK", "llm": llm.stats(), "query_embedding_cache": get_embeddings().stats(),
+                    "vector_store": vector_store_stats(vector_index), "sessions": conversation_store.stats()})
 @app.route('/api/summarize-feedback', methods=['POST'])
 def summarize_feedback():
     """
@@ -336,10 +323,9 @@ def summarize_feedback():
         print(f"[mentor_mode.py] Sending summarization request to OpenRouter...")
         llm_start = time.time()
         
-        # Use the existing OpenAI client setup
-        response = client.chat.completions.create(
-            model=os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct"),
-            messages=[
+        # Use the shared pooled LLM client
+        summary = llm.chat(
+            [
                 {
                     "role": "system",
                     "content": "You are a helpful assistant that summarizes performance feedback in a constructive, professional manner. Focus on the key points and provide actionable insights. Keep it concise and professional (around 150-200 words)."
@@ -350,11 +336,11 @@ def summarize_feedback():
                 }
             ],
             max_tokens=500,
-            temperature=0.7
+            temperature=0.7,
+            endpoint="summarize_feedback"
         )
         
         llm_end = time.time()
-        summary = response.choices[0].message.content
         
         print(f"[mentor_mode.py] Summary generated successfully")
         print(f"[mentor_mode.py] LLM response time: {llm_end - llm_start:.2f}s")
@@ -0,0 +1,104 @@
+"""
+Near-Duplicate Detection - MinHash signatures with LSH banding for document chunks
+Used by the document indexer to skip chunks that repeat content already indexed
+(overlapping guides, splitter overlap) before they are embedded
+"""
+
+import os
+import re
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MINHASH_PRIME = 4294967311  # Smallest prime above 2^32
+SIGNATURES_NAME = "minhash_signatures.npz"
+
+
+class MinHasher:
+    """MinHash over word shingles; estimated Jaccard = fraction of equal signature slots"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # a, b < 2^32 and shingle hashes < 2^32 keep a * h + b below 2^64
+        self.a = rng.integers(1, 2 ** 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 32, num_perm, dtype=np.uint64)
+
+    @property
+    def params(self) -> List[int]:
+        return [self.num_perm, self.shingle_size, self.seed]
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = re.findall(r"\w+", text.lower())
+        k = self.shingle_size
+        grams = {" ".join(words[i:i + k]) for i in range(max(len(words) - k + 1, 1))}
+        return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self.shingles(text)[:, None]
+        return ((hashes * self.a + self.b) % MINHASH_PRIME).min(axis=0)
+
+    @staticmethod
+    def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        return float(np.mean(sig_a == sig_b))
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures. find_or_add returns the key of an indexed chunk
+    whose estimated similarity reaches the threshold, or indexes the new chunk and returns None.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._buckets = [dict() for _ in range(bands)]
+        self._signatures = {}
+
+    def find_or_add(self, key: str, signature: np.ndarray) -> Optional[str]:
+        band_keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(len(self._buckets))]
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, band_keys):
+            candidates.update(buckets.get(band_key, ()))
+
+        best_key, best_similarity = None, 0.0
+        for candidate in candidates:
+            similarity = MinHasher.similarity(signature, self._signatures[candidate])
+            if similarity > best_similarity:
+                best_key, best_similarity = candidate, similarity
+        if best_key is not None and best_similarity >= self.threshold:
+            return best_key
+
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, []).append(key)
+        return None
+
+
+# =========================
+# Persistence
+# =========================
+def save_signatures(path: str, hasher: MinHasher, signatures: Dict[str, np.ndarray]):
+    ids = list(signatures)
+    matrix = np.vstack([signatures[chunk_id] for chunk_id in ids]) if ids else np.zeros((0, hasher.num_perm), np.uint64)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, ids=np.array(ids, dtype=str), signatures=matrix, params=np.array(hasher.params))
+    os.replace(tmp_path, path)
+
+
+def load_signatures(path: str, hasher: MinHasher) -> Dict[str, np.ndarray]:
+    """Signatures saved by a previous sync; empty if missing or made with other MinHash parameters"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if data["params"].tolist() != hasher.params:
+                return {}
+            return dict(zip(data["ids"].tolist(), data["signatures"]))
+    except (OSError, ValueError, KeyError):
+        return {}
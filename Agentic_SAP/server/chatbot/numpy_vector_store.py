@@ -0,0 +1,389 @@
+"""
+NumPy Vector Store - exact in-memory search for small corpora
+Holds L2-normalized embeddings in one contiguous matrix (float32, or float16 / int8 to save
+memory) and answers top-k with a single matrix-vector product, with no database I/O per query
+
+Usage:
+    python numpy_vector_store.py --report    # recall vs. size of float16/int8 against float32
+"""
+
+import os
+import sys
+import argparse
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from vector_snapshot import SNAPSHOT_NAME, read_snapshot
+
+PRECISIONS = ("float32", "float16", "int8")
+SCORE_BLOCK_ROWS = 4096  # Rows dequantized at a time, bounding the float32 scratch memory
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+
+def _quantize(vectors: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Encode normalized float32 rows for storage; int8 rows carry a per-vector scale"""
+    if precision == "float16":
+        return np.ascontiguousarray(vectors, dtype=np.float16), None
+    if precision == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return np.ascontiguousarray(codes), scales.astype(np.float32)
+    return vectors, None
+
+
+def _similarities(matrix: np.ndarray, scales: Optional[np.ndarray], queries: np.ndarray) -> np.ndarray:
+    """Cosine similarities (rows x queries) of normalized queries against the stored rows"""
+    if matrix.dtype == np.float32:
+        return matrix @ queries.T
+    similarities = np.empty((matrix.shape[0], queries.shape[0]), dtype=np.float32)
+    for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+        block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+        similarities[start:start + SCORE_BLOCK_ROWS] = block @ queries.T
+    if scales is not None:
+        similarities *= scales[:, None]
+    return similarities
+
+
+def _rank(similarities: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(similarities))
+    if k <= 0:
+        return np.arange(0)
+    if k < len(similarities):
+        candidates = np.argpartition(-similarities, k - 1)[:k]
+    else:
+        candidates = np.arange(len(similarities))
+    return candidates[np.argsort(-similarities[candidates], kind="stable")]
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Drop-in replacement for the Chroma calls the chatbot services make
+    (similarity_search, similarity_search_with_score, add_texts, delete).
+
+    Scores follow Chroma's default l2 space: squared L2 distance between unit vectors,
+    i.e. 2 - 2 * cosine, so lower is closer and existing thresholds keep their meaning.
+
+    precision="float16" halves the matrix and "int8" (with a float32 scale per vector) quarters it;
+    rows are dequantized block by block while scoring.
+    """
+
+    def __init__(self, embedding: Embeddings, precision: str = "float32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+        self.embedding = embedding
+        self.precision = precision
+        self._lock = threading.Lock()
+        # (matrix, scales, ids, documents) swapped as one tuple so readers never see a half-applied update
+        self._data = self._empty()
+        self.snapshot_version = None
+
+    @staticmethod
+    def _empty():
+        return (np.zeros((0, 0), dtype=np.float32), None, [], [])
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    # =========================
+    # Construction
+    # =========================
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, precision: str = "float32", **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding, precision=precision)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    @classmethod
+    def from_chroma(cls, chroma_db, precision: str = "float32") -> "NumpyVectorStore":
+        """Load the vectors already persisted in a Chroma collection (nothing is re-embedded)"""
+        store = cls(chroma_db.embeddings, precision=precision)
+        store.refresh_from_chroma(chroma_db)
+        return store
+
+    @classmethod
+    def from_snapshot(cls, path: str, embedding: Embeddings, expected_version: Optional[str] = None,
+                      precision: str = "float32") -> Optional["NumpyVectorStore"]:
+        """
+        Open a vector snapshot with its matrix memory-mapped (float32) or quantized into memory.
+        Returns None when the file is missing, unreadable or not built from expected_version.
+        """
+        store = cls(embedding, precision=precision)
+        return store if store.load_snapshot(path, expected_version) else None
+
+    def load_snapshot(self, path: str, expected_version: Optional[str] = None) -> bool:
+        try:
+            header, matrix = read_snapshot(path)
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"⚠️ Could not read vector snapshot {path}: {e}")
+            return False
+        if expected_version is not None and header.get("index_version") != expected_version:
+            return False
+        documents = [Document(page_content=text, metadata=metadata)
+                     for text, metadata in zip(header["texts"], header["metadatas"])]
+        scales = None
+        if self.precision != "float32" and matrix.size:
+            matrix, scales = _quantize(np.asarray(matrix), self.precision)
+        with self._lock:
+            self._data = (matrix, scales, header["ids"], documents)
+        self.snapshot_version = header.get("content_hash")
+        return True
+
+    def refresh_from_chroma(self, chroma_db):
+        data = chroma_db.get(include=["embeddings", "documents", "metadatas"])
+        embeddings = data.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            with self._lock:
+                self._data = self._empty()
+            return
+        documents = [
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])
+        ]
+        matrix, scales = _quantize(_normalize(np.asarray(embeddings, dtype=np.float32)), self.precision)
+        with self._lock:
+            self._data = (matrix, scales, list(data["ids"]), documents)
+
+    # =========================
+    # Writes
+    # =========================
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [f"doc-{os.urandom(8).hex()}" for _ in texts]
+        vectors, new_scales = _quantize(
+            _normalize(np.asarray(self.embedding.embed_documents(texts), dtype=np.float32)), self.precision
+        )
+        new_documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+
+        with self._lock:
+            matrix, scales, current_ids, documents = self._data
+            # Re-adding an id replaces it, matching upsert semantics
+            replaced = set(ids)
+            keep = [i for i, doc_id in enumerate(current_ids) if doc_id not in replaced]
+            if matrix.size:
+                matrix = np.vstack([matrix[keep], vectors])
+                if new_scales is not None:
+                    new_scales = np.concatenate([scales[keep], new_scales])
+            else:
+                matrix = vectors
+            self._data = (
+                np.ascontiguousarray(matrix),
+                new_scales,
+                [current_ids[i] for i in keep] + list(ids),
+                [documents[i] for i in keep] + new_documents
+            )
+        return list(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        remove = set(ids)
+        with self._lock:
+            matrix, scales, current_ids, documents = self._data
+            keep = [i for i, doc_id in enumerate(current_ids) if doc_id not in remove]
+            self._data = (
+                np.ascontiguousarray(matrix[keep]) if matrix.size else matrix,
+                scales[keep] if scales is not None else None,
+                [current_ids[i] for i in keep],
+                [documents[i] for i in keep]
+            )
+        return True
+
+    # =========================
+    # Search
+    # =========================
+    def _top_k(self, query_vector: np.ndarray, k: int) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vectors([query_vector], [k])[0]
+
+    def similarity_search_by_vectors(self, embeddings: List[List[float]], ks: List[int]) -> List[List[Tuple[Document, float]]]:
+        """Top-k for several queries with one matrix-matrix product"""
+        matrix, scales, _, documents = self._data
+        if not documents or not len(embeddings):
+            return [[] for _ in embeddings]
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+        similarities = _similarities(matrix, scales, queries)  # (documents, queries)
+        results = []
+        for column, k in enumerate(ks):
+            scores = similarities[:, column]
+            results.append([(documents[i], float(2.0 - 2.0 * scores[i])) for i in _rank(scores, k)])
+        return results
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self._top_k(np.asarray(embedding), k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self._top_k(np.asarray(self.embedding.embed_query(query)), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def get(self, include: Optional[List[str]] = None, **kwargs: Any) -> Dict:
+        """Chroma-style dump of the store, so index builders can read from either backend"""
+        include = include or ["documents", "metadatas"]
+        matrix, scales, ids, documents = self._data
+        data = {"ids": list(ids)}
+        if "documents" in include:
+            data["documents"] = [doc.page_content for doc in documents]
+        if "metadatas" in include:
+            data["metadatas"] = [doc.metadata for doc in documents]
+        if "embeddings" in include:
+            embeddings = np.asarray(matrix, dtype=np.float32)
+            data["embeddings"] = embeddings * scales[:, None] if scales is not None else embeddings
+        return data
+
+    def _select_relevance_score_fn(self):
+        # Squared L2 between unit vectors lies in [0, 4]
+        return lambda distance: 1.0 - distance / 4.0
+
+    def stats(self) -> Dict:
+        matrix, scales, ids, _ = self._data
+        return {"backend": "numpy", "precision": self.precision, "vectors": len(ids),
+                "dimensions": int(matrix.shape[1]) if matrix.size else 0,
+                "matrix_bytes": int(matrix.nbytes + (scales.nbytes if scales is not None else 0)),
+                "memory_mapped": isinstance(matrix, np.memmap),
+                "snapshot_version": self.snapshot_version[:12] if self.snapshot_version else None}
+
+
+def select_vector_store(chroma_db):
+    """
+    Return the store a service should query: the Chroma collection itself, or an in-memory
+    NumpyVectorStore snapshot of it when VECTOR_STORE_BACKEND=numpy
+    """
+    backend = os.getenv("VECTOR_STORE_BACKEND", "chroma").lower()
+    if backend == "numpy":
+        store = NumpyVectorStore.from_chroma(chroma_db, precision=os.getenv("VECTOR_STORE_PRECISION", "float32").lower())
+        stats = store.stats()
+        print(f"⚡ Using in-memory NumPy vector index ({stats['vectors']} vectors, {stats['precision']}, "
+              f"{stats['matrix_bytes'] / 1024:.0f} KiB)")
+        return store
+    return chroma_db
+
+
+def open_vector_store(open_chroma, db_path: str, expected_version: Optional[str] = None):
+    """
+    Open the index a service should query. VECTOR_STORE_BACKEND=snapshot maps the snapshot
+    file in db_path without touching Chroma; open_chroma is only called when the snapshot is
+    missing or was not built from expected_version (or for the other backends).
+    """
+    if os.getenv("VECTOR_STORE_BACKEND", "chroma").lower() != "snapshot":
+        return select_vector_store(open_chroma())
+
+    from embedding_client import get_embeddings
+    precision = os.getenv("VECTOR_STORE_PRECISION", "float32").lower()
+    path = os.path.join(db_path, SNAPSHOT_NAME)
+    store = NumpyVectorStore.from_snapshot(path, get_embeddings(), expected_version, precision=precision)
+    if store is not None:
+        print(f"🗺️ Mapped vector snapshot {path} ({store.stats()['vectors']} vectors, version {store.snapshot_version[:12]})")
+        return store
+    print(f"⚠️ Vector snapshot {path} missing or stale - loading from Chroma instead")
+    return NumpyVectorStore.from_chroma(open_chroma(), precision=precision)
+
+
+def batch_similarity_search(store, embeddings: List[List[float]], ks: List[int]) -> List[List[Tuple[Document, float]]]:
+    """
+    Search several query vectors at once against either backend; Chroma receives them
+    as a single multi-query call on the underlying collection
+    """
+    if isinstance(store, NumpyVectorStore):
+        return store.similarity_search_by_vectors(embeddings, ks)
+    if not embeddings:
+        return []
+    collection = getattr(store, "_collection", None)
+    if collection is None:
+        return [store.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
+                for embedding, k in zip(embeddings, ks)]
+
+    n_results = min(max(ks), collection.count())
+    if n_results <= 0:
+        return [[] for _ in embeddings]
+    response = collection.query(query_embeddings=embeddings, n_results=n_results,
+                                include=["documents", "metadatas", "distances"])
+    results = []
+    for i, k in enumerate(ks):
+        hits = zip(response["documents"][i], response["metadatas"][i], response["distances"][i])
+        results.append([
+            (Document(page_content=text or "", metadata=metadata or {}), float(distance))
+            for text, metadata, distance in list(hits)[:k]
+        ])
+    return results
+
+
+def vector_store_stats(store) -> Dict:
+    if isinstance(store, NumpyVectorStore):
+        return store.stats()
+    return {"backend": "chroma"}
+
+
+# =========================
+# Quantization Report
+# =========================
+def quantization_report(vectors: np.ndarray, k: int = 5, n_queries: int = 200, seed: int = 0) -> List[Dict]:
+    """
+    Recall@k and matrix size of each precision against exact float32 search.
+    Queries are stored vectors searched against the rest of the collection (their own row excluded).
+    """
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+    queries = vectors[query_rows]
+    k = min(k, len(vectors) - 1)
+
+    def top_k_sets(matrix, scales):
+        similarities = _similarities(matrix, scales, queries)
+        similarities[query_rows, np.arange(len(query_rows))] = -np.inf
+        return [set(_rank(similarities[:, column], k).tolist()) for column in range(len(query_rows))]
+
+    exact = top_k_sets(vectors, None)
+    rows = []
+    for precision in PRECISIONS:
+        matrix, scales = _quantize(vectors, precision)
+        found = top_k_sets(matrix, scales)
+        recall = np.mean([len(a & b) / k for a, b in zip(exact, found)]) if k > 0 else 1.0
+        size = matrix.nbytes + (scales.nbytes if scales is not None else 0)
+        rows.append({"precision": precision, "bytes": int(size), "ratio": round(vectors.nbytes / size, 2),
+                     f"recall@{k}": round(float(recall), 4)})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare quantized vector storage against float32")
+    parser.add_argument("--report", action="store_true", help="Print recall vs. size for each precision")
+    parser.add_argument("--db", action="append", help="Chroma persist directory (repeatable)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if not args.report:
+        parser.print_help()
+        sys.exit(0)
+
+    from langchain_community.vectorstores import Chroma
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for db_path in args.db or [os.path.join(base_dir, "chroma_db"), os.path.join(base_dir, "course_chroma_db")]:
+        if not os.path.isdir(db_path):
+            print(f"⚠️ Skipping {db_path}: not found")
+            continue
+        embeddings = Chroma(persist_directory=db_path).get(include=["embeddings"])["embeddings"]
+        if embeddings is None or len(embeddings) < 2:
+            print(f"⚠️ Skipping {db_path}: fewer than 2 vectors")
+            continue
+        print(f"📊 {db_path} ({len(embeddings)} vectors)")
+        for row in quantization_report(np.asarray(embeddings), k=args.k, n_queries=args.queries):
+            print("   " + "  ".join(f"{key}={value}" for key, value in row.items()))
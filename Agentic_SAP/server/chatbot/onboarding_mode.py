@@ -8,15 +8,24 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
 import logging
+import threading
 from datetime import datetime
-import requests
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from embedding_client import get_embeddings
+from numpy_vector_store import batch_similarity_search, open_vector_store, vector_store_stats
+from bm25_index import BM25_INDEX_NAME, load_bm25_index, reciprocal_rank_fusion, tokenize
+from sentence_index import SENTENCE_INDEX_NAME, load_sentence_index, normalize_query
+from semantic_cache import SemanticAnswerCache
+from doc_indexer import IndexVersion
+from keyword_classifier import RELEVANT_BUCKETS, onboarding_keywords, suggestion_topic
+from topic_gate import build_topic_gate
+from session_store import SessionStore
 from langchain_community.document_loaders import TextLoader
 from langchain.text_splitter import CharacterTextSplitter
-from openai import OpenAI
+from llm_client import get_llm_client
+from sse import sse_event, sse_response
 
 # Load environment variables
 load_dotenv()
@@ -29,38 +38,30 @@ app = Flask(__name__)
 CORS(app)
 
 # Conversation storage for context management
-conversation_store = {}
+conversation_store = SessionStore.from_env("onboarding_conversations")
+
+CHROMA_DB_PATH = os.path.join(os.path.dirname(__file__), "chroma_db")
 
 # =========================
 # Helper Functions (same as mentor_mode.py)
 # =========================
 
-# Get LLM response from OpenRouter
+# Get LLM response from OpenRouter (shared pooled client)
 def get_llm_response(prompt):
-    api_url = "https://openrouter.ai/api/v1/chat/completions"
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": "meta-llama/llama-3-8b-instruct",
-        "messages": [
-            {"role": "user", "content": prompt}
-        ]
-    }
-    response = requests.post(api_url, headers=headers, json=data)
-    if response.status_code == 200:
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-    else:
-        return f"Error: {response.status_code} {response.text}"
+    try:
+        return get_llm_client().chat(
+            [{"role": "user", "content": prompt}],
+            model="meta-llama/llama-3-8b-instruct",
+            endpoint="onboarding_fallback"
+        )
+    except Exception as e:
+        return f"Error: {e}"
 
 # Load existing Chroma vector DB (onboarding mode just connects to existing DB)
 def load_chroma_vector_db(doc_folder):
     """Load existing ChromaDB created by mentor_mode.py"""
-    embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    chroma_db_path = os.path.join(os.path.dirname(__file__), "chroma_db")
+    embedding = get_embeddings()
+    chroma_db_path = CHROMA_DB_PATH
     
     # Check if ChromaDB exists (should be created by mentor_mode.py)
     if os.path.exists(chroma_db_path) and os.listdir(chroma_db_path):
@@ -82,152 +83,334 @@ def load_chroma_vector_db(doc_folder):
 
 def _is_work_relevant(user_message: str) -> bool:
     """Check if the user message is relevant to SAP/work topics"""
-    user_lower = user_message.lower()
-    
-    # SAP-specific keywords (high priority)
-    sap_keywords = [
-        'sap', 's/4hana', 's4hana', 'erp', 'btp', 'business technology platform',
-        'hana', 'fiori', 'ariba', 'concur', 'successfactors', 'fieldglass',
-        'analytics cloud', 'data intelligence', 'integration suite', 'commerce cloud',
-        'sales cloud', 'service cloud', 'marketing cloud', 'customer experience',
-        'cx', 'crm', 'customer relationship management', 'leonardo', 'ai core',
-        'launchpad', 'workflow', 'process orchestration', 'master data governance',
-        'data warehouse cloud', 'datasphere', 'event mesh', 'api management'
-    ]
-    
-    # Work-related keywords (medium priority)
-    work_keywords = [
-        'team', 'work', 'job', 'career', 'onboarding', 'training', 'project', 
-        'technology', 'tool', 'platform', 'data science', 'machine learning', 'ai',
-        'department', 'manager', 'colleague', 'meeting', 'process', 'policy',
-        'skill', 'development', 'learning', 'certification', 'performance', 'review',
-        'office', 'remote', 'schedule', 'deadline', 'goal', 'objective', 'mentor',
-        'mentoring', 'feedback', 'collaboration', 'communication', 'leadership',
-        'python', 'sql', 'analytics', 'cloud', 'database', 'software', 'programming',
-        'code', 'development', 'engineering', 'research', 'innovation', 'product',
-        'customer', 'business', 'strategy', 'planning', 'reporting', 'analysis',
-        'enterprise', 'solution', 'implementation', 'integration', 'architecture'
-    ]
-    
-    # Business and enterprise keywords
-    business_keywords = [
-        'supply chain', 'procurement', 'finance', 'accounting', 'hr', 'human resources',
-        'sales', 'marketing', 'service', 'operations', 'manufacturing', 'retail',
-        'logistics', 'warehouse', 'inventory', 'planning', 'forecasting', 'budgeting',
-        'compliance', 'governance', 'security', 'privacy', 'gdpr', 'audit'
-    ]
-    
-    # Non-work keywords that indicate personal/irrelevant topics
-    irrelevant_keywords = [
-        'personal life', 'family', 'relationship', 'dating', 'marriage', 'divorce',
-        'religion', 'politics', 'weather', 'sports', 'entertainment', 'movie', 'music',
-        'food', 'cooking', 'recipe', 'vacation', 'travel', 'hobby', 'gaming', 'tv show',
-        'celebrity', 'gossip', 'health', 'medical', 'doctor', 'medicine', 'fitness',
-        'diet', 'weight', 'appearance', 'fashion', 'shopping', 'personal finance',
-        'investment', 'stock', 'cryptocurrency', 'bitcoin', 'lottery', 'gambling'
-    ]
+    buckets = onboarding_keywords.classify(user_message)
     
     # Check for irrelevant topics first (strong negative signal)
-    if any(keyword in user_lower for keyword in irrelevant_keywords):
+    if "irrelevant" in buckets:
         return False
     
-    # Check for SAP-specific topics (highest priority)
-    if any(keyword in user_lower for keyword in sap_keywords):
-        return True
-    
-    # Check for work-related topics (medium priority)
-    if any(keyword in user_lower for keyword in work_keywords):
-        return True
-    
-    # Check for business keywords (medium priority)
-    if any(keyword in user_lower for keyword in business_keywords):
-        return True
-    
-    # If it's a general question that could be work-related, allow it
-    question_words = ['what', 'how', 'when', 'where', 'who', 'why', 'can', 'should', 'do', 'does', 'tell', 'explain', 'describe']
-    if any(user_lower.startswith(qw) for qw in question_words) and len(user_message.split()) <= 25:
+    # SAP-specific, work-related and business topics are relevant
+    if buckets & RELEVANT_BUCKETS:
         return True
     
-    # Default to allowing if uncertain (benefit of the doubt for work context)
+    # Default to allowing if uncertain (the topic gate decides from the embedding)
     return True
 
+def _passes_topic_gate(user_message: str, query_embedding) -> bool:
+    """Embedding check for messages the keyword lists could not place"""
+    if topic_gate is None or onboarding_keywords.classify(user_message) & RELEVANT_BUCKETS:
+        return True
+    verdict = topic_gate.check(query_embedding)
+    if not verdict['on_topic']:
+        logger.info(f"🚧 Topic gate rejected question (closest: {verdict['category']}, lead {verdict['off_topic_lead']})")
+    return verdict['on_topic']
+
+# Follow-up suggestions per topic of keyword_classifier.SUGGESTION_TOPICS
+SUGGESTIONS_BY_TOPIC = {
+    # SAP Product-specific suggestions
+    "btp": [
+        "What services are available in SAP BTP?",
+        "How do I develop applications on BTP?",
+        "What is SAP HANA Cloud and how is it used?"
+    ],
+    "s4hana": [
+        "What modules are available in S/4HANA?",
+        "How does real-time analytics work in S/4HANA?",
+        "What's the difference between ERP and S/4HANA?"
+    ],
+    "cx": [
+        "What is SAP Customer Experience suite?",
+        "How do Sales Cloud and Service Cloud work together?",
+        "What data science applications exist in CX?"
+    ],
+    "analytics": [
+        "What analytics tools does SAP provide?",
+        "How is machine learning integrated in SAP products?",
+        "What is SAP Analytics Cloud used for?"
+    ],
+    "onboarding": [
+        "What SAP products should I learn first?",
+        "What training is available for new employees?",
+        "Who will be my mentor during onboarding?"
+    ],
+    "tools": [
+        "What SAP development tools should I use?",
+        "How do I access SAP systems and platforms?",
+        "What's the architecture of SAP solutions?"
+    ],
+    "career": [
+        "What career paths exist in SAP data science?",
+        "What SAP certifications should I pursue?",
+        "How can I specialize in specific SAP products?"
+    ],
+    "integration": [
+        "How do SAP products integrate with each other?",
+        "What integration technologies does SAP use?",
+        "How do I connect external systems to SAP?"
+    ]
+}
+
+# General SAP-focused suggestions
+DEFAULT_SUGGESTIONS = [
+    "What are the main SAP products I should know?",
+    "How does SAP support digital transformation?",
+    "What makes SAP's approach to enterprise software unique?",
+    "How do I get started with SAP development?"
+]
+
 def _generate_suggestions(user_message: str, docs) -> List[str]:
     """Generate follow-up suggestions based on user message and context"""
-    user_lower = user_message.lower()
-    suggestions = []
-    
-    # SAP Product-specific suggestions
-    if any(keyword in user_lower for keyword in ['btp', 'business technology platform']):
-        suggestions = [
-            "What services are available in SAP BTP?",
-            "How do I develop applications on BTP?",
-            "What is SAP HANA Cloud and how is it used?"
-        ]
-    elif any(keyword in user_lower for keyword in ['erp', 's/4hana', 's4hana']):
-        suggestions = [
-            "What modules are available in S/4HANA?",
-            "How does real-time analytics work in S/4HANA?",
-            "What's the difference between ERP and S/4HANA?"
-        ]
-    elif any(keyword in user_lower for keyword in ['cx', 'customer experience', 'sales cloud', 'service cloud']):
-        suggestions = [
-            "What is SAP Customer Experience suite?",
-            "How do Sales Cloud and Service Cloud work together?",
-            "What data science applications exist in CX?"
-        ]
-    elif any(keyword in user_lower for keyword in ['analytics', 'data science', 'machine learning']):
-        suggestions = [
-            "What analytics tools does SAP provide?",
-            "How is machine learning integrated in SAP products?",
-            "What is SAP Analytics Cloud used for?"
-        ]
-    elif any(keyword in user_lower for keyword in ['onboarding', 'new', 'first week']):
-        suggestions = [
-            "What SAP products should I learn first?",
-            "What training is available for new employees?",
-            "Who will be my mentor during onboarding?"
-        ]
-    elif any(keyword in user_lower for keyword in ['tool', 'technology', 'platform']):
-        suggestions = [
-            "What SAP development tools should I use?",
-            "How do I access SAP systems and platforms?",
-            "What's the architecture of SAP solutions?"
-        ]
-    elif any(keyword in user_lower for keyword in ['career', 'growth', 'development']):
-        suggestions = [
-            "What career paths exist in SAP data science?",
-            "What SAP certifications should I pursue?",
-            "How can I specialize in specific SAP products?"
-        ]
-    elif any(keyword in user_lower for keyword in ['integration', 'api', 'connectivity']):
-        suggestions = [
-            "How do SAP products integrate with each other?",
-            "What integration technologies does SAP use?",
-            "How do I connect external systems to SAP?"
-        ]
-    else:
-        # General SAP-focused suggestions
-        suggestions = [
-            "What are the main SAP products I should know?",
-            "How does SAP support digital transformation?",
-            "What makes SAP's approach to enterprise software unique?",
-            "How do I get started with SAP development?"
-        ]
-    
+    suggestions = SUGGESTIONS_BY_TOPIC.get(suggestion_topic(user_message), DEFAULT_SUGGESTIONS)
     return suggestions[:3]  # Return top 3 suggestions
 
 # =========================
 # Vector DB & LLM Setup
 # =========================
 doc_folder = os.path.join(os.path.dirname(__file__), "documents")
-vector_index = load_chroma_vector_db(doc_folder)
+index_version = IndexVersion(CHROMA_DB_PATH)
+vector_index = open_vector_store(lambda: load_chroma_vector_db(doc_folder), CHROMA_DB_PATH, index_version())
+
+def _derived_index_mtimes():
+    """Modification times of the BM25 and sentence index files (None when missing)"""
+    mtimes = []
+    for name in (BM25_INDEX_NAME, SENTENCE_INDEX_NAME):
+        try:
+            mtimes.append(os.stat(os.path.join(CHROMA_DB_PATH, name)).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+def _load_retrieval_indexes():
+    """Load both indexes from CHROMA_DB_PATH and record the index version they were loaded at"""
+    global keyword_index, sentence_index, retrieval_index_version, retrieval_index_key
+    # doc_indexer writes the manifest before the derived indexes, so their mtimes are part of the key
+    version, mtimes = index_version(), _derived_index_mtimes()
+    keyword_index = load_bm25_index(vector_index, CHROMA_DB_PATH)
+    logger.info(f"🔎 BM25 keyword index ready ({keyword_index.stats()['chunks']} chunks)")
+    sentence_index = load_sentence_index(vector_index, get_embeddings(), CHROMA_DB_PATH)
+    logger.info(f"✂️ Sentence index ready ({sentence_index.stats()['sentences']} sentences)")
+    retrieval_index_version, retrieval_index_key = version, (version, mtimes)
 
-# LLM setup for OpenRouter
-client = OpenAI(
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    base_url=os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
+def _current_retrieval_indexes():
+    """
+    (keyword_index, sentence_index, version) for one request, reloaded first when the
+    document indexer (e.g. mentor's background sync) has rewritten the shared chroma_db
+    """
+    with retrieval_index_lock:
+        if (index_version(), _derived_index_mtimes()) != retrieval_index_key:
+            logger.info("♻️ Document index changed - reloading BM25 and sentence indexes")
+            try:
+                _load_retrieval_indexes()
+            except Exception as e:
+                logger.error(f"⚠️ Could not reload retrieval indexes: {e} - keeping the previous ones")
+        return keyword_index, sentence_index, retrieval_index_version
+
+retrieval_index_lock = threading.Lock()
+_load_retrieval_indexes()
+
+# LLM setup for OpenRouter (pooled, shared across requests)
+llm = get_llm_client()
+
+# Answers to near-identical questions, dropped whenever the document index changes
+answer_cache = SemanticAnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_SIZE", 512)),
+    max_distance=float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", 0.1)),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 24 * 3600)),
+    version_fn=index_version
 )
 
+# Centroid relevance check for questions without SAP/work keywords (TOPIC_GATE=off disables it)
+topic_gate = None
+if os.getenv("TOPIC_GATE", "on").lower() != "off":
+    topic_gate = build_topic_gate(get_embeddings(), vector_index, margin=float(os.getenv("TOPIC_GATE_MARGIN", 0.05)))
+    if topic_gate:
+        logger.info(f"🚧 Topic gate ready ({topic_gate.stats()['centroids']} centroids)")
+
+# =========================
+# Retrieval
+# =========================
+RETRIEVAL_MODE = os.getenv("ONBOARDING_RETRIEVAL", "hybrid").lower()  # hybrid | vector
+VECTOR_DISTANCE_THRESHOLD = 1.5  # 0.0 = identical, larger = less similar
+HYBRID_CANDIDATES = 10  # Taken from each retriever before fusion
+HYBRID_TOP_K = 4
+
+def _retrieve_relevant_docs(user_message, query_embedding, keyword_index):
+    """
+    Return [(doc, score)] for the question, best first.
+    Hybrid mode fuses vector and BM25 rankings by reciprocal rank, so exact product names
+    still surface when the embedding match is weak; vector mode is the plain distance filter.
+    """
+    if RETRIEVAL_MODE == "vector":
+        docs_with_scores = batch_similarity_search(vector_index, [query_embedding], [5])[0]
+        return [(doc, score) for doc, score in docs_with_scores if score < VECTOR_DISTANCE_THRESHOLD]
+    
+    vector_hits = [
+        doc for doc, score in batch_similarity_search(vector_index, [query_embedding], [HYBRID_CANDIDATES])[0]
+        if score < VECTOR_DISTANCE_THRESHOLD
+    ]
+    keyword_hits = [doc for doc, _ in keyword_index.search(user_message, k=HYBRID_CANDIDATES)]
+    
+    # Chunks are keyed by their text, which both retrievers return unchanged
+    docs_by_text = {doc.page_content: doc for doc in keyword_hits + vector_hits}
+    fused = reciprocal_rank_fusion([
+        [doc.page_content for doc in vector_hits],
+        [doc.page_content for doc in keyword_hits]
+    ])
+    return [(docs_by_text[text], score) for text, score in fused[:HYBRID_TOP_K]]
+
+def _select_sentences_by_terms(content, query_terms, max_chars=300):
+    """Fallback for chunks missing from the sentence index: rank sentences by query term overlap"""
+    sentences = content.split('. ')
+    sentence_scores = [(sentence, len(query_terms.intersection(tokenize(sentence)))) for sentence in sentences]
+    sentence_scores.sort(key=lambda x: x[1], reverse=True)
+    selected_text = ""
+    for sentence, _ in sentence_scores:
+        if len(selected_text + sentence) < max_chars:
+            selected_text += sentence + ". "
+        else:
+            break
+    return selected_text.strip()
+
+# =========================
+# Chat Turn Helpers (shared by the JSON and streaming endpoints)
+# =========================
+
+def _prepare_onboarding_turn(user_id, user_message):
+    """
+    Relevance check, answer cache, retrieval and prompt building for one onboarding question.
+    Returns (early_payload, system_prompt, docs, query_embedding, docs_version); early_payload
+    is set when the question can be answered without calling the LLM, and docs_version is the
+    index version the documents were retrieved from.
+    """
+    # Check if the question is relevant to SAP or work: keywords first, then the topic gate
+    # on the query embedding, which the cache lookup and retrieval below reuse
+    query_embedding = None
+    if _is_work_relevant(user_message):
+        query_embedding = get_embeddings().embed_query(user_message)
+    if query_embedding is None or not _passes_topic_gate(user_message, query_embedding):
+        return {
+            'response': "This question doesn't seem to be related to SAP products, data science, or work. Please ask questions about SAP solutions like BTP (Business Technology Platform), ERP/S/4HANA, Customer Experience (CX), onboarding, or other SAP-related topics.",
+            'suggestions': [
+                "What are the main SAP products I should know?",
+                "Tell me about SAP Business Technology Platform (BTP)",
+                "How does data science apply to SAP solutions?"
+            ],
+            'sources': [],
+            'timestamp': datetime.now().isoformat()
+        }, None, [], None, None
+    
+    # A question close enough to one answered before reuses that answer
+    cached = answer_cache.lookup(query_embedding)
+    if cached:
+        logger.info(f"💾 Answer cache hit (distance {cached['cache_distance']})")
+        _record_turn(user_id, user_message, cached['response'])
+        return dict(cached, cached=True, timestamp=datetime.now().isoformat()), None, [], None, None
+    
+    # Find the most relevant chunks (vector search, fused with BM25 in hybrid mode)
+    keyword_index, sentence_index, docs_version = _current_retrieval_indexes()
+    relevant_docs = _retrieve_relevant_docs(user_message, query_embedding, keyword_index)
+    
+    if not relevant_docs:
+        return {
+            'response': "No relevant information found. Please contact HR for more information or ask questions specifically related to SAP products, the Data Science Department, or SAP's technology platform.",
+            'suggestions': [
+                "What are the main SAP products I should learn?",
+                "Tell me about SAP's Business Technology Platform",
+                "How is data science used in SAP solutions?"
+            ],
+            'sources': [],
+            'timestamp': datetime.now().isoformat()
+        }, None, [], None, None
+    
+    # Build concise context from only the most relevant chunks
+    context_parts = []
+    total_chars = 0
+    max_context_chars = 1500  # Strict limit
+    query_vector = normalize_query(query_embedding)
+    
+    for doc, score in relevant_docs:
+        # Only include the most relevant part of each document
+        content = doc.page_content
+        
+        # If the document is long, keep only the sentences closest to the question
+        if len(content) > 300:
+            selected_text = sentence_index.select(content, query_vector, max_chars=300)
+            if selected_text is None:
+                selected_text = _select_sentences_by_terms(content, set(tokenize(user_message)))
+            content = selected_text
+        
+        if total_chars + len(content) <= max_context_chars:
+            context_parts.append(content)
+            total_chars += len(content)
+        else:
+            # Add partial content to fit within limit
+            remaining_chars = max_context_chars - total_chars
+            if remaining_chars > 100:  # Only add if meaningful amount
+                context_parts.append(content[:remaining_chars] + "...")
+            break
+    
+    context = "\n\n".join(context_parts)
+    docs = [doc for doc, score in relevant_docs]  # For compatibility with rest of code
+    
+    # Create concise system prompt focused on SAP products
+    system_prompt = f"""You are a SAP Data Science onboarding assistant. Focus on BTP, ERP/S/4HANA, CX solutions.
+
+RULES:
+1. Answer ONLY from context below
+2. If no relevant info, say "No relevant information found"
+3. Keep under 150 words
+4. Emphasize SAP products and data science applications
+
+Context: {context}
+
+Be concise, helpful, and SAP-focused."""
+
+    return None, system_prompt, docs, query_embedding, docs_version
+
+def _record_turn(user_id, user_message, ai_response):
+    conversation_history = conversation_store.get(user_id, [])
+    conversation_history.extend([
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": ai_response}
+    ])
+    # Keep only last 6 messages
+    if len(conversation_history) > 6:
+        conversation_history = conversation_history[-6:]
+    conversation_store[user_id] = conversation_history
+
+def _finish_onboarding_turn(user_id, user_message, ai_response, docs, query_embedding, docs_version):
+    """
+    Apply the fallback answer, update conversation history and build the response payload.
+    The answer is cached under docs_version, so it is dropped if a reindex landed meanwhile.
+    """
+    # If still no response, use basic fallback
+    if not ai_response or "No relevant information found" in ai_response:
+        ai_response = "No relevant information found. Please contact HR for more information or ask questions specifically related to SAP products, data science applications, or the SAP Data Science Department."
+    
+    # Update conversation history
+    _record_turn(user_id, user_message, ai_response)
+    
+    # Generate suggestions only if we provided useful information
+    suggestions = []
+    if "No relevant information found" not in ai_response:
+        suggestions = _generate_suggestions(user_message, docs)
+    else:
+        suggestions = [
+            "What are the main SAP products I should learn?",
+            "Tell me about SAP's Business Technology Platform",
+            "How is data science applied in SAP solutions?"
+        ]
+    
+    payload = {
+        'response': ai_response,
+        'suggestions': suggestions,
+        'sources': [f"Document: {doc.metadata.get('source', 'SAP Onboarding Guide')}" for doc in docs] if docs else []
+    }
+    # Only real answers are worth reusing; error strings and the fallback are not cached
+    if "No relevant information found" not in ai_response and not ai_response.startswith("Error:"):
+        answer_cache.store(query_embedding, payload, expected_version=docs_version)
+    return dict(payload, timestamp=datetime.now().isoformat())
+
 # =========================
 # Flask Routes
 # =========================
@@ -245,113 +428,20 @@ def onboarding_chat():
         
         logger.info(f"Onboarding chat request from {user_id}: {user_message}")
         
-        # Check if the question is relevant to SAP or work
-        if not _is_work_relevant(user_message):
-            return jsonify({
-                'response': "This question doesn't seem to be related to SAP products, data science, or work. Please ask questions about SAP solutions like BTP (Business Technology Platform), ERP/S/4HANA, Customer Experience (CX), onboarding, or other SAP-related topics.",
-                'suggestions': [
-                    "What are the main SAP products I should know?",
-                    "Tell me about SAP Business Technology Platform (BTP)",
-                    "How does data science apply to SAP solutions?"
-                ],
-                'sources': [],
-                'timestamp': datetime.now().isoformat()
-            })
-        
-        # Get conversation history
-        if user_id not in conversation_store:
-            conversation_store[user_id] = []
-        
-        conversation_history = conversation_store[user_id]
-        
-        # Use vector search with cosine similarity to find most relevant chunks
-        docs_with_scores = vector_index.similarity_search_with_score(user_message, k=5)
-        
-        # Filter documents based on similarity threshold (0.0 = identical, 2.0 = completely different for cosine)
-        similarity_threshold = 1.5  # More lenient threshold
-        relevant_docs = [(doc, score) for doc, score in docs_with_scores if score < similarity_threshold]
-        
-        if not relevant_docs:
-            return jsonify({
-                'response': "No relevant information found. Please contact HR for more information or ask questions specifically related to SAP products, the Data Science Department, or SAP's technology platform.",
-                'suggestions': [
-                    "What are the main SAP products I should learn?",
-                    "Tell me about SAP's Business Technology Platform",
-                    "How is data science used in SAP solutions?"
-                ],
-                'sources': [],
-                'timestamp': datetime.now().isoformat()
-            })
-        
-        # Build concise context from only the most relevant chunks
-        context_parts = []
-        total_chars = 0
-        max_context_chars = 1500  # Strict limit
-        
-        for doc, score in relevant_docs:
-            # Only include the most relevant part of each document
-            content = doc.page_content
-            
-            # If the document is long, try to find the most relevant paragraph
-            if len(content) > 300:
-                # Split into sentences and find those most relevant to the query
-                sentences = content.split('. ')
-                query_keywords = set(user_message.lower().split())
-                
-                # Score sentences based on keyword overlap
-                sentence_scores = []
-                for sentence in sentences:
-                    sentence_lower = sentence.lower()
-                    overlap = len([word for word in query_keywords if word in sentence_lower])
-                    sentence_scores.append((sentence, overlap))
-                
-                # Take top sentences up to 300 chars
-                sentence_scores.sort(key=lambda x: x[1], reverse=True)
-                selected_text = ""
-                for sentence, _ in sentence_scores:
-                    if len(selected_text + sentence) < 300:
-                        selected_text += sentence + ". "
-                    else:
-                        break
-                content = selected_text.strip()
-            
-            if total_chars + len(content) <= max_context_chars:
-                context_parts.append(content)
-                total_chars += len(content)
-            else:
-                # Add partial content to fit within limit
-                remaining_chars = max_context_chars - total_chars
-                if remaining_chars > 100:  # Only add if meaningful amount
-                    context_parts.append(content[:remaining_chars] + "...")
-                break
-        
-        context = "\n\n".join(context_parts)
-        docs = [doc for doc, score in relevant_docs]  # For compatibility with rest of code
-        
-        # Create concise system prompt focused on SAP products
-        system_prompt = f"""You are a SAP Data Science onboarding assistant. Focus on BTP, ERP/S/4HANA, CX solutions.
-
-RULES:
-1. Answer ONLY from context below
-2. If no relevant info, say "No relevant information found"
-3. Keep under 150 words
-4. Emphasize SAP products and data science applications
-
-Context: {context}
-
-Be concise, helpful, and SAP-focused."""
+        early_payload, system_prompt, docs, query_embedding, docs_version = _prepare_onboarding_turn(user_id, user_message)
+        if early_payload:
+            return jsonify(early_payload)
 
         # Generate response using OpenRouter
         ai_response = None
-        if client:
+        if llm:
             try:
-                response = client.chat.completions.create(
-                    model=os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct"),
-                    messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
+                ai_response = llm.chat(
+                    [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
                     max_tokens=150,
-                    temperature=0.3
-                )
-                ai_response = response.choices[0].message.content.strip()
+                    temperature=0.3,
+                    endpoint="onboarding_chat"
+                ).strip()
             except Exception as e:
                 logger.error(f"Error calling LLM: {str(e)}")
         
@@ -360,42 +450,61 @@ Be concise, helpful, and SAP-focused."""
             prompt = f"{system_prompt}\n\nUser Question: {user_message}"
             ai_response = get_llm_response(prompt)
         
-        # If still no response, use basic fallback
-        if not ai_response or "No relevant information found" in ai_response:
-            ai_response = "No relevant information found. Please contact HR for more information or ask questions specifically related to SAP products, data science applications, or the SAP Data Science Department."
-        
-        # Update conversation history
-        conversation_history.extend([
-            {"role": "user", "content": user_message},
-            {"role": "assistant", "content": ai_response}
-        ])
-        # Keep only last 6 messages
-        if len(conversation_history) > 6:
-            conversation_history = conversation_history[-6:]
-        conversation_store[user_id] = conversation_history
-        
-        # Generate suggestions only if we provided useful information
-        suggestions = []
-        if "No relevant information found" not in ai_response:
-            suggestions = _generate_suggestions(user_message, docs)
-        else:
-            suggestions = [
-                "What are the main SAP products I should learn?",
-                "Tell me about SAP's Business Technology Platform",
-                "How is data science applied in SAP solutions?"
-            ]
-        
-        return jsonify({
-            'response': ai_response,
-            'suggestions': suggestions,
-            'sources': [f"Document: {doc.metadata.get('source', 'SAP Onboarding Guide')}" for doc in docs] if docs else [],
-            'timestamp': datetime.now().isoformat()
-        })
+        return jsonify(_finish_onboarding_turn(user_id, user_message, ai_response, docs, query_embedding, docs_version))
         
     except Exception as e:
         logger.error(f"Error in onboarding chat: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/onboarding-chat/stream', methods=['POST'])
+def onboarding_chat_stream():
+    """
+    Streaming variant of /api/onboarding-chat: tokens arrive as SSE 'token' events and the
+    final 'done' event carries the same payload as the JSON endpoint (response, suggestions,
+    sources, timestamp). The 'done' response is authoritative if a fallback answer was applied.
+    """
+    data = request.get_json()
+    user_message = data.get('message', '').strip()
+    user_id = data.get('user_id', 'default_user')
+    
+    if not user_message:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    logger.info(f"Onboarding chat stream request from {user_id}: {user_message}")
+    
+    try:
+        early_payload, system_prompt, docs, query_embedding, docs_version = _prepare_onboarding_turn(user_id, user_message)
+    except Exception as e:
+        logger.error(f"Error in onboarding chat stream: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+    
+    def generate():
+        if early_payload:
+            yield sse_event("done", early_payload)
+            return
+        
+        parts = []
+        try:
+            for token in llm.stream_chat(
+                [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
+                max_tokens=150,
+                temperature=0.3,
+                endpoint="onboarding_chat_stream"
+            ):
+                parts.append(token)
+                yield sse_event("token", {"token": token})
+        except Exception as e:
+            logger.error(f"Error streaming from LLM: {str(e)}")
+        
+        ai_response = "".join(parts).strip()
+        if not ai_response:
+            # Nothing was streamed - fall back to the blocking call so the user still gets an answer
+            ai_response = get_llm_response(f"{system_prompt}\n\nUser Question: {user_message}")
+        
+        yield sse_event("done", _finish_onboarding_turn(user_id, user_message, ai_response, docs, query_embedding, docs_version))
+    
+    return sse_response(generate())
+
 @app.route('/api/onboarding-reset', methods=['POST'])
 def reset_onboarding_conversation():
     """Reset conversation history"""
@@ -403,8 +512,7 @@ def reset_onboarding_conversation():
         data = request.get_json()
         user_id = data.get('user_id', 'default_user')
         
-        if user_id in conversation_store:
-            del conversation_store[user_id]
+        conversation_store.pop(user_id, None)
         logger.info(f"Reset conversation for user: {user_id}")
         
         return jsonify({'message': 'Conversation reset successfully'})
@@ -447,6 +555,62 @@ def search_documents():
         logger.error(f"Error searching documents: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+MAX_BATCH_QUERIES = int(os.getenv("SEARCH_DOCS_MAX_BATCH", 500))
+MAX_BATCH_TOP_K = 50
+
+@app.route('/api/search-docs/batch', methods=['POST'])
+def search_documents_batch():
+    """
+    Search several queries in one request: {"queries": ["...", {"query": "...", "top_k": 5}], "top_k": 3}
+    All queries are encoded in one batch and searched together.
+    """
+    data = request.get_json(silent=True) or {}
+    queries = data.get('queries')
+    default_top_k = data.get('top_k', 3)
+    
+    if not isinstance(queries, list) or not queries:
+        return jsonify({'error': 'queries must be a non-empty list'}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}), 400
+    
+    texts, top_ks = [], []
+    for i, item in enumerate(queries):
+        if isinstance(item, str):
+            item = {'query': item}
+        if not isinstance(item, dict):
+            return jsonify({'error': f'queries[{i}] must be a string or an object'}), 400
+        query = item.get('query')
+        top_k = item.get('top_k', default_top_k)
+        if not isinstance(query, str) or not query.strip():
+            return jsonify({'error': f'queries[{i}].query is required'}), 400
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or not 1 <= top_k <= MAX_BATCH_TOP_K:
+            return jsonify({'error': f'queries[{i}].top_k must be an integer between 1 and {MAX_BATCH_TOP_K}'}), 400
+        texts.append(query.strip())
+        top_ks.append(top_k)
+    
+    try:
+        logger.info(f"Batch document search request: {len(texts)} queries")
+        vectors = get_embeddings().embed_queries(texts)
+        hits_per_query = batch_similarity_search(vector_index, vectors, top_ks)
+    except Exception as e:
+        logger.error(f"Error in batch document search: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+    
+    results = []
+    for query, hits in zip(texts, hits_per_query):
+        results.append({
+            'query': query,
+            'results': [{
+                'content': doc.page_content[:300] + "...",  # Truncate for preview
+                'metadata': doc.metadata,
+                'source': doc.metadata.get('source', 'Unknown'),
+                'score': round(score, 4)
+            } for doc, score in hits],
+            'count': len(hits)
+        })
+    
+    return jsonify({'results': results, 'count': len(results)})
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -454,7 +618,19 @@ def health_check():
         'status': 'healthy',
         'service': 'onboarding_mode',
         'timestamp': datetime.now().isoformat(),
-        'vector_db_loaded': vector_index is not None
+        'vector_db_loaded': vector_index is not None,
+        'llm': llm.stats(),
+        'query_embedding_cache': get_embeddings().stats(),
+        'vector_store': vector_store_stats(vector_index),
+        'answer_cache': answer_cache.stats(),
+        'topic_gate': topic_gate.stats() if topic_gate else None,
+        'sessions': conversation_store.stats(),
+        'retrieval': {
+            'mode': RETRIEVAL_MODE,
+            'index_version': retrieval_index_version,
+            'bm25': keyword_index.stats(),
+            'sentences': sentence_index.stats()
+        }
     })
 
 # =========================
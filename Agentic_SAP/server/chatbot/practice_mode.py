@@ -4,21 +4,19 @@ import random
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
-from openai import OpenAI, responses
+from llm_client import get_llm_client
+from session_store import SessionStore
 
 # Setup
 load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-# Store practice sessions
-practice_sessions = {}
+# Store practice sessions (bounded LRU with an idle TTL)
+practice_sessions = SessionStore.from_env("practice_sessions")
 
-# OpenAI client
-client = OpenAI(
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    base_url=os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
-)
+# Shared pooled LLM client
+llm = get_llm_client()
 
 def load_scenarios():
     """Load practice scenarios from file"""
@@ -62,12 +60,12 @@ def load_scenarios():
 def get_ai_response(prompt):
     """Get AI response"""
     try:
-        response = client.chat.completions.create(
+        return llm.chat(
+            [{"role": "system", "content": prompt}],
             model="meta-llama/llama-3-8b-instruct",
-            messages=[{"role": "system", "content": prompt}],
-            max_tokens=250
+            max_tokens=250,
+            endpoint="practice"
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error: {e}"
 
@@ -80,7 +78,7 @@ def practice_start():
     user_id = data.get('user_id', 'default_user')
     
     # Reset session
-    practice_sessions[user_id] = {
+    session = practice_sessions[user_id] = {
         'state': 'selecting',
         'responses': [],
         'interactions': 0
@@ -88,7 +86,7 @@ def practice_start():
     
     # Pick scenario
     scenario = random.choice(scenarios)
-    practice_sessions[user_id]['scenario'] = scenario
+    session['scenario'] = scenario
     
     response_data = {
         "response": f"""Practice Mode - Scenario Selection
@@ -114,21 +112,19 @@ def practice_respond():
     user_id = data.get('user_id', 'default_user')
     message = data.get('message', '').strip().lower()
     
-    if user_id not in practice_sessions:
+    session = practice_sessions.get(user_id)
+    if session is None:
         return jsonify({"response": "Please start a practice session first."})
     
-    session = practice_sessions[user_id]
-    
     if session['state'] == 'selecting':
-        return handle_selection(user_id, message)
+        return handle_selection(user_id, session, message)
     elif session['state'] == 'active':
-        return handle_conversation(user_id, data.get('message', ''))
+        return handle_conversation(session, data.get('message', ''))
     
     return jsonify({"response": "Session error. Please restart."})
 
-def handle_selection(user_id, response):
+def handle_selection(user_id, session, response):
     """Handle scenario selection"""
-    session = practice_sessions[user_id]
     scenario = session['scenario']
     
     if response in ['yes', 'y']:
@@ -177,21 +173,20 @@ Would you like to practice with this scenario?""",
         return jsonify(response_data)
     
     elif response in ['exit', 'quit']:
-        del practice_sessions[user_id]
+        practice_sessions.pop(user_id, None)
         return jsonify({"response": "Practice mode ended."})
     
     return jsonify({"response": "Please choose: yes, no, or exit."})
 
-def handle_conversation(user_id, user_message):
+def handle_conversation(session, user_message):
     """Handle practice conversation"""
-    session = practice_sessions[user_id]
     scenario = session['scenario']
     session['responses'].append(user_message)
     session['interactions'] += 1
     
     # End after 4 interactions
     if session['interactions'] >= 4:
-        return end_simulation(user_id)
+        return end_simulation(session)
     
     # Continue roleplay
     character_name = scenario['character_name']
@@ -220,9 +215,8 @@ Respond as {character_name}:"""
 
     return jsonify({"response": formatted_response})
 
-def end_simulation(user_id):
+def end_simulation(session):
     """End simulation with evaluation"""
-    session = practice_sessions[user_id]
     scenario = session['scenario']
     responses = session['responses']
     user_responses = "\n".join([f'{i+1}. "{r}"' for i, r in enumerate(responses)])
@@ -275,14 +269,13 @@ def practice_reset():
     data = request.json
     user_id = data.get('user_id', 'default_user')
     
-    if user_id in practice_sessions:
-        del practice_sessions[user_id]
+    practice_sessions.pop(user_id, None)
     
     return jsonify({"status": "reset_complete"})
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({"status": "OK"})
+    return jsonify({"status": "OK", "llm": llm.stats(), "sessions": practice_sessions.stats()})
 
 if __name__ == "__main__":
     print(f"Loaded {len(scenarios)} scenarios")
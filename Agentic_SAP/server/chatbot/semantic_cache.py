@@ -0,0 +1,140 @@
+"""
+Semantic Answer Cache - reuse answers to questions that mean the same thing
+Entries are keyed by normalized query embedding; a new question within max_distance
+(cosine distance) of a cached one gets the cached answer without retrieval or an LLM call
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+# store() default: keep the answer whatever the current index version
+_ANY_VERSION = object()
+
+
+class SemanticAnswerCache:
+    """
+    Bounded LRU of (query vector, answer payload) pairs searched by brute-force cosine.
+    version_fn reports the current document index version; when it changes, every
+    entry is dropped because the answers were built from the old documents.
+    """
+
+    def __init__(self, max_entries: int = 512, max_distance: float = 0.1, ttl_seconds: float = 24 * 3600,
+                 version_fn: Optional[Callable[[], Any]] = None):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.version_fn = version_fn
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._entries = []  # [{"payload", "created", "last_used"}], row-aligned with _vectors
+        self._version = version_fn() if version_fn else None
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._stale_stores = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    # =========================
+    # Lookup & Store
+    # =========================
+    def lookup(self, vector) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        query = self._normalize(vector)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            self._expire(now)
+            if self._entries:
+                similarities = self._vectors @ query
+                best = int(np.argmax(similarities))
+                if 1.0 - float(similarities[best]) <= self.max_distance:
+                    entry = self._entries[best]
+                    entry["last_used"] = now
+                    self._hits += 1
+                    return dict(entry["payload"], cache_distance=round(1.0 - float(similarities[best]), 4))
+            self._misses += 1
+            return None
+
+    def store(self, vector, payload: Dict, expected_version: Any = _ANY_VERSION):
+        """
+        expected_version is the index version the answer's documents were retrieved from;
+        the answer is dropped if the index has changed since
+        """
+        if not self.enabled:
+            return
+        row = self._normalize(vector)[None, :]
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            if expected_version is not _ANY_VERSION and expected_version != self._version:
+                self._stale_stores += 1
+                return
+            if self._entries and self._vectors.shape[1] == row.shape[1]:
+                self._vectors = np.vstack([self._vectors, row])
+            else:
+                self._vectors, self._entries = row, []
+            self._entries.append({"payload": payload, "created": now, "last_used": now})
+            if len(self._entries) > self.max_entries:
+                # Evict the least recently used entry
+                self._drop([int(np.argmin([entry["last_used"] for entry in self._entries]))])
+
+    def clear(self):
+        with self._lock:
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._entries = []
+            self._invalidations += 1
+
+    # =========================
+    # Internals (caller holds the lock)
+    # =========================
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self):
+        if not self.version_fn:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            self._version = version
+            if self._entries:
+                print(f"♻️ Document index changed - dropping {len(self._entries)} cached answers")
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._entries = []
+            self._invalidations += 1
+
+    def _expire(self, now: float):
+        if self.ttl_seconds <= 0:
+            return
+        stale = [i for i, entry in enumerate(self._entries) if now - entry["created"] > self.ttl_seconds]
+        if stale:
+            self._drop(stale)
+
+    def _drop(self, rows):
+        rows = set(rows)
+        keep = [i for i in range(len(self._entries)) if i not in rows]
+        self._vectors = self._vectors[keep]
+        self._entries = [self._entries[i] for i in keep]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "stale_stores": self._stale_stores
+            }
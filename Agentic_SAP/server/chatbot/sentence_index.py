@@ -0,0 +1,133 @@
+"""
+Sentence Index - per-sentence embeddings of every document chunk, computed at index time
+Lets onboarding compress a long retrieved chunk to its most query-relevant sentences
+with one small matrix-vector product instead of per-request string processing
+"""
+
+import os
+import re
+import json
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SENTENCE_INDEX_NAME = "sentence_index.npz"
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+def chunk_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SentenceIndex:
+    """
+    Maps a chunk (by content hash) to its sentences and their rows in one
+    L2-normalized float32 matrix.
+    """
+
+    def __init__(self, chunks: Dict[str, Tuple[List[str], int]], matrix: np.ndarray):
+        self.chunks = chunks  # chunk hash -> (sentences, first row in matrix)
+        self.matrix = matrix
+
+    # =========================
+    # Construction & Persistence
+    # =========================
+    @classmethod
+    def build(cls, texts: List[str], embedding, previous: Optional["SentenceIndex"] = None) -> "SentenceIndex":
+        """Segment and embed the chunks; sentences of chunks already in previous are not re-embedded"""
+        chunks = {}
+        blocks = []
+        to_embed = []  # (block position, sentences)
+        row = 0
+        for text in texts:
+            key = chunk_key(text)
+            if key in chunks:
+                continue
+            if previous and key in previous.chunks:
+                sentences, start = previous.chunks[key]
+                blocks.append(previous.matrix[start:start + len(sentences)])
+            else:
+                sentences = split_sentences(text)
+                blocks.append(None)
+                to_embed.append((len(blocks) - 1, sentences))
+            chunks[key] = (sentences, row)
+            row += len(sentences)
+
+        new_sentences = [sentence for _, sentences in to_embed for sentence in sentences]
+        if new_sentences:
+            vectors = np.asarray(embedding.embed_documents(new_sentences), dtype=np.float32)
+            offset = 0
+            for position, sentences in to_embed:
+                blocks[position] = vectors[offset:offset + len(sentences)]
+                offset += len(sentences)
+
+        blocks = [block for block in blocks if block is not None and len(block)]
+        if not blocks:
+            return cls(chunks, np.zeros((0, 0), dtype=np.float32))
+        matrix = np.vstack(blocks).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return cls(chunks, np.ascontiguousarray(matrix / norms))
+
+    def save(self, path: str):
+        meta = json.dumps({key: [sentences, start] for key, (sentences, start) in self.chunks.items()})
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, matrix=self.matrix, meta=np.array(meta))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SentenceIndex":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            matrix = np.ascontiguousarray(data["matrix"], dtype=np.float32)
+        return cls({key: (sentences, start) for key, (sentences, start) in meta.items()}, matrix)
+
+    # =========================
+    # Selection
+    # =========================
+    def select(self, text: str, query_vector: np.ndarray, max_chars: int = 300) -> Optional[str]:
+        """
+        Most query-similar sentences of a chunk that fit in max_chars, or None when the chunk
+        is not in the index (e.g. the collection changed after the index was built)
+        """
+        entry = self.chunks.get(chunk_key(text))
+        if entry is None:
+            return None
+        sentences, start = entry
+        if not sentences:
+            return ""
+        similarities = self.matrix[start:start + len(sentences)] @ query_vector
+        selected = ""
+        for i in np.argsort(-similarities, kind="stable"):
+            if len(selected) + len(sentences[i]) + 1 >= max_chars:
+                break
+            selected += sentences[i] + " "
+        return selected.strip()
+
+    def stats(self) -> Dict:
+        return {"chunks": len(self.chunks), "sentences": int(self.matrix.shape[0]),
+                "matrix_bytes": int(self.matrix.nbytes)}
+
+
+def normalize_query(vector) -> np.ndarray:
+    query = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    return query / norm if norm else query
+
+
+def load_sentence_index(chroma_db, embedding, db_path: Optional[str] = None) -> SentenceIndex:
+    """Load the index the document indexer saved next to the collection, or build it from the collection"""
+    if db_path:
+        path = os.path.join(db_path, SENTENCE_INDEX_NAME)
+        if os.path.exists(path):
+            try:
+                return SentenceIndex.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Could not read {path}: {e} - rebuilding sentence index from the collection")
+    texts = [text or "" for text in chroma_db.get(include=["documents"])["documents"]]
+    return SentenceIndex.build(texts, embedding)
@@ -0,0 +1,142 @@
+"""
+Session Store - bounded per-user session state for the chat services
+A dict-like LRU with an idle TTL: sessions untouched for ttl_seconds expire and the least
+recently used session is evicted beyond max_entries, so per-user state cannot grow forever
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Hashable, Iterator
+
+import numpy as np
+
+
+def deep_sizeof(value: Any) -> int:
+    """Approximate bytes held by a session value (containers walked, NumPy arrays by nbytes)"""
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (value.nbytes if value.base is None else 0)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(key) + deep_sizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item) for item in value)
+    return size
+
+
+class SessionStore(MutableMapping):
+    """
+    user_id -> session mapping ordered by last access. Reading or writing a session
+    refreshes it; expired sessions are dropped as they are found (the oldest sit at the
+    front, so a sweep stops at the first live one).
+    Approximate sizes are kept as a running total: a session is measured when it is
+    written and re-measured when it is next read, so in-place edits are counted one access late.
+    """
+
+    def __init__(self, name: str, max_entries: int = 10000, ttl_seconds: float = 2 * 3600):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._sessions = OrderedDict()  # user_id -> (session, last_access, approx_bytes)
+        self._bytes = 0
+        self._evicted = 0
+        self._expired = 0
+
+    @classmethod
+    def from_env(cls, name: str) -> "SessionStore":
+        """SESSION_STORE_MAX_ENTRIES / SESSION_STORE_TTL_SECONDS (0 = no limit)"""
+        return cls(name,
+                   max_entries=int(os.getenv("SESSION_STORE_MAX_ENTRIES", 10000)),
+                   ttl_seconds=float(os.getenv("SESSION_STORE_TTL_SECONDS", 2 * 3600)))
+
+    # =========================
+    # Mapping Interface
+    # =========================
+    def __getitem__(self, user_id: Hashable) -> Any:
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            session, _, size = self._sessions[user_id]
+            self._store(user_id, session, now, size)
+            return session
+
+    def __setitem__(self, user_id: Hashable, session: Any):
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            previous = self._sessions.get(user_id)
+            self._store(user_id, session, now, previous[2] if previous else 0)
+            while self.max_entries > 0 and len(self._sessions) > self.max_entries:
+                _, (_, _, size) = self._sessions.popitem(last=False)
+                self._bytes -= size
+                self._evicted += 1
+
+    def __delitem__(self, user_id: Hashable):
+        with self._lock:
+            _, _, size = self._sessions.pop(user_id)
+            self._bytes -= size
+
+    def pop(self, user_id: Hashable, *default) -> Any:
+        """Remove and return a session in one locked step (no race with expiry between check and delete)"""
+        with self._lock:
+            if user_id not in self._sessions:
+                if default:
+                    return default[0]
+                raise KeyError(user_id)
+            session, _, size = self._sessions.pop(user_id)
+            self._bytes -= size
+            return session
+
+    def __contains__(self, user_id: object) -> bool:
+        with self._lock:
+            self._sweep(time.time())
+            return user_id in self._sessions
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            self._sweep(time.time())
+            return iter(list(self._sessions))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sweep(time.time())
+            return len(self._sessions)
+
+    def _store(self, user_id: Hashable, session: Any, now: float, old_size: int):
+        """Insert or refresh a session as most recently used and re-measure it (caller holds the lock)"""
+        size = deep_sizeof(session)
+        self._bytes += size - old_size
+        self._sessions[user_id] = (session, now, size)
+        self._sessions.move_to_end(user_id)
+
+    def _sweep(self, now: float):
+        """Drop idle sessions from the least recently used end (caller holds the lock)"""
+        if self.ttl_seconds <= 0:
+            return
+        while self._sessions:
+            user_id, (_, last_access, size) = next(iter(self._sessions.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            del self._sessions[user_id]
+            self._bytes -= size
+            self._expired += 1
+
+    # =========================
+    # Stats
+    # =========================
+    def stats(self) -> Dict:
+        with self._lock:
+            self._sweep(time.time())
+            return {
+                "name": self.name,
+                "sessions": len(self._sessions),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "evicted": self._evicted,
+                "expired": self._expired,
+                "approx_bytes": self._bytes
+            }
@@ -5,7 +5,7 @@ Specialized LLM agent for deep skills analysis and gap identification
 
 import os
 import json
-from openai import OpenAI
+from llm_client import get_llm_client
 from dotenv import load_dotenv
 
 # Load environment
@@ -13,10 +13,7 @@ load_dotenv()
 
 class SkillsAnalysisAgent:
     def __init__(self):
-        self.client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url=os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
-        )
+        self.llm = get_llm_client()
         self.model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct")
     
     def analyze_skills(self, user_profile, available_courses):
@@ -24,20 +21,39 @@ class SkillsAnalysisAgent:
         Analyze user skills and provide deep insights on learning needs
         """
         try:
-            # Prepare user skills context
-            current_skills = ", ".join([f"{skill['name']} (Level {skill['rating']})" 
-                                      for skill in user_profile['skills']])
-            
-            # Prepare course skills context  
-            course_skills = {}
-            for course in available_courses:
-                course_skills[course['id']] = {
-                    'title': course['title'],
-                    'skills': [f"{skill['name']} (Level {skill['level']})" 
-                              for skill in course['skills']]
-                }
-            
-            prompt = f"""Analyze skills for learning path optimization.
+            ai_response = self.llm.chat(**self._build_request(user_profile, available_courses)).strip()
+            return self._parse_response(ai_response, user_profile, available_courses)
+        except Exception as e:
+            print(f"Skills Analysis Agent error: {e}")
+            return self.fallback_result(user_profile, available_courses, str(e))
+    
+    async def analyze_skills_async(self, user_profile, available_courses):
+        """
+        Async variant of analyze_skills used by the orchestrator's deadline-bounded fan-out
+        """
+        try:
+            ai_response = (await self.llm.achat(**self._build_request(user_profile, available_courses))).strip()
+            return self._parse_response(ai_response, user_profile, available_courses)
+        except Exception as e:
+            print(f"Skills Analysis Agent error: {e}")
+            return self.fallback_result(user_profile, available_courses, str(e))
+    
+    def _build_request(self, user_profile, available_courses):
+        """Prompt and completion parameters for one skills analysis call"""
+        # Prepare user skills context
+        current_skills = ", ".join([f"{skill['name']} (Level {skill['rating']})" 
+                                  for skill in user_profile['skills']])
+        
+        # Prepare course skills context  
+        course_skills = {}
+        for course in available_courses:
+            course_skills[course['id']] = {
+                'title': course['title'],
+                'skills': [f"{skill['name']} (Level {skill['level']})" 
+                          for skill in course['skills']]
+            }
+        
+        prompt = f"""Analyze skills for learning path optimization.
 
 User: {user_profile['name']} ({user_profile['role']})
 Skills: {current_skills}
@@ -63,64 +79,64 @@ Return JSON:
   "estimated_readiness": "6-8 weeks"
 }}"""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert Skills Analysis AI agent. Provide precise, actionable skills analysis in valid JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=80,  # Reduced for cost optimization
-                temperature=0.1  # Lower for consistent JSON
-            )
-            
-            # Parse and clean response
-            ai_response = response.choices[0].message.content.strip()
-            
-            # Clean JSON formatting
-            if ai_response.startswith("```json"):
-                ai_response = ai_response.replace("```json", "").replace("```", "").strip()
-            
-            # Extract JSON
-            import re
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                ai_response = json_match.group()
-            
-            try:
-                parsed_response = json.loads(ai_response)
-                return {
-                    "agent": "skills_analysis",
-                    "analysis": parsed_response,
-                    "confidence": "high"
-                }
-            except json.JSONDecodeError:
-                return {
-                    "agent": "skills_analysis",
-                    "analysis": {
-                        "critical_gaps": [],
-                        "learning_readiness": [],
-                        "skill_priorities": [],
-                        "learning_approach": "Standard progressive learning approach",
-                        "estimated_readiness": "8-12 weeks"
-                    },
-                    "confidence": "low",
-                    "error": "JSON parsing failed"
-                }
-                
-        except Exception as e:
-            print(f"Skills Analysis Agent error: {e}")
+        return {
+            "messages": [
+                {"role": "system", "content": "You are an expert Skills Analysis AI agent. Provide precise, actionable skills analysis in valid JSON format."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 80,  # Reduced for cost optimization
+            "temperature": 0.1,  # Lower for consistent JSON
+            "model": self.model,
+            "endpoint": "skills_analysis"
+        }
+    
+    def _parse_response(self, ai_response, user_profile, available_courses):
+        """Extract the JSON analysis from the model output"""
+        # Clean JSON formatting
+        if ai_response.startswith("```json"):
+            ai_response = ai_response.replace("```json", "").replace("```", "").strip()
+        
+        # Extract JSON
+        import re
+        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+        if json_match:
+            ai_response = json_match.group()
+        
+        try:
+            parsed_response = json.loads(ai_response)
+            return {
+                "agent": "skills_analysis",
+                "analysis": parsed_response,
+                "confidence": "high"
+            }
+        except json.JSONDecodeError:
             return {
                 "agent": "skills_analysis",
                 "analysis": {
                     "critical_gaps": [],
                     "learning_readiness": [],
                     "skill_priorities": [],
-                    "learning_approach": "Unable to analyze - using default approach",
-                    "estimated_readiness": "Timeline unavailable"
+                    "learning_approach": "Standard progressive learning approach",
+                    "estimated_readiness": "8-12 weeks"
                 },
                 "confidence": "low",
-                "error": str(e)
+                "error": "JSON parsing failed"
             }
+    
+    def fallback_result(self, user_profile, available_courses, error):
+        """Default analysis used when the LLM call fails or misses its deadline"""
+        return {
+            "agent": "skills_analysis",
+            "analysis": {
+                "critical_gaps": [],
+                "learning_readiness": [],
+                "skill_priorities": [],
+                "learning_approach": "Unable to analyze - using default approach",
+                "estimated_readiness": "Timeline unavailable"
+            },
+            "confidence": "low",
+            "error": error
+        }
 
 # Test function for standalone usage
 def test_skills_agent():
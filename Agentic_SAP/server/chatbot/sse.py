@@ -0,0 +1,25 @@
+"""
+Server-Sent Events helpers shared by the streaming chat endpoints
+"""
+
+import json
+from typing import Dict, Iterator
+
+from flask import Response, stream_with_context
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Format one SSE frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events: Iterator[str]) -> Response:
+    """Wrap a generator of SSE frames in an unbuffered streaming response"""
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Stop reverse proxies from buffering the stream
+        }
+    )
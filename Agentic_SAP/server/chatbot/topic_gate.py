@@ -0,0 +1,170 @@
+"""
+Topic Gate - embedding-centroid relevance check for onboarding questions
+On-topic centroids come from the indexed documents (one per source file) plus SAP/work
+seed phrases; off-topic centroids come from seed phrases per category. Scoring a question
+is one matrix-vector product with the query embedding that retrieval reuses afterwards.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+ON_TOPIC_PHRASES = [
+    "How do I get started with SAP BTP?",
+    "What modules does SAP S/4HANA have?",
+    "Explain SAP Customer Experience and Sales Cloud",
+    "Which analytics tools does the data science team use?",
+    "What should I do in my first week of onboarding?",
+    "Who is my mentor and how do team meetings work?",
+    "How do I request access to the development systems?",
+    "What certifications help my career at SAP?",
+    "How are machine learning models deployed in production?",
+    "Where can I find the department's process documentation?"
+]
+
+OFF_TOPIC_PHRASES = {
+    "entertainment": [
+        "What movie should I watch tonight?",
+        "Recommend a good TV series to binge",
+        "Who won the music awards last night?",
+        "Tell me some celebrity gossip"
+    ],
+    "food": [
+        "Give me a recipe for chocolate cake",
+        "What should I cook for dinner?",
+        "Which restaurant has the best pizza?"
+    ],
+    "travel": [
+        "Where should I go on holiday this summer?",
+        "What are cheap flights to Spain?",
+        "Plan a weekend trip to the beach"
+    ],
+    "sports_health": [
+        "Who will win the football match on Sunday?",
+        "How do I lose weight quickly?",
+        "What is a good workout routine for the gym?",
+        "I have a headache, what medicine should I take?"
+    ],
+    "personal": [
+        "How do I get a girlfriend?",
+        "Give me dating advice",
+        "My family is arguing, what should I do?",
+        "What is the meaning of life?"
+    ],
+    "money": [
+        "Should I buy bitcoin now?",
+        "Which stocks will go up next week?",
+        "How can I win the lottery?"
+    ],
+    "politics_religion": [
+        "Who should I vote for in the election?",
+        "What do you think about religion?",
+        "Is the government doing a good job?"
+    ],
+    "chitchat": [
+        "Tell me a joke",
+        "Write a poem about cats",
+        "What's the weather like today?",
+        "What's your favorite color?"
+    ]
+}
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class TopicGate:
+    """
+    Rejects a question when its best off-topic centroid beats its best on-topic centroid
+    by more than margin (cosine similarity). Centroids are unit vectors stacked in one matrix.
+    """
+
+    def __init__(self, labels: List[str], centroids: np.ndarray, on_topic: List[bool], margin: float = 0.05):
+        self.labels = labels
+        self.centroids = _normalize_rows(np.asarray(centroids, dtype=np.float32))
+        self.on_topic = np.asarray(on_topic, dtype=bool)
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._rejected = defaultdict(int)
+
+    @classmethod
+    def build(cls, embedding, store=None, margin: float = 0.05) -> "TopicGate":
+        """
+        Embed the seed phrases in one batch and add one centroid per source document of
+        store (anything with a Chroma-style get), using the vectors already in the index
+        """
+        labels, centroids, on_topic = [], [], []
+        if store is not None:
+            data = store.get(include=["embeddings", "metadatas"])
+            vectors = data.get("embeddings")
+            if vectors is not None and len(vectors):
+                vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+                rows_by_source = defaultdict(list)
+                for row, metadata in enumerate(data["metadatas"]):
+                    rows_by_source[(metadata or {}).get("source", "documents")].append(row)
+                for source, rows in sorted(rows_by_source.items()):
+                    labels.append(f"document:{source}")
+                    centroids.append(vectors[rows].mean(axis=0))
+                    on_topic.append(True)
+
+        phrase_groups = [("sap_work", ON_TOPIC_PHRASES, True)] + [
+            (category, phrases, False) for category, phrases in OFF_TOPIC_PHRASES.items()
+        ]
+        phrases = [phrase for _, group, _ in phrase_groups for phrase in group]
+        phrase_vectors = _normalize_rows(np.asarray(embedding.embed_documents(phrases), dtype=np.float32))
+        offset = 0
+        for label, group, is_on_topic in phrase_groups:
+            labels.append(label)
+            centroids.append(phrase_vectors[offset:offset + len(group)].mean(axis=0))
+            on_topic.append(is_on_topic)
+            offset += len(group)
+        return cls(labels, np.vstack(centroids), on_topic, margin)
+
+    # =========================
+    # Scoring
+    # =========================
+    def check(self, query_vector) -> Dict:
+        """
+        {'on_topic', 'category', 'off_topic_lead'}: category is the closest centroid's label,
+        off_topic_lead how far the best off-topic similarity exceeds the best on-topic one
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        similarities = self.centroids @ (query / norm if norm else query)
+        best_on = float(similarities[self.on_topic].max())
+        off_rows = np.flatnonzero(~self.on_topic)
+        best_off_row = int(off_rows[np.argmax(similarities[off_rows])])
+        lead = float(similarities[best_off_row]) - best_on
+        is_on_topic = lead <= self.margin
+        category = self.labels[int(np.argmax(similarities))]
+        with self._lock:
+            self._checks += 1
+            if not is_on_topic:
+                self._rejected[self.labels[best_off_row]] += 1
+        return {"on_topic": is_on_topic, "category": category, "off_topic_lead": round(lead, 4)}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "centroids": len(self.labels),
+                "on_topic_centroids": int(self.on_topic.sum()),
+                "margin": self.margin,
+                "checks": self._checks,
+                "rejected": sum(self._rejected.values()),
+                "rejected_by_category": dict(self._rejected)
+            }
+
+
+def build_topic_gate(embedding, store=None, margin: float = 0.05) -> Optional[TopicGate]:
+    """TopicGate.build, or None (gate disabled) when the seed phrases cannot be embedded"""
+    try:
+        return TopicGate.build(embedding, store, margin)
+    except Exception as e:
+        print(f"⚠️ Could not build topic gate: {e} - relying on keyword checks only")
+        return None
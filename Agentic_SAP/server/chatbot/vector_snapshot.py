@@ -0,0 +1,92 @@
+"""
+Vector Snapshot - the whole vector index in one memory-mappable file
+Layout: magic, header length, JSON header (ids, texts, metadata, versions), then the
+L2-normalized float32 embedding matrix at a 64-byte aligned offset. Services map the
+matrix read-only, so startup does no SQLite reads and processes share the page cache.
+"""
+
+import os
+import json
+import time
+import struct
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_NAME = "vector_snapshot.bin"
+SNAPSHOT_MAGIC = b"SAPVSNP1"
+SNAPSHOT_ALIGN = 64
+
+
+def write_snapshot(path: str, ids: List[str], texts: List[str], metadatas: List[Dict], embeddings,
+                   index_version: Optional[str] = None) -> Dict:
+    """Write the snapshot atomically and return its header (without the per-chunk lists)"""
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1) if ids else np.zeros((0, 0), np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+    payload = json.dumps({"ids": ids, "texts": texts, "metadatas": metadatas}, sort_keys=True)
+    content_hash = hashlib.sha256(payload.encode("utf-8") + matrix.tobytes()).hexdigest()
+    summary = {
+        "format": 1,
+        "count": len(ids),
+        "dimensions": int(matrix.shape[1]) if len(ids) else 0,
+        "dtype": "float32",
+        "index_version": index_version,
+        "content_hash": content_hash,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    header = json.dumps(dict(summary, ids=ids, texts=texts, metadatas=metadatas)).encode("utf-8")
+    prefix = len(SNAPSHOT_MAGIC) + 8 + len(header)
+    padding = (-prefix) % SNAPSHOT_ALIGN
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * padding)
+        f.write(matrix.tobytes())
+    os.replace(tmp_path, path)
+    return summary
+
+
+def read_snapshot(path: str) -> Tuple[Dict, np.ndarray]:
+    """Return (header, matrix) with the matrix memory-mapped read-only"""
+    with open(path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a vector snapshot")
+        (header_length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    prefix = len(SNAPSHOT_MAGIC) + 8 + header_length
+    offset = prefix + (-prefix) % SNAPSHOT_ALIGN
+    if header["count"] == 0:
+        return header, np.zeros((0, 0), dtype=np.float32)
+    matrix = np.memmap(path, dtype=np.float32, mode="r", offset=offset,
+                       shape=(header["count"], header["dimensions"]))
+    return header, matrix
+
+
+def snapshot_index_version(path: str) -> Optional[str]:
+    """index_version recorded in a snapshot, or None when it is missing or unreadable"""
+    try:
+        header, _ = read_snapshot(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return header.get("index_version")
+
+
+def export_chroma_snapshot(chroma_db, path: str, index_version: Optional[str] = None) -> Dict:
+    """Export every vector, text and metadata entry of a Chroma collection into a snapshot"""
+    data = chroma_db.get(include=["embeddings", "documents", "metadatas"])
+    embeddings = data.get("embeddings")
+    return write_snapshot(
+        path,
+        list(data["ids"]),
+        [text or "" for text in data["documents"]],
+        [metadata or {} for metadata in data["metadatas"]],
+        embeddings if embeddings is not None and len(embeddings) else np.zeros((0, 0), dtype=np.float32),
+        index_version=index_version
+    )
@@ -203,6 +203,33 @@ app.post('/api/mentor-suggest', async (req, res) => {
   }
 });
 
+// Forward a POST to a Python streaming endpoint and pipe its Server-Sent Events to the client
+async function proxyEventStream(upstreamUrl, payload, res, errorMessage) {
+  try {
+    const response = await fetch(upstreamUrl, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(payload)
+    });
+    res.status(response.status);
+    res.setHeader('Content-Type', response.headers.get('content-type') || 'text/event-stream');
+    res.setHeader('Cache-Control', 'no-cache');
+    res.setHeader('X-Accel-Buffering', 'no');
+    res.flushHeaders();
+    response.body.pipe(res);
+  } catch (error) {
+    console.error(`Error connecting to Python streaming server (${upstreamUrl}):`, error);
+    res.status(500).json({ error: errorMessage });
+  }
+}
+
+// NEW ENDPOINT: Streaming mentor suggestions (tokens as SSE, suggestions/sources in final 'done' event)
+app.post('/api/mentor-suggest/stream', async (req, res) => {
+  const { message, user_id } = req.body;
+  await proxyEventStream('http://localhost:5001/api/mentor-suggest/stream', { message, user_id }, res,
+    'Failed to stream mentor suggestion from AI server.');
+});
+
 // NEW ENDPOINT: Reset conversation history in Python backend
 // This endpoint forwards reset requests to the Python Flask server
 // Called when user clicks the reset/refresh button in frontend
@@ -301,6 +328,13 @@ app.post('/api/chat/general-chat', async (req, res) => {
   }
 });
 
+// NEW ENDPOINT: Streaming general chat (tokens as SSE, suggestions/sources in final 'done' event)
+app.post('/api/chat/general-chat/stream', async (req, res) => {
+  const { message, user_id } = req.body;
+  await proxyEventStream('http://localhost:5003/api/onboarding-chat/stream', { message, user_id }, res,
+    'Failed to stream general chat response.');
+});
+
 // NEW ENDPOINT: Reset general chat conversation history
 app.post('/api/chat/general-reset', async (req, res) => {
   const { user_id } = req.body;
@@ -337,6 +371,23 @@ app.post('/api/chat/search-docs', async (req, res) => {
   }
 });
 
+// Batch variant: several queries in one round trip, encoded together
+app.post('/api/chat/search-docs/batch', async (req, res) => {
+  const { queries, top_k = 3 } = req.body;
+  try {
+    const response = await fetch('http://localhost:5003/api/search-docs/batch', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ queries, top_k })
+    });
+    const data = await response.json();
+    res.status(response.status).json(data);
+  } catch (error) {
+    console.error('Error connecting to Onboarding Mode server for batch search:', error);
+    res.status(500).json({ error: 'Failed to search documents.' });
+  }
+});
+
 // LEGACY ENDPOINT: Keep for backward compatibility but deprecated
 app.post('/api/chat/practice-session', async (req, res) => {
   const { scenario, difficulty, userId } = req.body;
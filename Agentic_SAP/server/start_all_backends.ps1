@@ -100,6 +100,19 @@ if (-not $pythonExe) {
 
 # Start all Python backends as background processes
 Write-Host ""
+Write-Host "Starting Embedding Service (Port 5007)..." -ForegroundColor Magenta
+$embeddingProcess = Start-Process $pythonExe -ArgumentList "embedding_service.py" -PassThru -WindowStyle Minimized
+
+# Wait for the shared model to load before the services that use it
+for ($i = 0; $i -lt 60; $i++) {
+    try {
+        Invoke-WebRequest -Uri "http://localhost:5007/health" -UseBasicParsing -TimeoutSec 2 | Out-Null
+        break
+    } catch {
+        Start-Sleep 1
+    }
+}
+
 Write-Host "Starting Mentor Mode (Port 5001)..." -ForegroundColor Magenta
 $mentorProcess = Start-Process $pythonExe -ArgumentList "mentor_mode.py" -PassThru -WindowStyle Minimized
 
@@ -138,6 +151,7 @@ Write-Host "All backend services started successfully!" -ForegroundColor Green
 Write-Host ""
 Write-Host "Backend APIs:" -ForegroundColor Cyan
 Write-Host "   Node.js API Server: http://localhost:3001" -ForegroundColor White
+Write-Host "   Embedding Service: http://localhost:5007" -ForegroundColor White
 Write-Host "   Mentor Mode API: http://localhost:5001" -ForegroundColor White
 Write-Host "   Practice Mode API: http://localhost:5002" -ForegroundColor White
 Write-Host "   Onboarding Mode API: http://localhost:5003" -ForegroundColor White
@@ -146,6 +160,7 @@ Write-Host "   Course Search API: http://localhost:5005" -ForegroundColor White
 Write-Host ""
 Write-Host "Process IDs:" -ForegroundColor Cyan
 Write-Host "   Node.js Server: $($nodeProcess.Id)" -ForegroundColor White
+Write-Host "   Embedding Service: $($embeddingProcess.Id)" -ForegroundColor White
 Write-Host "   Mentor Mode: $($mentorProcess.Id)" -ForegroundColor White
 Write-Host "   Practice Mode: $($practiceProcess.Id)" -ForegroundColor White
 Write-Host "   Onboarding Mode: $($onboardingProcess.Id)" -ForegroundColor White
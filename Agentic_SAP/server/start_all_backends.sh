@@ -8,6 +8,7 @@ echo "🚀 Starting SAP Team Python Backend Services..."
 
 # Kill any existing processes first
 echo "🧹 Cleaning up existing processes..."
+pkill -f "embedding_service.py" 2>/dev/null || true
 pkill -f "mentor_mode.py" 2>/dev/null || true
 pkill -f "practice_mode.py" 2>/dev/null || true  
 pkill -f "onboarding_mode.py" 2>/dev/null || true
@@ -45,6 +46,19 @@ else
     echo "⚠️ Agentic AI health check failed - continuing anyway..."
 fi
 
+# Step 0: Start the shared embedding service (one MiniLM model for every service)
+echo ""
+echo "0️⃣ Starting Embedding Service (Port 5007)..."
+python3 embedding_service.py &
+EMBEDDING_PID=$!
+echo "🧠 Embedding Service started with PID: $EMBEDDING_PID"
+
+# Wait for the model to load so the other services connect instead of loading their own copy
+for i in $(seq 1 60); do
+    curl -s http://localhost:5007/health > /dev/null 2>&1 && break
+    sleep 1
+done
+
 # Step 1: Start mentor_mode.py first (initializes ChromaDB)
 echo ""
 echo "1️⃣ Starting Mentor Mode (Port 5001) - Initializes ChromaDB..."
@@ -97,6 +111,7 @@ echo ""
 echo "✅ Python backends started successfully!"
 echo ""
 echo "🔗 Backend APIs:"
+echo "   • Embedding Service: http://localhost:5007"
 echo "   • Mentor Mode API: http://localhost:5001"
 echo "   • Practice Mode API: http://localhost:5002" 
 echo "   • Onboarding Mode API: http://localhost:5003"
@@ -105,6 +120,7 @@ echo "   • Course Search API: http://localhost:5005"
 echo "   • Timeline API: http://localhost:5006"
 echo ""
 echo "📊 Process IDs:"
+echo "   • Embedding Service: $EMBEDDING_PID"
 echo "   • Mentor Mode: $MENTOR_PID"
 echo "   • Practice Mode: $PRACTICE_PID"
 echo "   • Onboarding Mode: $ONBOARDING_PID"
@@ -15,7 +15,7 @@ Get-Process node -ErrorAction SilentlyContinue | Where-Object {
 # Stop all Python processes related to our backends
 Write-Host "🧹 Stopping Python backend processes..." -ForegroundColor Yellow
 
-$processNames = @("mentor_mode", "practice_mode", "onboarding_mode", "ai_skill_gap", "course_search")
+$processNames = @("embedding_service", "mentor_mode", "practice_mode", "onboarding_mode", "ai_skill_gap", "course_search")
 
 foreach ($processName in $processNames) {
     $processes = Get-Process python* -ErrorAction SilentlyContinue | Where-Object { 
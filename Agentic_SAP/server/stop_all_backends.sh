@@ -12,6 +12,7 @@ pkill -f "onboarding_mode.py" 2>/dev/null && echo "   ✅ Stopped Onboarding Mod
 pkill -f "ai_skill_gap.py" 2>/dev/null && echo "   ✅ Stopped AI Skill Gap" || echo "   ⚠️ AI Skill Gap not running"
 pkill -f "course_search.py" 2>/dev/null && echo "   ✅ Stopped Course Search" || echo "   ⚠️ Course Search not running"
 pkill -f "timeline_api.py" 2>/dev/null && echo "   ✅ Stopped Timeline API" || echo "   ⚠️ Timeline API not running"
+pkill -f "embedding_service.py" 2>/dev/null && echo "   ✅ Stopped Embedding Service" || echo "   ⚠️ Embedding Service not running"
 
 
 echo "🧹 Stopping Node.js server..."
@@ -2,12 +2,14 @@
 AI-powered timeline generation for course learning plans
 """
 import json
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import os
 from dotenv import load_dotenv
 
+# Shared pooled LLM client lives with the chatbot services
+from chatbot.llm_client import get_llm_client
+
 # Load environment variables
 load_dotenv()
 
@@ -157,11 +159,9 @@ class TimelineGenerator:
         try:
             # Get OpenRouter API configuration from environment
             api_key = os.getenv("OPENROUTER_API_KEY")
-            api_base = os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
             model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct")
             
             print(f"🔑 API Key: {'Found' if api_key else 'Not found'}")
-            print(f"🌐 API Base: {api_base}")
             print(f"🤖 Model: {model}")
             
             if not api_key:
@@ -213,73 +213,51 @@ Respond with ONLY this JSON format:
   "reasoning": "Brief explanation of the specific adjustments made"
 }}"""
 
-            # Call OpenRouter API
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost:5002",  # Optional: for analytics
-                "X-Title": "Timeline Revision System"  # Optional: for analytics
-            }
-            
             print(f"🔥 Sending LLM request with prompt: {user_prompt[:200]}...")
             
-            response = requests.post(
-                f"{api_base}/chat/completions",
-                json={
-                    "model": model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "temperature": 0.7,  # Higher temperature for more varied responses
-                    "max_tokens": 500
+            # Call OpenRouter API through the shared connection pool
+            content = get_llm_client().chat(
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                model=model,
+                temperature=0.7,  # Higher temperature for more varied responses
+                max_tokens=500,
+                endpoint="timeline_revision",
+                extra_headers={
+                    "HTTP-Referer": "http://localhost:5002",  # Optional: for analytics
+                    "X-Title": "Timeline Revision System"  # Optional: for analytics
                 },
-                headers=headers,
                 timeout=30
             )
             
-            if response.status_code == 200:
-                llm_response = response.json()
+            # Try to parse the JSON response
+            try:
+                # Clean the response in case there's extra text
+                content = content.strip()
+                if content.startswith("```json"):
+                    content = content.replace("```json", "").replace("```", "").strip()
                 
-                # Extract the response content
-                if "choices" in llm_response and len(llm_response["choices"]) > 0:
-                    content = llm_response["choices"][0]["message"]["content"]
-                    
-                    # Try to parse the JSON response
-                    try:
-                        # Clean the response in case there's extra text
-                        content = content.strip()
-                        if content.startswith("```json"):
-                            content = content.replace("```json", "").replace("```", "").strip()
-                        
-                        raw_prefs = json.loads(content)
-                        # Only keep expected fields
-                        expected_fields = [
-                            "study_hours_per_week",
-                            "preferred_days",
-                            "max_session_length",
-                            "total_weeks",
-                            "reasoning",
-                            "start_date"
-                        ]
-                        revised_prefs = {k: v for k, v in raw_prefs.items() if k in expected_fields}
-                        print(f"✅ LLM successfully parsed revision (filtered): {revised_prefs}")
-                        return revised_prefs
-                        
-                    except json.JSONDecodeError as e:
-                        print(f"❌ Failed to parse LLM response as JSON: {content}")
-                        print(f"JSON Error: {e}")
-                        return {}
-                else:
-                    print(f"❌ Unexpected LLM response format: {llm_response}")
-                    return {}
-            else:
-                print(f"❌ OpenRouter API error: {response.status_code} - {response.text}")
+                raw_prefs = json.loads(content)
+                # Only keep expected fields
+                expected_fields = [
+                    "study_hours_per_week",
+                    "preferred_days",
+                    "max_session_length",
+                    "total_weeks",
+                    "reasoning",
+                    "start_date"
+                ]
+                revised_prefs = {k: v for k, v in raw_prefs.items() if k in expected_fields}
+                print(f"✅ LLM successfully parsed revision (filtered): {revised_prefs}")
+                return revised_prefs
+                
+            except json.JSONDecodeError as e:
+                print(f"❌ Failed to parse LLM response as JSON: {content}")
+                print(f"JSON Error: {e}")
                 return {}
                 
-        except requests.RequestException as e:
-            print(f"❌ Failed to call OpenRouter API: {e}")
-            return {}
         except Exception as e:
             print(f"❌ Error in LLM revision: {e}")
             return {}
@@ -289,7 +267,6 @@ Respond with ONLY this JSON format:
         try:
             # Get OpenRouter API configuration from environment
             api_key = os.getenv("OPENROUTER_API_KEY")
-            api_base = os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
             model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3-8b-instruct")
             
             if not api_key:
@@ -324,53 +301,35 @@ Respond with ONLY this JSON format:
   "reasoning": "Brief explanation of the specific changes made"
 }}"""
 
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost:5002",
-                "X-Title": "Course Structure Modification"
-            }
-            
             print(f"🔥 Sending course structure LLM request: {requirements}")
             
-            response = requests.post(
-                f"{api_base}/chat/completions",
-                json={
-                    "model": model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "temperature": 0.7,  # Higher temperature for more varied responses
-                    "max_tokens": 300
+            content = get_llm_client().chat(
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                model=model,
+                temperature=0.7,  # Higher temperature for more varied responses
+                max_tokens=300,
+                endpoint="timeline_course_structure",
+                extra_headers={
+                    "HTTP-Referer": "http://localhost:5002",
+                    "X-Title": "Course Structure Modification"
                 },
-                headers=headers,
                 timeout=30
             )
             
-            if response.status_code == 200:
-                llm_response = response.json()
+            try:
+                content = content.strip()
+                if content.startswith("```json"):
+                    content = content.replace("```json", "").replace("```", "").strip()
                 
-                if "choices" in llm_response and len(llm_response["choices"]) > 0:
-                    content = llm_response["choices"][0]["message"]["content"]
-                    
-                    try:
-                        content = content.strip()
-                        if content.startswith("```json"):
-                            content = content.replace("```json", "").replace("```", "").strip()
-                        
-                        modifications = json.loads(content)
-                        print(f"✅ LLM course structure modifications: {modifications}")
-                        return modifications
-                        
-                    except json.JSONDecodeError as e:
-                        print(f"❌ Failed to parse LLM course structure response: {content}")
-                        return {}
-                else:
-                    print(f"❌ Unexpected LLM course structure response: {llm_response}")
-                    return {}
-            else:
-                print(f"❌ OpenRouter API error for course structure: {response.status_code}")
+                modifications = json.loads(content)
+                print(f"✅ LLM course structure modifications: {modifications}")
+                return modifications
+                
+            except json.JSONDecodeError as e:
+                print(f"❌ Failed to parse LLM course structure response: {content}")
                 return {}
                 
         except Exception as e: